@@ -1,10 +1,9 @@
 import os
-from scripts.data_collection import get_nutritional_data, save_to_csv
-from scripts.training import formulations, optimize_recipe
-from scripts.genetic_optimizer import optimize_genetic
 
 def collect_nutritional_data(ingredients_list):
     """Recolecta datos nutricionales y los guarda en CSV."""
+    from scripts.data_collection import get_nutritional_data, save_to_csv
+
     print("Recolectando datos nutricionales...")
     nutritional_data = []
     for ingredient in ingredients_list:
@@ -25,8 +24,14 @@ def main():
     ]
     collect_nutritional_data(ingredients_list)
     
+    # Importaciones diferidas: el optimizador no carga matplotlib; los gráficos e
+    # informes se generan después a partir del resultado guardado
+    from scripts.genetic_optimizer import latest_result_path, optimize_genetic
+    from scripts.genetic_report import render_result
+
     for masa_name in ['C12', 'G12']:
         optimize_genetic(masa_name)
+        render_result(latest_result_path(masa_name))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Construye la réplica local de FoodData Central a partir de las descargas masivas.
+
+Uso:
+    python -m scripts.build_fdc_mirror FoodData_Central_csv_2024-04-18/
+    python -m scripts.build_fdc_mirror FoodData_Central_foundation_food_json.json \\
+        --output data/processed/fdc_mirror.sqlite --data-type Foundation
+
+Después, con FDC_MIRROR_PATH apuntando al archivo generado, USDAService responde desde
+la réplica sin llamadas de red.
+"""
+import argparse
+import logging
+import os
+import time
+
+from src.core.services.fdc_mirror import DEFAULT_DATA_TYPES, FDCMirror
+
+DEFAULT_OUTPUT = os.path.join("data", "processed", "fdc_mirror.sqlite")
+
+
+def build_mirror(sources, output=DEFAULT_OUTPUT, data_types=DEFAULT_DATA_TYPES):
+    """Importa cada fuente (directorio CSV o archivo JSON) en la réplica y retorna el total."""
+    total = 0
+    with FDCMirror(output) as mirror:
+        for source in sources:
+            start = time.time()
+            if os.path.isdir(source):
+                count = mirror.import_csv(source, data_types)
+            else:
+                count = mirror.import_json(source, data_types)
+            logging.info(f"{source}: {count} alimentos en {time.time() - start:.1f}s")
+            total += count
+        logging.info(f"Réplica {output}: {len(mirror)} alimentos")
+    return total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sources", nargs="+", help="Directorios CSV o archivos JSON de FDC")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Archivo SQLite de salida")
+    parser.add_argument(
+        "--data-type",
+        action="append",
+        dest="data_types",
+        help="Tipo de datos FDC a importar (repetible); por defecto "
+        + ", ".join(DEFAULT_DATA_TYPES),
+    )
+    parser.add_argument("--all-types", action="store_true", help="Importar todos los tipos")
+    args = parser.parse_args()
+
+    data_types = None if args.all_types else (args.data_types or DEFAULT_DATA_TYPES)
+    build_mirror(args.sources, args.output, data_types)
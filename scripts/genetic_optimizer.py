@@ -1,23 +1,29 @@
 # flake8: noqa: E402
-import matplotlib
-matplotlib.use("Agg")  # Evita abrir ventanas gráficas
-
+import csv
 import datetime
+import gzip
+import json
 import logging
+import math
+import multiprocessing
 import os
+import pickle
 import random
-from functools import partial
+import time
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from operator import attrgetter
 from typing import Dict, List, Optional
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 from deap import base, creator, tools
-from pydantic import BaseModel
+from deap.tools.emo import assignCrowdingDist
 
-from src.core.models.ingredient import Ingredient
-from src.core.models.recipe import Recipe
-from src.core.services.usda_service import USDAService
+from src.core.optimization import (
+    ParetoArchive,
+    non_dominated_sort,
+    project_to_bounded_simplex,
+)
 
 # ----------------------------------------------------------------------
 # 1. CONFIGURACIÓN DE LOGGING Y CARPETAS
@@ -58,6 +64,18 @@ SUBSTITUTES = {
     "rice_flour": [CORN_STARCH, "potato_flour"],
 }
 
+# Cotas (mínimo, máximo) de proporción por masa; el resto de ingredientes usa [0, 1]
+INGREDIENT_BOUNDS = {
+    masa_name: {
+        base_ing: (0.2, 0.5),
+        "water": (0.4, 0.6),
+        CORN_STARCH: (0.05, 1.0),
+        XANTHAN_GUM: (0.005, 1.0),
+        "vinegar": (0.01, 1.0),
+    }
+    for masa_name, base_ing in BASE_INGREDIENTS.items()
+}
+
 # Costos de ejemplo
 INGREDIENT_COSTS = {
     "water": 0.01,
@@ -78,32 +96,50 @@ INGREDIENT_COSTS = {
 # ----------------------------------------------------------------------
 # 3. CARGA DE DATOS DE INGREDIENTES
 # ----------------------------------------------------------------------
+# Valores simulados si no existe el CSV:
+# ingredient, calories, protein, carbs, fat, fiber, sodium
+SIMULATED_INGREDIENTS = [
+    ["cauliflower", 30.0, 2.4, 5.0, 0.4, 2.0, 15.0],
+    ["chickpea_flour", 400.0, 16.67, 70.0, 5.0, 16.70, 0.0],
+    ["rice_flour", 375.0, 7.5, 82.5, 0.0, 0.0, 0.0],
+    ["potato_flour", 333.0, 0.0, 83.3, 0.0, 0.0, 0.0],
+    ["corn starch", 350.0, 0.0, 90.0, 0.0, 0.0, 0.0],
+    ["xanthan gum", 625.0, 0.0, 125.0, 0.0, 0.0, 3125.0],
+    ["water", 42.0, 0.0, 10.8, 0.0, 0.0, 8.0],
+    ["olive_oil", 900.0, 0.0, 0.0, 100.0, 0.0, 2.0],
+    ["sugar", 375.0, 0.0, 100.0, 0.0, 0.0, 0.0],
+    ["salt", 0.0, 0.0, 0.0, 0.0, 0.0, 39300.0],
+    ["vinegar", 20.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+]
+SIMULATED_COLUMNS = ["calories", "protein", "carbs", "fat", "fiber", "sodium"]
+
+
+def _parse_value(value):
+    """Convierte a float los campos numéricos del CSV; el resto se deja como texto."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def load_ingredients_data(csv_path):
+    """Lee el CSV de ingredientes como {ingrediente: {columna: valor}} sin usar pandas."""
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        return {
+            row.pop("ingredient").strip().lower(): {k: _parse_value(v) for k, v in row.items()}
+            for row in csv.DictReader(f)
+        }
+
+
 try:
     csv_path = os.path.join(CURRENT_DIR, "data", "processed", "ingredients_data_gluten_free.csv")
-    df = pd.read_csv(csv_path, encoding="utf-8")
-    df["ingredient"] = df["ingredient"].str.strip().str.lower()
-    INGREDIENTS_DATA = df.set_index("ingredient").to_dict("index")
+    INGREDIENTS_DATA = load_ingredients_data(csv_path)
     logging.info(f"Datos de ingredientes cargados desde: {csv_path}")
 except FileNotFoundError:
     logging.warning("No se encontró el CSV. Usando valores simulados en memoria.")
-    df = pd.DataFrame(
-        [
-            ["cauliflower", 30.0, 2.4, 5.0, 0.4, 2.0, 15.0],
-            ["chickpea_flour", 400.0, 16.67, 70.0, 5.0, 16.70, 0.0],
-            ["rice_flour", 375.0, 7.5, 82.5, 0.0, 0.0, 0.0],
-            ["potato_flour", 333.0, 0.0, 83.3, 0.0, 0.0, 0.0],
-            ["corn starch", 350.0, 0.0, 90.0, 0.0, 0.0, 0.0],
-            ["xanthan gum", 625.0, 0.0, 125.0, 0.0, 0.0, 3125.0],
-            ["water", 42.0, 0.0, 10.8, 0.0, 0.0, 8.0],
-            ["olive_oil", 900.0, 0.0, 0.0, 100.0, 0.0, 2.0],
-            ["sugar", 375.0, 0.0, 100.0, 0.0, 0.0, 0.0],
-            ["salt", 0.0, 0.0, 0.0, 0.0, 0.0, 39300.0],
-            ["vinegar", 20.0, 0.0, 0.0, 0.0, 0.0, 0.0],
-        ],
-        columns=["ingredient", "calories", "protein", "carbs", "fat", "fiber", "sodium"],
-    )
-    df["ingredient"] = df["ingredient"].str.lower()
-    INGREDIENTS_DATA = df.set_index("ingredient").to_dict("index")
+    INGREDIENTS_DATA = {
+        row[0].lower(): dict(zip(SIMULATED_COLUMNS, row[1:])) for row in SIMULATED_INGREDIENTS
+    }
     logging.info("Datos simulados creados en memoria.")
 
 # ----------------------------------------------------------------------
@@ -136,58 +172,69 @@ def estimar_elasticidad_ingrediente(ing):
     return min(1.0, 0.01 * carbs + 0.02 * protein + 0.005 * fat)
 
 
-def calcular_sodio(receta):
-    return sum(
-        INGREDIENTS_DATA.get(ing, {}).get("sodium", 0) * prop for ing, prop in receta.items()
-    )
-
+# Columnas de la tabla de coeficientes por ingrediente
+COEFFICIENT_COLUMNS = ["density", "elasticity", "sodium", "protein", "cost"]
 
-def calcular_proteinas(receta):
-    return sum(
-        INGREDIENTS_DATA.get(ing, {}).get("protein", 0) * prop for ing, prop in receta.items()
-    )
+# Tamaño máximo de los lotes enviados a toolbox.map en la evaluación por población
+EVAL_CHUNK_SIZE = 4096
 
 
-def calcular_contribuciones(receta):
-    densidad = 0.0
-    elasticidad = 0.0
-    for ing, prop in receta.items():
-        densidad += estimar_densidad_ingrediente(ing) * prop
-        elasticidad += estimar_elasticidad_ingrediente(ing) * prop
-    return densidad, elasticidad
+@lru_cache(maxsize=None)
+def build_coefficient_table(all_ingredients):
+    """
+    Matriz (n_ingredientes, 5) con densidad, elasticidad, sodio, proteína y costo de cada
+    ingrediente, alineada con `all_ingredients` (tupla) y en el orden de COEFFICIENT_COLUMNS.
+    """
+    table = np.array(
+        [
+            [
+                estimar_densidad_ingrediente(ing),
+                estimar_elasticidad_ingrediente(ing),
+                INGREDIENTS_DATA.get(ing, {}).get("sodium", 0),
+                INGREDIENTS_DATA.get(ing, {}).get("protein", 0),
+                INGREDIENT_COSTS.get(ing, 0.1),
+            ]
+            for ing in all_ingredients
+        ],
+        dtype=float,
+    )
+    table.setflags(write=False)
+    return table
 
 
-def evaluate_individual(individual, masa_name, all_ingredients):
-    """Devuelve (densidad, costo, -elasticidad)."""
-    receta = dict(zip(all_ingredients, individual))
-    base_ing = BASE_INGREDIENTS[masa_name]
+def evaluate_population_matrix(population, masa_name, all_ingredients):
+    """
+    Evalúa una población completa como un único producto matricial.
 
-    # Penalizamos si el ingrediente base está en 0
-    if receta.get(base_ing, 0) <= 0:
-        return (9999.0, 9999.0, 9999.0)
-
-    densidad, elasticidad = calcular_contribuciones(receta)
-    sodio = calcular_sodio(receta)
-    proteinas = calcular_proteinas(receta)
+    Retorna un array (n_individuos, 3) con (densidad, costo, -elasticidad) por fila.
+    """
+    all_ingredients = tuple(all_ingredients)
+    proportions = np.asarray(population, dtype=float).reshape(-1, len(all_ingredients))
+    densidad, elasticidad, sodio, proteinas, costo = (
+        proportions @ build_coefficient_table(all_ingredients)
+    ).T
 
     # Penalizaciones suaves
-    if sodio > 400:
-        densidad += 200.0
-    if proteinas < 6:
-        elasticidad -= 200.0
+    densidad = densidad + np.where(sodio > 400, 200.0, 0.0)
+    elasticidad = elasticidad - np.where(proteinas < 6, 200.0, 0.0)
 
     # Bonus por vinagre
-    if receta.get("vinegar", 0) > 0.01:
-        elasticidad += 0.05
-
-    # Costo
-    costo = 0.0
-    for ing, prop in receta.items():
-        c = INGREDIENT_COSTS.get(ing, 0.1)
-        costo += c * prop
+    if "vinegar" in all_ingredients:
+        vinegar = proportions[:, all_ingredients.index("vinegar")]
+        elasticidad = elasticidad + np.where(vinegar > 0.01, 0.05, 0.0)
 
     # Minimizar densidad, costo y -elasticidad (=> maximizar elasticidad)
-    return (densidad, costo, -elasticidad)
+    fitness = np.column_stack([densidad, costo, -elasticidad])
+
+    # Penalizamos si el ingrediente base está en 0
+    base = proportions[:, all_ingredients.index(BASE_INGREDIENTS[masa_name])]
+    fitness[base <= 0] = 9999.0
+    return fitness
+
+
+def evaluate_individual(individual, masa_name, all_ingredients):
+    """Devuelve (densidad, costo, -elasticidad)."""
+    return tuple(evaluate_population_matrix([individual], masa_name, all_ingredients)[0].tolist())
 
 
 def suggest_substitutes(ing):
@@ -212,32 +259,35 @@ def suggest_substitutes(ing):
 # ----------------------------------------------------------------------
 # 6. FUNCIÓN DE REPARACIÓN Y NORMALIZACIÓN
 # ----------------------------------------------------------------------
-def repair_individual(individual, masa_name, all_ingredients):
-    base_ing = BASE_INGREDIENTS[masa_name]
-    for i, ing in enumerate(all_ingredients):
-        # Clampeamos [0..1]
-        individual[i] = max(0.0, min(1.0, individual[i]))
-
-        if ing == base_ing:
-            # Forzamos [0.2..0.5] para el ingrediente base
-            individual[i] = max(0.2, min(0.5, individual[i]))
-        elif ing == "water":
-            individual[i] = max(0.4, min(0.6, individual[i]))
-        elif ing == CORN_STARCH:
-            individual[i] = max(0.05, individual[i])
-        elif ing == XANTHAN_GUM:
-            individual[i] = max(0.005, individual[i])
-        elif ing == "vinegar":
-            individual[i] = max(0.01, individual[i])
+@lru_cache(maxsize=None)
+def build_bounds_table(masa_name, all_ingredients):
+    """Arrays (inferior, superior) de cotas alineados con `all_ingredients` (tupla)."""
+    bounds = INGREDIENT_BOUNDS[masa_name]
+    lower = np.array([bounds.get(ing, (0.0, 1.0))[0] for ing in all_ingredients])
+    upper = np.array([bounds.get(ing, (0.0, 1.0))[1] for ing in all_ingredients])
+    lower.setflags(write=False)
+    upper.setflags(write=False)
+    return lower, upper
+
+
+def repair_population(population, masa_name, all_ingredients):
+    """
+    Proyecta todos los individuos sobre el simplex acotado (cotas de INGREDIENT_BOUNDS y
+    suma 1) en una sola operación, modificándolos in place.
+    """
+    if not population:
+        return population
+    lower, upper = build_bounds_table(masa_name, tuple(all_ingredients))
+    proportions = np.nan_to_num(np.asarray(population, dtype=float), nan=0.0)
+    repaired = project_to_bounded_simplex(proportions, lower, upper)
+    for ind, row in zip(population, repaired.tolist()):
+        ind[:] = row
+    return population
 
-    total = sum(individual)
-    if total > 0:
-        individual = [p / total for p in individual]
-    else:
-        # Fallback si todo se va a 0
-        n = len(individual)
-        individual = [1.0 / n] * n
 
+def repair_individual(individual, masa_name, all_ingredients):
+    """Repara un individuo in place (ver repair_population)."""
+    repair_population([individual], masa_name, all_ingredients)
     return individual
 
 
@@ -271,11 +321,44 @@ def crear_receta_inicial(masa_name, all_ingredients):
 # ----------------------------------------------------------------------
 # 8. ALGORITMO GENÉTICO MÍNIMO (EA MU+LAMBDA)
 # ----------------------------------------------------------------------
+def evaluate_population(population, toolbox):
+    """
+    Evalúa los individuos sin fitness válido usando toolbox.map (serial o en paralelo).
+
+    Si el toolbox registra "evaluate_batch", la población se evalúa por lotes como
+    productos matriciales: uno por proceso del pool (`toolbox.n_workers`), de como
+    mucho EVAL_CHUNK_SIZE individuos.
+    """
+    invalid = [ind for ind in population if not ind.fitness.valid]
+    if not invalid:
+        return
+
+    if hasattr(toolbox, "evaluate_batch"):
+        n_workers = getattr(toolbox, "n_workers", 1)
+        chunk_size = min(EVAL_CHUNK_SIZE, math.ceil(len(invalid) / n_workers))
+        chunks = [invalid[i : i + chunk_size] for i in range(0, len(invalid), chunk_size)]
+        fitnesses = np.concatenate(list(toolbox.map(toolbox.evaluate_batch, chunks)))
+        fitnesses = fitnesses.tolist()
+    else:
+        fitnesses = toolbox.map(toolbox.evaluate, invalid)
+
+    for ind, fit in zip(invalid, fitnesses):
+        ind.fitness.values = fit
+
+
+def repair_all(population, toolbox):
+    """Repara la población en lote si el toolbox lo permite, o individuo por individuo."""
+    if hasattr(toolbox, "repair_population"):
+        toolbox.repair_population(population)
+    else:
+        for ind in population:
+            toolbox.repair(ind)
+
+
 def evaluate_and_repair_population(population, toolbox):
     """Evalúa y repara cada individuo de la población."""
-    for ind in population:
-        toolbox.repair(ind)
-        ind.fitness.values = toolbox.evaluate(ind)
+    repair_all(population, toolbox)
+    evaluate_population(population, toolbox)
 
 
 def create_offspring(parents, lambda_, toolbox, cxpb, mutpb):
@@ -292,8 +375,6 @@ def create_offspring(parents, lambda_, toolbox, cxpb, mutpb):
         if random.random() < mutpb:
             toolbox.mutate(p2)
 
-        toolbox.repair(p1)
-        toolbox.repair(p2)
         del p1.fitness.values
         del p2.fitness.values
 
@@ -301,55 +382,282 @@ def create_offspring(parents, lambda_, toolbox, cxpb, mutpb):
         if len(offspring) < lambda_:
             offspring.append(p2)
 
+    repair_all(offspring, toolbox)
     return offspring
 
 
-def custom_ea_mu_plus_lambda(population, toolbox, mu, lambda_, cxpb, mutpb, ngen):
-    # Evaluar población inicial
-    evaluate_and_repair_population(population, toolbox)
+def select_nsga2(individuals, k):
+    """
+    Selección NSGA-II equivalente a tools.selNSGA2, pero con el ordenamiento no dominado
+    rápido de src.core.optimization en lugar de tools.sortNondominated.
+    """
+    if not individuals or k <= 0:
+        return []
+    # DEAP maximiza wvalues; non_dominated_sort minimiza
+    ranks = non_dominated_sort(-np.array([ind.fitness.wvalues for ind in individuals]))
+    chosen = []
+    for rank in range(ranks.max() + 1):
+        front = [individuals[i] for i in np.flatnonzero(ranks == rank)]
+        assignCrowdingDist(front)
+        if len(chosen) + len(front) > k:
+            front.sort(key=attrgetter("fitness.crowding_dist"), reverse=True)
+            chosen.extend(front[: k - len(chosen)])
+            break
+        chosen.extend(front)
+    return chosen
+
+
+def update_archive(archive, population):
+    """
+    Añade la población al archivo de Pareto. Se guardan referencias: los individuos no se
+    modifican después de evaluados (los operadores trabajan sobre clones).
+    """
+    for ind in population:
+        archive.add(ind.fitness.values, ind)
+    return archive
+
+
+def ea_mu_plus_lambda_steps(population, toolbox, mu, lambda_, cxpb, mutpb, ngen, start_gen=0):
+    """
+    Versión generadora del EA mu+lambda: produce (generación, población) tras cada
+    generación, empezando por la población inicial evaluada (generación `start_gen`).
+
+    Con `start_gen` > 0 se asume una población ya reparada (p. ej. leída de un checkpoint)
+    y solo se evalúan los individuos sin fitness válido.
+    """
+    if start_gen == 0:
+        evaluate_and_repair_population(population, toolbox)
+    else:
+        evaluate_population(population, toolbox)
+    yield start_gen, population
 
-    for _ in range(ngen):
+    for gen in range(start_gen + 1, ngen + 1):
         parents = toolbox.select(population, mu)
         parents = list(map(toolbox.clone, parents))
 
         offspring = create_offspring(parents, lambda_, toolbox, cxpb, mutpb)
-
-        for ind in offspring:
-            ind.fitness.values = toolbox.evaluate(ind)
+        evaluate_population(offspring, toolbox)
 
         population = parents + offspring
         population = toolbox.select(population, mu + lambda_)
+        yield gen, population
+
+
+def custom_ea_mu_plus_lambda(population, toolbox, mu, lambda_, cxpb, mutpb, ngen):
+    for _, population in ea_mu_plus_lambda_steps(
+        population, toolbox, mu, lambda_, cxpb, mutpb, ngen
+    ):
+        pass
+    return population
+
+
+# ----------------------------------------------------------------------
+# 8b. ESTADÍSTICAS POR GENERACIÓN Y CHECKPOINTS
+# ----------------------------------------------------------------------
+CHECKPOINT_VERSION = 1
+
+
+def fitness_matrix(population):
+    """Array (n_individuos, 3) con los valores de fitness de la población."""
+    if not population:
+        return np.empty((0, 3))
+    return np.array([ind.fitness.values for ind in population], dtype=float)
+
+
+def _hypervolume_2d(points, reference):
+    """Hipervolumen (minimización) de puntos 2D respecto a `reference`."""
+    points = points[np.argsort(points[:, 0], kind="stable")]
+    next_x = np.append(points[1:, 0], reference[0])
+    best_y = np.minimum.accumulate(points[:, 1])
+    return float(np.sum((next_x - points[:, 0]) * (reference[1] - best_y)))
+
+
+def hypervolume(points, reference):
+    """
+    Hipervolumen exacto de un conjunto de puntos de 3 objetivos a minimizar, respecto al
+    punto de referencia `reference`. Los puntos que no lo dominan no aportan volumen.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    reference = np.asarray(reference, dtype=float)
+    points = points[np.all(points < reference, axis=1)]
+    if points.size == 0:
+        return 0.0
+
+    # Corte por rebanadas en el primer objetivo: cada rebanada es un problema 2D
+    points = points[np.argsort(points[:, 0], kind="stable")]
+    next_x = np.append(points[1:, 0], reference[0])
+    volume = 0.0
+    for i in range(len(points)):
+        depth = next_x[i] - points[i, 0]
+        if depth > 0:
+            volume += depth * _hypervolume_2d(points[: i + 1, 1:], reference[1:])
+    return float(volume)
+
+
+def hypervolume_reference(population):
+    """Punto de referencia fijo: peor valor del primer frente inicial más uno."""
+    points = fitness_matrix(population)
+    return points[non_dominated_sort(points) == 0].max(axis=0) + 1.0
+
+
+def generation_stats(generation, archive, reference, start_time):
+    """Estadísticas de una generación a partir del archivo de Pareto acumulado."""
+    front = archive.points()
+    return {
+        "generation": generation,
+        "hypervolume": hypervolume(front, reference),
+        "front_size": len(front),
+        "best_density": float(front[:, 0].min()),
+        "best_cost": float(front[:, 1].min()),
+        "best_elasticity": float(-front[:, 2].min()),
+        "elapsed": time.perf_counter() - start_time,
+    }
+
+
+def _population_arrays(population):
+    """Proporciones y fitness de la población como arrays (fitness NaN si no es válido)."""
+    proportions = np.array([list(ind) for ind in population], dtype=float)
+    fitness = np.array(
+        [ind.fitness.values if ind.fitness.valid else (np.nan,) * 3 for ind in population],
+        dtype=float,
+    )
+    return proportions, fitness
 
+
+def _population_from_arrays(proportions, fitness):
+    """Reconstruye individuos de DEAP a partir de los arrays de un checkpoint."""
+    population = []
+    for row, fit in zip(proportions.tolist(), fitness):
+        ind = creator.Individual(row)
+        if not np.isnan(fit).any():
+            ind.fitness.values = tuple(fit.tolist())
+        population.append(ind)
     return population
 
 
+def save_checkpoint(path, masa_name, all_ingredients, generation, population, archive, reference):
+    """
+    Guarda población, archivo de Pareto y estado de los generadores aleatorios en un
+    pickle comprimido. La escritura es atómica: un fallo a mitad no corrompe el anterior.
+    """
+    pop_x, pop_f = _population_arrays(population)
+    arc_x, arc_f = _population_arrays(list(archive))
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "masa_name": masa_name,
+        "ingredients": list(all_ingredients),
+        "generation": generation,
+        "population": pop_x,
+        "fitness": pop_f,
+        "archive": arc_x,
+        "archive_fitness": arc_f,
+        "reference": np.asarray(reference, dtype=float),
+        "random_state": random.getstate(),
+        "numpy_random_state": np.random.get_state(),
+    }
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    logging.info("Checkpoint de %s (generación %d) guardado en: %s", masa_name, generation, path)
+
+
+def load_checkpoint(path):
+    """Lee un checkpoint guardado por save_checkpoint."""
+    with gzip.open(path, "rb") as f:
+        state = pickle.load(f)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Versión de checkpoint no soportada: {state.get('version')}")
+    return state
+
+
 # ----------------------------------------------------------------------
 # 9. GUARDAR ARCHIVOS DE RESULTADOS
 # ----------------------------------------------------------------------
-def _save_file(content: str, folder_path: str, max_files: int = 10):
-    """Guarda un archivo .txt y elimina los más antiguos si excede max_files."""
+def _save_file(
+    content: str,
+    folder_path: str,
+    max_files: int = 10,
+    extension: str = ".txt",
+    prefix: str = "",
+):
+    """
+    Guarda un archivo (.txt por defecto) y elimina los más antiguos con la misma extensión
+    si excede max_files. Retorna la ruta del archivo guardado.
+    """
     os.makedirs(folder_path, exist_ok=True)
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp}.txt"
+    filename = f"{prefix}{timestamp}{extension}"
     filepath = os.path.join(folder_path, filename)
     with open(filepath, "w", encoding="utf-8") as f:
         f.write(content)
     logging.info("Archivo guardado en: %s", filepath)
 
     # Limitar la cantidad de archivos
-    files = [os.path.join(folder_path, x) for x in os.listdir(folder_path) if x.endswith(".txt")]
+    files = [
+        os.path.join(folder_path, x)
+        for x in os.listdir(folder_path)
+        if x.startswith(prefix) and x.endswith(extension)
+    ]
     files.sort(key=lambda x: os.path.getmtime(x))
     while len(files) > max_files:
         oldest = files.pop(0)
         os.remove(oldest)
         logging.info("Archivo antiguo eliminado: %s", oldest)
 
+    return filepath
+
+
+def save_result(masa_name, all_ingredients, best_recipe, final_pop, archive):
+    """
+    Guarda en RESULTS_FOLDER un JSON con la mejor receta, la población final y el archivo
+    de Pareto, para generar gráficos e informes después (ver scripts/genetic_report.py).
+    """
+    pop_x, pop_f = _population_arrays(final_pop)
+    arc_x, arc_f = _population_arrays(list(archive))
+    result = {
+        "masa_name": masa_name,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "ingredients": list(all_ingredients),
+        "objectives": ["density", "cost", "neg_elasticity"],
+        "best_recipe": best_recipe,
+        "population": pop_x.tolist(),
+        "fitness": pop_f.tolist(),
+        "archive": arc_x.tolist(),
+        "archive_fitness": arc_f.tolist(),
+    }
+    return _save_file(
+        json.dumps(result), RESULTS_FOLDER, extension=".json", prefix=f"resultado_{masa_name}_"
+    )
+
+
+def load_result(path):
+    """Lee un resultado guardado por save_result."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def latest_result_path(masa_name, folder_path=None):
+    """Ruta del resultado más reciente de la masa, o None si no hay ninguno."""
+    folder_path = folder_path or RESULTS_FOLDER
+    prefix = f"resultado_{masa_name}_"
+    if not os.path.isdir(folder_path):
+        return None
+    files = [
+        os.path.join(folder_path, x)
+        for x in os.listdir(folder_path)
+        if x.startswith(prefix) and x.endswith(".json")
+    ]
+    return max(files, key=os.path.getmtime) if files else None
+
 
 # ----------------------------------------------------------------------
 # 10. OPTIMIZACIÓN PRINCIPAL
 # ----------------------------------------------------------------------
-def optimize_genetic(masa_name, pop_size=30, ngen=20):
-    """Optimiza la masa (C12 o G12) y retorna la mejor receta."""
+def configure_toolbox(masa_name):
+    """Registra los operadores para la masa indicada y retorna la lista de ingredientes."""
     all_ingredients = ["water", BASE_INGREDIENTS[masa_name]] + ADJUSTABLE_INGREDIENTS
 
     toolbox.register(
@@ -363,51 +671,42 @@ def optimize_genetic(masa_name, pop_size=30, ngen=20):
         "evaluate",
         partial(evaluate_individual, masa_name=masa_name, all_ingredients=all_ingredients),
     )
+    toolbox.register(
+        "evaluate_batch",
+        partial(evaluate_population_matrix, masa_name=masa_name, all_ingredients=all_ingredients),
+    )
     toolbox.register("mate", tools.cxBlend, alpha=0.5)
     toolbox.register("mutate", tools.mutGaussian, mu=0, sigma=0.05, indpb=0.3)
-    toolbox.register("select", tools.selNSGA2)
+    toolbox.register("select", select_nsga2)
     toolbox.register(
         "repair", partial(repair_individual, masa_name=masa_name, all_ingredients=all_ingredients)
     )
-
-    # Crear población
-    pop = toolbox.population(n=pop_size)
-    # Ejecutar el algoritmo
-    final_pop = custom_ea_mu_plus_lambda(
-        pop, toolbox, mu=pop_size, lambda_=pop_size, cxpb=0.7, mutpb=0.3, ngen=ngen
+    toolbox.register(
+        "repair_population",
+        partial(repair_population, masa_name=masa_name, all_ingredients=all_ingredients),
     )
-
-    # Hall of Fame
-    hof = tools.ParetoFront()
-    hof.update(final_pop)
-    best_ind = hof[0]
+    toolbox.register("map", map)
+    return all_ingredients
+
+
+def _finalize_results(masa_name, all_ingredients, final_pop, archive=None):
+    """
+    Extrae la mejor receta y guarda el resumen y el resultado completo (JSON). Los
+    gráficos e informes se generan aparte a partir de ese JSON (scripts/genetic_report.py).
+    """
+    # Archivo de Pareto (el acumulado, si existe, conserva soluciones ya descartadas)
+    if archive is None:
+        archive = update_archive(ParetoArchive(), final_pop)
+    # Mejor receta: menor fitness en orden lexicográfico (densidad, costo, -elasticidad)
+    best_ind = min(archive, key=lambda ind: ind.fitness.values)
     best_recipe = dict(zip(all_ingredients, best_ind))
 
-    # Graficar frentes de Pareto
-    fronts = tools.sortNondominated(final_pop, len(final_pop), first_front_only=False)
-    for i, front in enumerate(fronts):
-        densidades = [ind.fitness.values[0] for ind in front]
-        elasticidades = [-ind.fitness.values[2] for ind in front]  # inverso
-        plt.scatter(densidades, elasticidades, label=f"Frente {i+1}")
-
-    plt.xlabel("Densidad")
-    plt.ylabel("Elasticidad")
-    plt.title(f"Fronteras de Pareto para {masa_name}")
-    plt.legend()
-
-    # Guardar PNG
-    now_str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    png_name = f"pareto_{masa_name}_{now_str}.png"
-    png_path = os.path.join(RESULTS_FOLDER, png_name)
-    plt.savefig(png_path)
-    plt.close()
-    logging.info("Gráfico Pareto guardado en: %s", png_path)
-
-    # Guardar resumen en resultados_main
+    # Guardar resumen y resultado en resultados_main
     text_result = f"--- Resumen de Optimización para {masa_name} ---\n"
     for ing, prop in best_recipe.items():
         text_result += f"{ing}: {prop*100:.1f}%\n"
     _save_file(text_result, RESULTS_FOLDER)
+    save_result(masa_name, all_ingredients, best_recipe, final_pop, archive)
 
     # Sugerencias de sustitución
     for ing in best_recipe:
@@ -418,42 +717,194 @@ def optimize_genetic(masa_name, pop_size=30, ngen=20):
     return best_recipe
 
 
-# ----------------------------------------------------------------------
-# 11. INFORME AMIGABLE
-# ----------------------------------------------------------------------
-def generate_friendly_report(masa_name, best_recipe):
-    """Genera un informe en texto más entendible y lo guarda en 'informes_main'."""
+@contextmanager
+def _evaluation_pool(processes):
+    """Registra temporalmente pool.map en el toolbox si `processes` es mayor que 1."""
+    if not processes or processes <= 1:
+        yield
+        return
+    pool = multiprocessing.Pool(processes)
+    toolbox.register("map", pool.map)
+    toolbox.n_workers = processes
+    try:
+        yield
+    finally:
+        pool.close()
+        pool.join()
+        toolbox.register("map", map)
+        toolbox.n_workers = 1
+
+
+def _evolve(masa_name, pop_size, ngen, checkpoint_path, checkpoint_every, resume_from):
+    """
+    Núcleo de la optimización: produce (estadísticas, población, archivo) por generación,
+    guardando checkpoints periódicos y reanudando desde `resume_from` si se indica.
+    """
+    all_ingredients = configure_toolbox(masa_name)
+    archive = ParetoArchive()
+    start_gen = 0
+    reference = None
+
+    if resume_from is not None:
+        state = load_checkpoint(resume_from)
+        if state["masa_name"] != masa_name or state["ingredients"] != all_ingredients:
+            raise ValueError(
+                f"El checkpoint {resume_from} corresponde a {state['masa_name']}, no a {masa_name}"
+            )
+        pop = _population_from_arrays(state["population"], state["fitness"])
+        update_archive(archive, _population_from_arrays(state["archive"], state["archive_fitness"]))
+        reference = state["reference"]
+        start_gen = state["generation"]
+        random.setstate(state["random_state"])
+        np.random.set_state(state["numpy_random_state"])
+        logging.info("Reanudando %s desde la generación %d (%s)", masa_name, start_gen, resume_from)
+    else:
+        pop = toolbox.population(n=pop_size)
+
+    start_time = time.perf_counter()
+    steps = ea_mu_plus_lambda_steps(
+        pop,
+        toolbox,
+        mu=pop_size,
+        lambda_=pop_size,
+        cxpb=0.7,
+        mutpb=0.3,
+        ngen=ngen,
+        start_gen=start_gen,
+    )
+    for generation, population in steps:
+        if reference is None:
+            reference = hypervolume_reference(population)
+        update_archive(archive, population)
+
+        if (
+            checkpoint_path
+            and generation > start_gen
+            and (generation % checkpoint_every == 0 or generation >= ngen)
+        ):
+            save_checkpoint(
+                checkpoint_path,
+                masa_name,
+                all_ingredients,
+                generation,
+                population,
+                archive,
+                reference,
+            )
+
+        yield generation_stats(generation, archive, reference, start_time), population, archive
+
+
+def iter_optimization(
+    masa_name,
+    pop_size=30,
+    ngen=20,
+    checkpoint_path=None,
+    checkpoint_every=10,
+    resume_from=None,
+    processes=None,
+):
+    """
+    Ejecuta la optimización y produce un diccionario de estadísticas por generación
+    (generation, hypervolume, front_size, best_density, best_cost, best_elasticity, elapsed).
+
+    Con `checkpoint_path` se guarda el estado cada `checkpoint_every` generaciones y al
+    terminar; `resume_from` reanuda una ejecución desde un checkpoint previo.
+    """
+    with _evaluation_pool(processes):
+        for stats, _, _ in _evolve(
+            masa_name, pop_size, ngen, checkpoint_path, checkpoint_every, resume_from
+        ):
+            yield stats
+
+
+def optimize_genetic(
+    masa_name,
+    pop_size=30,
+    ngen=20,
+    processes=None,
+    checkpoint_path=None,
+    checkpoint_every=10,
+    resume_from=None,
+    callback=None,
+):
+    """
+    Optimiza la masa (C12 o G12) y retorna la mejor receta.
+
+    Si `processes` es mayor que 1, la evaluación de fitness se reparte entre un pool de
+    procesos a través de toolbox.map. `callback`, si se indica, recibe las estadísticas de
+    cada generación (ver iter_optimization); los parámetros de checkpoint son los mismos.
+    """
+    final_pop, archive = [], None
+    with _evaluation_pool(processes):
+        for stats, final_pop, archive in _evolve(
+            masa_name, pop_size, ngen, checkpoint_path, checkpoint_every, resume_from
+        ):
+            if callback is not None:
+                callback(stats)
+
     all_ingredients = ["water", BASE_INGREDIENTS[masa_name]] + ADJUSTABLE_INGREDIENTS
-    dens, cost, neg_elas = evaluate_individual(
-        list(best_recipe.values()), masa_name, all_ingredients
+    return _finalize_results(masa_name, all_ingredients, final_pop, archive)
+
+
+def _run_island_epoch(args):
+    """Ejecuta varias generaciones de una isla dentro de un proceso del pool."""
+    masa_name, population, mu, ngen, seed = args
+    random.seed(seed)
+    configure_toolbox(masa_name)
+    return custom_ea_mu_plus_lambda(
+        population, toolbox, mu=mu, lambda_=mu, cxpb=0.7, mutpb=0.3, ngen=ngen
     )
-    elas = -neg_elas
 
-    report = f"\n--- Informe Amigable ({masa_name}) ---\n\n"
-    report += "Receta optimizada:\n"
-    for ing, prop in best_recipe.items():
-        report += f"  - {ing}: {prop*100:.2f}%\n"
-    report += "\nResultados:\n"
-    report += f"  - Densidad: {dens:.2f}\n"
-    report += f"  - Elasticidad: {elas:.2f}\n"
-    report += f"  - Costo: {cost:.2f}\n"
-    report += "--- Fin del Informe ---\n"
 
-    logging.info(report)
-    _save_file(report, REPORTS_FOLDER)  # Guardar en informes_main
-    logging.info(f"Informe amigable guardado en carpeta: {REPORTS_FOLDER}")
+def optimize_genetic_islands(
+    masa_name,
+    n_islands=4,
+    pop_size=30,
+    ngen=20,
+    migration_interval=5,
+    migration_size=2,
+    processes=None,
+):
+    """
+    Optimiza la masa con un modelo de islas y retorna la mejor receta.
+
+    Cada isla evoluciona `pop_size` individuos en su propio proceso; cada
+    `migration_interval` generaciones los mejores individuos del frente de Pareto de cada
+    isla migran a la siguiente (topología en anillo).
+    """
+    all_ingredients = configure_toolbox(masa_name)
+    islands = [toolbox.population(n=pop_size) for _ in range(n_islands)]
+
+    processes = processes or min(n_islands, multiprocessing.cpu_count())
+    with multiprocessing.Pool(processes) as pool:
+        generation = 0
+        while generation < ngen:
+            epoch = min(migration_interval, ngen - generation)
+            tasks = [
+                (masa_name, island, pop_size, epoch, random.randrange(2**32))
+                for island in islands
+            ]
+            islands = pool.map(_run_island_epoch, tasks)
+            generation += epoch
+            logging.info("Islas %s: generación %d/%d", masa_name, generation, ngen)
+
+            if generation < ngen and n_islands > 1:
+                tools.migRing(islands, migration_size, select_nsga2)
+
+    final_pop = [ind for island in islands for ind in island]
+    return _finalize_results(masa_name, all_ingredients, final_pop)
 
 
 # ----------------------------------------------------------------------
-# 12. EJEMPLO DE USO (MAIN)
+# 11. EJEMPLO DE USO (MAIN)
+#     Gráficos e informe amigable: python -m scripts.genetic_report
 # ----------------------------------------------------------------------
 if __name__ == "__main__":
     # Optimizar masa C12
     best_c12 = optimize_genetic("C12", pop_size=30, ngen=20)
     logging.info("Mejor receta C12 -> %s", best_c12)
-    generate_friendly_report("C12", best_c12)
 
     # Optimizar masa G12
     best_g12 = optimize_genetic("G12", pop_size=30, ngen=20)
     logging.info("Mejor receta G12 -> %s", best_g12)
-    generate_friendly_report("G12", best_g12)
@@ -0,0 +1,99 @@
+# flake8: noqa: E402
+"""
+Post-procesado de la optimización genética: gráficos de Pareto e informe amigable.
+
+Trabaja sobre los resultados JSON que guarda scripts/genetic_optimizer.py, de modo que
+el optimizador no necesita importar matplotlib.
+
+Uso:
+    python -m scripts.genetic_report                     # último resultado de C12 y G12
+    python -m scripts.genetic_report resultado_C12_*.json
+"""
+import matplotlib
+
+matplotlib.use("Agg")  # Evita abrir ventanas gráficas
+
+import datetime
+import logging
+import os
+import sys
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from scripts import genetic_optimizer as go
+from src.core.optimization import pareto_fronts
+
+
+# ----------------------------------------------------------------------
+# 1. GRÁFICO DE FRENTES DE PARETO
+# ----------------------------------------------------------------------
+def plot_pareto(result, output_path=None):
+    """Grafica los frentes de Pareto de la población final y retorna la ruta del PNG."""
+    masa_name = result["masa_name"]
+    points = np.asarray(result["fitness"], dtype=float)
+    for i, front in enumerate(pareto_fronts(points)):
+        densidades = points[front, 0]
+        elasticidades = -points[front, 2]  # inverso
+        plt.scatter(densidades, elasticidades, label=f"Frente {i+1}")
+
+    plt.xlabel("Densidad")
+    plt.ylabel("Elasticidad")
+    plt.title(f"Fronteras de Pareto para {masa_name}")
+    plt.legend()
+
+    # Guardar PNG
+    if output_path is None:
+        now_str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = os.path.join(go.RESULTS_FOLDER, f"pareto_{masa_name}_{now_str}.png")
+    plt.savefig(output_path)
+    plt.close()
+    logging.info("Gráfico Pareto guardado en: %s", output_path)
+    return output_path
+
+
+# ----------------------------------------------------------------------
+# 2. INFORME AMIGABLE
+# ----------------------------------------------------------------------
+def generate_friendly_report(masa_name, best_recipe):
+    """Genera un informe en texto más entendible y lo guarda en 'informes_main'."""
+    all_ingredients = ["water", go.BASE_INGREDIENTS[masa_name]] + go.ADJUSTABLE_INGREDIENTS
+    dens, cost, neg_elas = go.evaluate_individual(
+        list(best_recipe.values()), masa_name, all_ingredients
+    )
+    elas = -neg_elas
+
+    report = f"\n--- Informe Amigable ({masa_name}) ---\n\n"
+    report += "Receta optimizada:\n"
+    for ing, prop in best_recipe.items():
+        report += f"  - {ing}: {prop*100:.2f}%\n"
+    report += "\nResultados:\n"
+    report += f"  - Densidad: {dens:.2f}\n"
+    report += f"  - Elasticidad: {elas:.2f}\n"
+    report += f"  - Costo: {cost:.2f}\n"
+    report += "--- Fin del Informe ---\n"
+
+    logging.info(report)
+    go._save_file(report, go.REPORTS_FOLDER)  # Guardar en informes_main
+    logging.info(f"Informe amigable guardado en carpeta: {go.REPORTS_FOLDER}")
+
+
+def render_result(path):
+    """Genera el gráfico de Pareto y el informe amigable de un resultado guardado."""
+    result = go.load_result(path)
+    png_path = plot_pareto(result)
+    generate_friendly_report(result["masa_name"], result["best_recipe"])
+    return png_path
+
+
+# ----------------------------------------------------------------------
+# 3. EJEMPLO DE USO (MAIN)
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [
+        path for path in map(go.latest_result_path, go.BASE_INGREDIENTS) if path is not None
+    ]
+    if not paths:
+        logging.warning("No hay resultados guardados en: %s", go.RESULTS_FOLDER)
+    for path in paths:
+        render_result(path)
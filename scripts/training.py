@@ -1,75 +1,235 @@
+import hashlib
+import json
 import os
+import threading
 
 import numpy as np
-import pandas as pd
-from sklearn.linear_model import LinearRegression
-
-# Cargar datos nutricionales desde el CSV generado
-nutritional_data = {}
-if os.path.exists("data/nutritional_data.csv"):
-    df_nutritional = pd.read_csv("data/nutritional_data.csv")
-    for index, row in df_nutritional.iterrows():
-        nutritional_data[row["ingredient"]] = {
-            "calories": row["calories"] if pd.notna(row["calories"]) else 0,
-            "protein": row["protein"] if pd.notna(row["protein"]) else 0,
-            "carbs": row["carbs"] if pd.notna(row["carbs"]) else 0,
-            "fat": row["fat"] if pd.notna(row["fat"]) else 0,
-        }
-else:
-    print("Error: No se encontró 'nutritional_data.csv'. Usando valores predeterminados.")
-    nutritional_data = {
-        "cauliflower": {"calories": 24.0, "protein": 2.35, "carbs": 4.71, "fat": 0.0},
-        "chickpea_flour": {"calories": 364.0, "protein": 19.0, "carbs": 61.0, "fat": 6.0},
-        "rice_flour": {"calories": 346.0, "protein": 7.69, "carbs": 80.8, "fat": 0.0},
-        "maize_flour": {"calories": 361.0, "protein": 6.9, "carbs": 76.85, "fat": 3.9},
-        "potato_flour": {"calories": 357.0, "protein": 6.9, "carbs": 83.1, "fat": 0.34},
-        "corn_starch": {"calories": 350.0, "protein": 0.0, "carbs": 90.0, "fat": 0.0},
-        "olive_oil": {"calories": 900.0, "protein": 0.0, "carbs": 0.0, "fat": 100.0},
-        "egg_substitute": {"calories": 50.0, "protein": 2.0, "carbs": 5.0, "fat": 0.0},
-        "salt": {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0},
-        "water": {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0},
-        "xanthan_gum": {"calories": 333.0, "protein": 0.0, "carbs": 83.0, "fat": 0.0},
-        "sugar": {"calories": 375.0, "protein": 0.0, "carbs": 100.0, "fat": 0.0},
-    }
 
-# Cargar datos experimentales para elasticidad y densidad
-try:
-    df_exp = pd.read_csv("data/experimental_data.csv")
-except FileNotFoundError:
-    print("Error: No se encontró 'experimental_data.csv'. Creando datos simulados.")
-    df_exp = pd.DataFrame(
-        {
-            "cauliflower_ratio": [1.0, 0.8, 0.6, 0.4, 0.2, 0.0],
-            "chickpea_ratio": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
-            "elasticity": [0.4, 0.5, 0.6, 0.7, 0.8, 0.9],
-            "density": [0.9, 0.85, 0.8, 0.75, 0.7, 0.65],
-        }
-    )
-    df_exp.to_csv("data/experimental_data.csv", index=False)
-
-# Modelos de predicción
-elasticity_models = {}
-density_models = {}
-for ingredient in ["cauliflower", "chickpea_flour"]:
-    if ingredient == "cauliflower":
-        X_elasticity = df_exp[df_exp["chickpea_ratio"] == 0][["cauliflower_ratio"]]
-        y_elasticity = df_exp[df_exp["chickpea_ratio"] == 0]["elasticity"]
-        X_density = df_exp[df_exp["chickpea_ratio"] == 0][["cauliflower_ratio"]]
-        y_density = df_exp[df_exp["chickpea_ratio"] == 0]["density"]
-        feature_name = "cauliflower_ratio"
-    else:
-        X_elasticity = df_exp[df_exp["cauliflower_ratio"] == 0][["chickpea_ratio"]]
-        y_elasticity = df_exp[df_exp["cauliflower_ratio"] == 0]["elasticity"]
-        X_density = df_exp[df_exp["cauliflower_ratio"] == 0][["chickpea_ratio"]]
-        y_density = df_exp[df_exp["cauliflower_ratio"] == 0]["density"]
-        feature_name = "chickpea_ratio"
-    if len(X_elasticity) > 0 and len(X_density) > 0:
-        model_elasticity = LinearRegression()
-        model_density = LinearRegression()
-        model_elasticity.fit(X_elasticity, y_elasticity)
-        model_density.fit(X_density, y_density)
-        elasticity_models[ingredient] = (model_elasticity, feature_name)
-        density_models[ingredient] = (model_density, feature_name)
+DATA_DIR = "data"
+NUTRITIONAL_CSV = os.path.join(DATA_DIR, "nutritional_data.csv")
+EXPERIMENTAL_CSV = os.path.join(DATA_DIR, "experimental_data.csv")
+MODEL_CACHE_PATH = os.path.join(DATA_DIR, "formulation_models.json")
+MODEL_CACHE_VERSION = 1
+
+# Valores predeterminados si no existe 'nutritional_data.csv'
+DEFAULT_NUTRITIONAL_DATA = {
+    "cauliflower": {"calories": 24.0, "protein": 2.35, "carbs": 4.71, "fat": 0.0},
+    "chickpea_flour": {"calories": 364.0, "protein": 19.0, "carbs": 61.0, "fat": 6.0},
+    "rice_flour": {"calories": 346.0, "protein": 7.69, "carbs": 80.8, "fat": 0.0},
+    "maize_flour": {"calories": 361.0, "protein": 6.9, "carbs": 76.85, "fat": 3.9},
+    "potato_flour": {"calories": 357.0, "protein": 6.9, "carbs": 83.1, "fat": 0.34},
+    "corn_starch": {"calories": 350.0, "protein": 0.0, "carbs": 90.0, "fat": 0.0},
+    "olive_oil": {"calories": 900.0, "protein": 0.0, "carbs": 0.0, "fat": 100.0},
+    "egg_substitute": {"calories": 50.0, "protein": 2.0, "carbs": 5.0, "fat": 0.0},
+    "salt": {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0},
+    "water": {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0},
+    "xanthan_gum": {"calories": 333.0, "protein": 0.0, "carbs": 83.0, "fat": 0.0},
+    "sugar": {"calories": 375.0, "protein": 0.0, "carbs": 100.0, "fat": 0.0},
+}
+
+# Datos simulados si no existe 'experimental_data.csv'
+SIMULATED_EXPERIMENTAL_DATA = {
+    "cauliflower_ratio": [1.0, 0.8, 0.6, 0.4, 0.2, 0.0],
+    "chickpea_ratio": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
+    "elasticity": [0.4, 0.5, 0.6, 0.7, 0.8, 0.9],
+    "density": [0.9, 0.85, 0.8, 0.75, 0.7, 0.65],
+}
+
+# Ingrediente principal -> (columna de su proporción, columna que debe ser 0 al ajustar)
+MODEL_FEATURES = {
+    "cauliflower": ("cauliflower_ratio", "chickpea_ratio"),
+    "chickpea_flour": ("chickpea_ratio", "cauliflower_ratio"),
+}
+
+
+class LinearModel:
+    """Modelo lineal de una variable ya ajustado; predice solo con numpy."""
+
+    def __init__(self, coef, intercept, feature_name):
+        self.coef = float(coef)
+        self.intercept = float(intercept)
+        self.feature_name = feature_name
+
+    def predict(self, values):
+        return self.coef * np.asarray(values, dtype=float) + self.intercept
+
+    def to_dict(self):
+        return {"coef": self.coef, "intercept": self.intercept, "feature": self.feature_name}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["coef"], data["intercept"], data["feature"])
+
+
+def _file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class FormulationModelRegistry:
+    """
+    Datos nutricionales y modelos de elasticidad/densidad, cargados bajo demanda.
+
+    Nada se lee ni se ajusta al importar el módulo: los datos se cargan en el primer
+    acceso y los coeficientes ajustados se guardan en `cache_path` junto con el hash
+    SHA-256 del CSV experimental, de modo que los siguientes arranques los recuperan sin
+    leer el CSV con pandas ni importar scikit-learn.
+    """
+
+    def __init__(
+        self,
+        nutritional_csv=NUTRITIONAL_CSV,
+        experimental_csv=EXPERIMENTAL_CSV,
+        cache_path=MODEL_CACHE_PATH,
+    ):
+        self.nutritional_csv = nutritional_csv
+        self.experimental_csv = experimental_csv
+        self.cache_path = cache_path
+        self._nutritional_data = None
+        self._experimental_data = None
+        self._elasticity_models = None
+        self._density_models = None
+        self._lock = threading.RLock()
+
+    @property
+    def nutritional_data(self):
+        if self._nutritional_data is None:
+            with self._lock:
+                if self._nutritional_data is None:
+                    self._nutritional_data = self._load_nutritional_data()
+        return self._nutritional_data
+
+    @property
+    def experimental_data(self):
+        if self._experimental_data is None:
+            with self._lock:
+                if self._experimental_data is None:
+                    self._experimental_data = self.load_experimental_data()
+        return self._experimental_data
+
+    @property
+    def elasticity_models(self):
+        self._ensure_models()
+        return self._elasticity_models
+
+    @property
+    def density_models(self):
+        self._ensure_models()
+        return self._density_models
+
+    def load_experimental_data(self):
+        """DataFrame experimental; si no existe el CSV se crea con datos simulados."""
+        import pandas as pd
+
+        try:
+            return pd.read_csv(self.experimental_csv)
+        except FileNotFoundError:
+            print("Error: No se encontró 'experimental_data.csv'. Creando datos simulados.")
+            df_exp = pd.DataFrame(SIMULATED_EXPERIMENTAL_DATA)
+            df_exp.to_csv(self.experimental_csv, index=False)
+            return df_exp
+
+    def _load_nutritional_data(self):
+        """Carga los datos nutricionales desde el CSV generado."""
+        if not os.path.exists(self.nutritional_csv):
+            print("Error: No se encontró 'nutritional_data.csv'. Usando valores predeterminados.")
+            return {ing: values.copy() for ing, values in DEFAULT_NUTRITIONAL_DATA.items()}
+
+        import pandas as pd
+
+        nutritional_data = {}
+        df_nutritional = pd.read_csv(self.nutritional_csv)
+        for index, row in df_nutritional.iterrows():
+            nutritional_data[row["ingredient"]] = {
+                "calories": row["calories"] if pd.notna(row["calories"]) else 0,
+                "protein": row["protein"] if pd.notna(row["protein"]) else 0,
+                "carbs": row["carbs"] if pd.notna(row["carbs"]) else 0,
+                "fat": row["fat"] if pd.notna(row["fat"]) else 0,
+            }
+        return nutritional_data
+
+    def _ensure_models(self):
+        if self._elasticity_models is not None:
+            return
+        with self._lock:
+            if self._elasticity_models is not None:
+                return
+            if not os.path.exists(self.experimental_csv):
+                self.experimental_data  # crea el CSV con datos simulados
+            data_hash = _file_sha256(self.experimental_csv)
+
+            cached = self._read_cache(data_hash)
+            if cached is None:
+                cached = self._fit_models(self.experimental_data)
+                self._write_cache(data_hash, cached)
+
+            self._density_models = {
+                ing: LinearModel.from_dict(models["density"]) for ing, models in cached.items()
+            }
+            self._elasticity_models = {
+                ing: LinearModel.from_dict(models["elasticity"]) for ing, models in cached.items()
+            }
+
+    @staticmethod
+    def _fit_models(df_exp):
+        """Ajusta los modelos lineales de elasticidad y densidad por ingrediente principal."""
+        from sklearn.linear_model import LinearRegression
+
+        fitted = {}
+        for ingredient, (feature_name, other_feature) in MODEL_FEATURES.items():
+            subset = df_exp[df_exp[other_feature] == 0]
+            if len(subset) == 0:
+                continue
+            models = {}
+            for target in ("elasticity", "density"):
+                model = LinearRegression()
+                model.fit(subset[[feature_name]], subset[target])
+                models[target] = LinearModel(
+                    model.coef_[0], model.intercept_, feature_name
+                ).to_dict()
+            fitted[ingredient] = models
+        return fitted
+
+    def _read_cache(self, data_hash):
+        """Coeficientes guardados si corresponden al CSV actual, o None."""
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cache.get("version") != MODEL_CACHE_VERSION or cache.get("data_sha256") != data_hash:
+            return None
+        return cache["models"]
+
+    def _write_cache(self, data_hash, models):
+        cache = {"version": MODEL_CACHE_VERSION, "data_sha256": data_hash, "models": models}
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Aviso: no se pudo guardar la caché de modelos en {self.cache_path}: {e}")
+
+
+_registry = None
+
+
+def get_registry():
+    """Registro de modelos compartido por el módulo (se crea en el primer uso)."""
+    global _registry
+    if _registry is None:
+        _registry = FormulationModelRegistry()
+    return _registry
+
+
+def __getattr__(name):
+    # Compatibilidad con los antiguos globales del módulo, ahora cargados bajo demanda
+    if name in ("nutritional_data", "elasticity_models", "density_models"):
+        return getattr(get_registry(), name)
+    if name == "df_exp":
+        return get_registry().experimental_data
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Clase base para formulaciones
@@ -89,31 +249,56 @@ class Masa:
 
     def predict_properties(self):
         """Predice elasticidad, densidad, calorías y proteínas basándose en la formulación."""
-        elasticity = 0.5  # Valor por defecto
-        density = 0.8  # Valor por defecto
-        if self.main_ingredient in elasticity_models:
-            model_elasticity, feature_name = elasticity_models[self.main_ingredient]
-            model_density, _ = density_models[self.main_ingredient]
-            main_ratio = self.formulation.get(self.main_ingredient, 0)
-            input_data = pd.DataFrame([[main_ratio]], columns=[feature_name])
-            elasticity = model_elasticity.predict(input_data)[0]
-            density = model_density.predict(input_data)[0]
-
-        calories = sum(
-            ratio * nutritional_data.get(ing, {"calories": 0})["calories"]
-            for ing, ratio in self.formulation.items()
-        )
-        protein = sum(
-            ratio * nutritional_data.get(ing, {"protein": 0})["protein"]
-            for ing, ratio in self.formulation.items()
+        names = list(self.formulation)
+        batch = predict_properties_batch(
+            self.main_ingredient, names, np.array([[self.formulation[ing] for ing in names]])
         )
+        return {key: values[0] for key, values in batch.items()}
+
+
+def predict_properties_batch(main_ingredient, ingredient_names, proportions):
+    """
+    Predice las propiedades de muchas formulaciones a la vez.
+
+    `proportions` es una matriz (n_formulaciones, n_ingredientes) con columnas en el orden
+    de `ingredient_names`. Elasticidad y densidad se predicen con una sola llamada a
+    `predict` por modelo (ver FormulationModelRegistry); calorías y proteínas son un
+    producto matricial.
+    """
+    proportions = np.atleast_2d(np.asarray(proportions, dtype=float))
+    n_rows = len(proportions)
+    registry = get_registry()
+    elasticity_models = registry.elasticity_models
+    nutritional_data = registry.nutritional_data
 
-        return {
-            "elasticity": elasticity,
-            "density": density,
-            "calories": calories,
-            "protein": protein,
-        }
+    elasticity = np.full(n_rows, 0.5)  # Valor por defecto
+    density = np.full(n_rows, 0.8)  # Valor por defecto
+    if main_ingredient in elasticity_models:
+        if main_ingredient in ingredient_names:
+            main_ratio = proportions[:, list(ingredient_names).index(main_ingredient)]
+        else:
+            main_ratio = np.zeros(n_rows)
+        elasticity = elasticity_models[main_ingredient].predict(main_ratio)
+        density = registry.density_models[main_ingredient].predict(main_ratio)
+
+    nutrients = np.array(
+        [
+            [
+                nutritional_data.get(ing, {"calories": 0})["calories"],
+                nutritional_data.get(ing, {"protein": 0})["protein"],
+            ]
+            for ing in ingredient_names
+        ],
+        dtype=float,
+    ).reshape(-1, 2)
+    calories, protein = (proportions @ nutrients).T
+
+    return {
+        "elasticity": elasticity,
+        "density": density,
+        "calories": calories,
+        "protein": protein,
+    }
 
 
 # Formulaciones iniciales basadas en Greensy
@@ -150,50 +335,122 @@ formulations = {
 
 
 # Función de optimización
-def optimize_recipe(masa_name, target="min_density", min_elasticity=0.5, max_calories=300):
-    """Optimiza una masa ajustando ingredientes secundarios."""
-    masa = formulations[masa_name]
-    best_result = None
-    best_score = float("inf") if target == "min_density" else -float("inf")
+# Rejilla histórica para el único ingrediente ajustable por defecto
+DEFAULT_RATIOS = np.arange(0.1, 0.4, 0.05)
+# Valores por ingrediente en la búsqueda multidimensional (fracción del valor base)
+DEFAULT_RELATIVE_GRID = np.linspace(0.5, 1.5, 5)
+# Máximo de candidatos; si la rejilla completa es mayor se muestrea al azar dentro de ella
+MAX_CANDIDATES = 100_000
 
-    adjustable = "rice_flour" if masa_name == "C12" else "potato_flour"
-    main_ing = masa.main_ingredient
 
-    for ratio in np.arange(0.1, 0.4, 0.05):
-        new_form = masa.formulation.copy()
-        delta = new_form[adjustable] - ratio
-        new_form[adjustable] = ratio
-        new_form["water"] += delta  # Ajustamos agua para mantener la suma en 1.0
+def generate_candidates(masa, adjustable, grid=None, max_candidates=MAX_CANDIDATES, seed=0):
+    """
+    Genera formulaciones candidatas variando los ingredientes `adjustable` y ajustando el
+    agua para mantener la suma en 1.0.
+
+    `grid` es un diccionario {ingrediente: valores}; por defecto se usan DEFAULT_RATIOS si
+    hay un único ingrediente y DEFAULT_RELATIVE_GRID * valor base si hay varios. Si el
+    producto cartesiano supera `max_candidates`, se muestrea uniformemente en la caja que
+    definen las rejillas. Retorna (nombres de ingredientes, matriz de candidatos).
+    """
+    names = list(masa.formulation)
+    if "water" not in names:
+        names.append("water")
+    base = np.array([masa.formulation.get(ing, 0.0) for ing in names])
+    columns = [names.index(ing) for ing in adjustable]
+    grid = grid or {}
+    values = []
+    for ing in adjustable:
+        if ing in grid:
+            values.append(np.asarray(grid[ing], dtype=float))
+        elif len(adjustable) == 1:
+            values.append(DEFAULT_RATIOS)
+        else:
+            values.append(DEFAULT_RELATIVE_GRID * masa.formulation.get(ing, 0.0))
+
+    n_grid = int(np.prod([len(v) for v in values]))
+    if n_grid <= max_candidates:
+        settings = np.stack(np.meshgrid(*values, indexing="ij"), axis=-1).reshape(-1, len(values))
+    else:
+        rng = np.random.default_rng(seed)
+        low = np.array([v.min() for v in values])
+        high = np.array([v.max() for v in values])
+        settings = rng.uniform(low, high, size=(max_candidates, len(values)))
+
+    candidates = np.repeat(base[None, :], len(settings), axis=0)
+    candidates[:, columns] = settings
+    # El agua absorbe la diferencia para mantener la suma en 1.0
+    water = names.index("water")
+    candidates[:, water] += (base[columns] - settings).sum(axis=1)
+    return names, candidates
 
-        temp_masa = Masa(masa_name, main_ing, new_form)
-        result = temp_masa.predict_properties()
 
-        if result["elasticity"] >= min_elasticity and result["calories"] <= max_calories:
-            score = result["density"] if target == "min_density" else -result["calories"]
-            if (target == "min_density" and score < best_score) or (
-                target == "min_calories" and score > best_score
-            ):
-                best_score = score
-                best_result = result
-                best_result["formulation"] = new_form
+def optimize_recipe(
+    masa_name,
+    target="min_density",
+    min_elasticity=0.5,
+    max_calories=300,
+    adjustable=None,
+    grid=None,
+    max_candidates=MAX_CANDIDATES,
+):
+    """
+    Optimiza una masa ajustando ingredientes secundarios.
+
+    Todos los candidatos se evalúan en lote con predict_properties_batch (los mismos
+    modelos que usa `Masa.predict_properties`) y se elige el mejor factible. Por defecto
+    se ajusta un único ingrediente (rice_flour en C12, potato_flour en G12); con
+    `adjustable` se busca en varias dimensiones a la vez.
+    """
+    masa = formulations[masa_name]
+    if adjustable is None:
+        adjustable = ["rice_flour" if masa_name == "C12" else "potato_flour"]
+    main_ing = masa.main_ingredient
+
+    names, candidates = generate_candidates(masa, adjustable, grid, max_candidates)
+    predicted = predict_properties_batch(main_ing, names, candidates)
 
+    # Solo candidatos factibles y con agua >= 0
+    feasible = (
+        (predicted["elasticity"] >= min_elasticity)
+        & (predicted["calories"] <= max_calories)
+        & (candidates[:, names.index("water")] >= 0)
+    )
+    scores = predicted["density"] if target == "min_density" else predicted["calories"]
+    indices = np.flatnonzero(feasible)
+    if indices.size == 0:
+        return None
+    # np.argmin devuelve el primero: ante empates gana el primer candidato de la rejilla
+    best = indices[np.argmin(scores[indices])]
+
+    best_result = {key: values[best] for key, values in predicted.items()}
+    best_result["formulation"] = dict(zip(names, candidates[best].tolist()))
     return best_result
 
 
 # Pruebas
-for masa_name in ["C12", "G12"]:
-    masa = formulations[masa_name]
-    print(f"\nPropiedades base para {masa_name}:")
-    base_result = masa.predict_properties()
-    for key, value in base_result.items():
-        print(f"{key.capitalize()}: {value:.2f}")
-
-    print("Mejor receta optimizada (mínima densidad):")
-    optimal = optimize_recipe(masa_name, target="min_density")
-    if optimal:
-        for key, value in optimal.items():
-            if key != "formulation":
-                print(f"{key.capitalize()}: {value:.2f}")
-        print("Formulación optimizada:", {k: f"{v:.3f}" for k, v in optimal["formulation"].items()})
-    else:
-        print("No se encontró solución.")
+def run_examples():
+    """Imprime las propiedades base y la receta optimizada de cada masa."""
+    for masa_name in ["C12", "G12"]:
+        masa = formulations[masa_name]
+        print(f"\nPropiedades base para {masa_name}:")
+        base_result = masa.predict_properties()
+        for key, value in base_result.items():
+            print(f"{key.capitalize()}: {value:.2f}")
+
+        print("Mejor receta optimizada (mínima densidad):")
+        optimal = optimize_recipe(masa_name, target="min_density")
+        if optimal:
+            for key, value in optimal.items():
+                if key != "formulation":
+                    print(f"{key.capitalize()}: {value:.2f}")
+            print(
+                "Formulación optimizada:",
+                {k: f"{v:.3f}" for k, v in optimal["formulation"].items()},
+            )
+        else:
+            print("No se encontró solución.")
+
+
+if __name__ == "__main__":
+    run_examples()
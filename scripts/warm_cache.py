@@ -0,0 +1,99 @@
+"""
+Precarga la caché de USDA y el índice de similitud con el catálogo de ingredientes.
+
+Escribe los registros compactos en Redis y guarda el índice de similitud en un .npz;
+solo estos dos son compartidos con los workers (la memoria del proceso de precarga se
+pierde al terminar).
+
+Uso:
+    python -m scripts.warm_cache
+    python -m scripts.warm_cache --state data/processed/warmup_state.json \\
+        --index data/processed/similarity_index.npz --no-database
+
+El catálogo combina INGREDIENTS de scripts/build_database.py, la tabla `ingredients` y
+src/core/data/ingredients.json. Si se interrumpe, al relanzarla con el mismo --state
+solo se procesan los ingredientes pendientes; una ejecución completa borra el estado.
+"""
+import argparse
+import json
+import logging
+import os
+
+from src.core.cache.tiered_cache import TieredCache
+from src.core.config import get_settings
+from src.core.services.catalog_warmup import CatalogWarmup, load_catalog
+from src.core.services.similarity_index import NutrientSimilarityIndex
+from src.core.services.usda_service import USDAService
+
+DEFAULT_STATE = os.path.join("data", "processed", "warmup_state.json")
+DEFAULT_INDEX = os.path.join("data", "processed", "similarity_index.npz")
+
+
+def open_session():
+    """Sesión de base de datos, o None si no está disponible."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    try:
+        engine = create_engine(str(get_settings().DATABASE_URL))
+        session = sessionmaker(bind=engine)()
+        session.connection()
+        return session
+    except Exception as e:
+        logging.warning(f"Sin base de datos, se omite la tabla de ingredientes: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--state", default=DEFAULT_STATE, help="Archivo de progreso")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="Índice de similitud (.npz)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Peticiones en paralelo")
+    parser.add_argument("--batch-size", type=int, default=100, help="Ingredientes por bloque")
+    parser.add_argument("--no-database", action="store_true", help="Omitir la tabla")
+    parser.add_argument("--restart", action="store_true", help="Ignorar el progreso guardado")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    cache = TieredCache.with_redis()
+    if settings.FDC_MIRROR_PATH:
+        service = USDAService.from_mirror(settings.FDC_MIRROR_PATH, cache=cache)
+    else:
+        service = USDAService(api_key=settings.USDA_API_KEY, cache=cache)
+
+    if args.restart and os.path.exists(args.state):
+        os.remove(args.state)
+    # El índice se guarda tras cada bloque junto con el progreso, así que al reanudar
+    # contiene ya los ingredientes procesados
+    if os.path.exists(args.index) and not args.restart:
+        index = NutrientSimilarityIndex.load(args.index)
+    else:
+        index = NutrientSimilarityIndex()
+
+    session = None if args.no_database else open_session()
+    try:
+        catalog = load_catalog(session=session)
+    finally:
+        if session is not None:
+            session.close()
+
+    os.makedirs(os.path.dirname(args.state) or ".", exist_ok=True)
+    os.makedirs(os.path.dirname(args.index) or ".", exist_ok=True)
+    warmup = CatalogWarmup(
+        service,
+        similarity_index=index,
+        state_path=args.state,
+        index_path=args.index,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+    )
+    report = warmup.run(catalog)
+
+    logging.info(
+        f"Precarga completada: {report['loaded']} cargados, {report['resumed']} reanudados, "
+        f"cobertura {report['coverage']:.0%}, {report['throughput']:.1f} alimentos/s"
+    )
+    logging.info(f"Estadísticas de caché: {json.dumps(cache.stats())}")
+    if report["missing"]:
+        logging.warning(f"Sin datos de USDA: {', '.join(report['missing'])}")
@@ -2,8 +2,14 @@
 Módulo core de PizzaAI
 """
 
-from .config import get_settings
+__all__ = ["settings"]
 
-settings = get_settings()
 
-__all__ = ["settings"]
+def __getattr__(name):
+    # Carga diferida: importar subpaquetes (p. ej. src.core.optimization) no requiere
+    # la configuración del entorno
+    if name == "settings":
+        from .config import get_settings
+
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
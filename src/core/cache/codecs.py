@@ -0,0 +1,131 @@
+import json
+import logging
+import struct
+import zlib
+from typing import Any, Optional, Union
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depende del entorno
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - depende del entorno
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+# Cabecera de los valores en caché: versión del formato, codec y compresión (un byte
+# cada uno). Un JSON en texto nunca empieza por el byte 0x01, así que los valores
+# escritos antes de existir la cabecera se siguen leyendo como JSON.
+FORMAT_VERSION = 1
+HEADER = struct.Struct("BBB")
+
+JSON_CODEC = 0
+MSGPACK_CODEC = 1
+
+NO_COMPRESSION = 0
+ZLIB_COMPRESSION = 1
+LZ4_COMPRESSION = 2
+
+CODEC_IDS = {"json": JSON_CODEC, "msgpack": MSGPACK_CODEC}
+COMPRESSION_IDS = {"none": NO_COMPRESSION, "zlib": ZLIB_COMPRESSION, "lz4": LZ4_COMPRESSION}
+
+
+def _encode(codec: int, value: Any) -> bytes:
+    if codec == MSGPACK_CODEC:
+        return msgpack.packb(value, use_bin_type=True)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _decode(codec: int, payload: bytes) -> Any:
+    if codec == MSGPACK_CODEC:
+        if msgpack is None:
+            raise ValueError("Valor codificado con msgpack, pero msgpack no está instalado")
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    if codec == JSON_CODEC:
+        return json.loads(payload)
+    raise ValueError(f"Codec desconocido: {codec}")
+
+
+def _compress(compression: int, payload: bytes, level: int) -> bytes:
+    if compression == LZ4_COMPRESSION:
+        return lz4_frame.compress(payload)
+    return zlib.compress(payload, level)
+
+
+def _decompress(compression: int, payload: bytes) -> bytes:
+    if compression == NO_COMPRESSION:
+        return payload
+    if compression == ZLIB_COMPRESSION:
+        return zlib.decompress(payload)
+    if compression == LZ4_COMPRESSION:
+        if lz4_frame is None:
+            raise ValueError("Valor comprimido con lz4, pero lz4 no está instalado")
+        return lz4_frame.decompress(payload)
+    raise ValueError(f"Compresión desconocida: {compression}")
+
+
+class Serializer:
+    """
+    Serialización binaria de los valores de caché.
+
+    Codifica con msgpack (o JSON compacto si msgpack no está disponible), comprime con
+    zlib o lz4 los valores que superan `threshold` bytes y antepone una cabecera con la
+    versión del formato, el codec y la compresión usados. La lectura se guía por la
+    cabecera, de modo que cambiar de codec no invalida lo ya almacenado.
+    """
+
+    def __init__(
+        self,
+        codec: str = "msgpack",
+        compression: str = "zlib",
+        threshold: int = 1024,
+        level: int = 6,
+    ):
+        if codec not in CODEC_IDS:
+            raise ValueError(f"Codec no soportado: {codec}")
+        if compression not in COMPRESSION_IDS:
+            raise ValueError(f"Compresión no soportada: {compression}")
+        if codec == "msgpack" and msgpack is None:
+            logger.warning("msgpack no está instalado; los valores de caché se codifican en JSON")
+            codec = "json"
+        if compression == "lz4" and lz4_frame is None:
+            logger.warning("lz4 no está instalado; los valores de caché se comprimen con zlib")
+            compression = "zlib"
+        self.codec = CODEC_IDS[codec]
+        self.compression = COMPRESSION_IDS[compression]
+        self.threshold = threshold
+        self.level = level
+
+    def dumps(self, value: Any) -> bytes:
+        """Serializa un valor con cabecera, comprimiéndolo si supera el umbral."""
+        payload = _encode(self.codec, value)
+        compression = NO_COMPRESSION
+        if self.compression != NO_COMPRESSION and len(payload) > self.threshold:
+            compressed = _compress(self.compression, payload, self.level)
+            if len(compressed) < len(payload):
+                payload, compression = compressed, self.compression
+        return HEADER.pack(FORMAT_VERSION, self.codec, compression) + payload
+
+    def loads(self, data: Union[bytes, str, None]) -> Optional[Any]:
+        """Deserializa un valor; acepta también JSON sin cabecera (formato anterior)."""
+        if not data:
+            return None
+        if isinstance(data, str):
+            return json.loads(data)
+        if data[0] != FORMAT_VERSION:
+            return json.loads(data)
+        if len(data) < HEADER.size:
+            raise ValueError("Valor de caché truncado")
+        _, codec, compression = HEADER.unpack_from(data)
+        return _decode(codec, _decompress(compression, data[HEADER.size :]))
+
+    @classmethod
+    def from_settings(cls, settings) -> "Serializer":
+        return cls(
+            codec=getattr(settings, "REDIS_CACHE_CODEC", "msgpack"),
+            compression=getattr(settings, "REDIS_CACHE_COMPRESSION", "zlib"),
+            threshold=getattr(settings, "REDIS_CACHE_COMPRESSION_THRESHOLD", 1024),
+        )
@@ -0,0 +1,31 @@
+"""
+Esquema de claves y tiempos de expiración compartidos por todas las cachés de USDA
+(cliente síncrono, asíncrono, servicio y cachés por niveles).
+"""
+
+# Expiración en segundos
+SEARCH_TTL = 3600  # búsquedas: 1 hora
+FOOD_TTL = 86400  # detalles de alimentos: 24 horas
+NEGATIVE_TTL = 300  # resultados vacíos: 5 minutos
+STALE_TTL = 3600  # margen para servir un valor caducado mientras se refresca
+LEASE_TTL = 30  # duración máxima de un lease de recálculo
+
+
+def search_key(query: str, page_size: int) -> str:
+    """Clave de una búsqueda de alimentos."""
+    return f"search:{query}:{page_size}"
+
+
+def food_key(fdc_id) -> str:
+    """Clave de los detalles de un alimento."""
+    return f"food:{fdc_id}"
+
+
+def raw_food_key(fdc_id) -> str:
+    """Clave del documento FDC completo (nivel frío) de un alimento."""
+    return f"food:raw:{fdc_id}"
+
+
+def lock_key(key: str) -> str:
+    """Clave del lease que protege el recálculo de `key`."""
+    return f"lock:{key}"
@@ -0,0 +1,239 @@
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from src.core.cache.keys import LEASE_TTL, lock_key
+
+logger = logging.getLogger(__name__)
+
+# Marca de las entradas con metadatos de expiración escritas por CacheLoader
+ENTRY_MARKER = "__cache_entry__"
+
+Ttl = Union[float, Callable[[Any], float]]
+
+
+def wrap(value: Any, ttl: float, delta: float = 0.0) -> Dict:
+    """Entrada de caché con el valor, su caducidad lógica y el coste de recalcularlo."""
+    return {ENTRY_MARKER: 1, "value": value, "expires_at": time.time() + ttl, "delta": delta}
+
+
+def unwrap(entry: Any) -> Tuple[Any, Optional[float], float]:
+    """(valor, caducidad lógica, coste); los valores sin metadatos no caducan."""
+    if isinstance(entry, dict) and ENTRY_MARKER in entry:
+        return entry["value"], entry["expires_at"], entry["delta"]
+    return entry, None, 0.0
+
+
+class CacheLoader:
+    """
+    Lectura a través de caché con protección frente a estampidas.
+
+    - Single-flight: dentro del proceso, las peticiones concurrentes de una misma clave
+      ausente esperan a un único cálculo; entre procesos se coordina con un lease
+      (`SET NX` en Redis) cuando la caché expone `acquire_lock`/`release_lock`.
+    - Refresco anticipado probabilístico (XFetch): cerca de la caducidad, cada lectura
+      decide con probabilidad creciente, y proporcional al coste del cálculo, refrescar
+      la entrada en segundo plano antes de que expire.
+    - Stale-while-revalidate: la entrada se conserva `stale_ttl` segundos más allá de su
+      caducidad lógica; en ese intervalo se sirve el valor antiguo mientras una única
+      tarea en segundo plano lo recalcula.
+    """
+
+    def __init__(
+        self,
+        cache,
+        stale_ttl: float = 0,
+        beta: float = 1.0,
+        lease_ttl: int = LEASE_TTL,
+        lease_wait: float = 5.0,
+        poll_interval: float = 0.05,
+        max_workers: int = 4,
+    ):
+        self.cache = cache
+        self.stale_ttl = stale_ttl
+        self.beta = beta
+        self.lease_ttl = lease_ttl
+        self.lease_wait = lease_wait
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def close(self, wait: bool = True) -> None:
+        """Detiene el pool de refresco (esperando a los refrescos en curso)."""
+        self._executor.shutdown(wait=wait)
+
+    def _ttl(self, ttl: Ttl, value: Any) -> float:
+        return ttl(value) if callable(ttl) else ttl
+
+    def _write(self, key: str, value: Any, ttl: float, delta: float = 0.0) -> bool:
+        # La entrada sobrevive a su caducidad lógica durante la ventana de servir obsoleto
+        expire = ttl + min(self.stale_ttl, ttl)
+        return self.cache.set(key, wrap(value, ttl, delta), expire=int(math.ceil(expire)))
+
+    def _should_refresh_early(self, expires_at: float, delta: float) -> bool:
+        # XFetch: now - delta * beta * ln(rand) >= expires_at
+        if delta <= 0 or self.beta <= 0:
+            return False
+        return time.time() - delta * self.beta * math.log(1.0 - random.random()) >= expires_at
+
+    def get(self, key: str) -> Optional[Any]:
+        """Valor en caché (aunque esté obsoleto) sin recalcular."""
+        return unwrap(self.cache.get(key))[0]
+
+    def get_many(
+        self,
+        keys: List[str],
+        allow_stale: bool = False,
+        valid: Optional[Callable[[Any], bool]] = None,
+    ) -> List[Optional[Any]]:
+        """
+        Valores en caché con una sola lectura; None para ausentes, obsoletos y los que no
+        pasan `valid`.
+        """
+        now = time.time()
+        values = []
+        for entry in self.cache.get_many(keys):
+            value, expires_at, _ = unwrap(entry)
+            if value is not None and expires_at is not None and expires_at <= now:
+                value = value if allow_stale else None
+            if value is not None and valid is not None and not valid(value):
+                value = None
+            values.append(value)
+        return values
+
+    def set(self, key: str, value: Any, ttl: Ttl) -> bool:
+        return self._write(key, value, self._ttl(ttl, value))
+
+    def set_many(self, mapping: Dict[str, Any], ttl: float) -> bool:
+        """Almacena varios valores con el mismo TTL en una sola operación."""
+        if not mapping:
+            return True
+        expire = int(math.ceil(ttl + min(self.stale_ttl, ttl)))
+        entries = {key: wrap(value, ttl) for key, value in mapping.items()}
+        return self.cache.set_many(entries, expire=expire)
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Ttl,
+        valid: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Devuelve el valor en caché o lo calcula con `compute` y lo almacena.
+
+        `ttl` puede ser una función del valor calculado, p. ej. para expirar antes los
+        resultados vacíos. Los valores en caché que no pasan `valid` (p. ej. de un formato
+        anterior) se tratan como ausentes.
+        """
+        value, expires_at, delta = unwrap(self.cache.get(key))
+        if value is not None and valid is not None and not valid(value):
+            value = None
+        if value is not None:
+            if expires_at is None:
+                return value
+            now = time.time()
+            if now >= expires_at:
+                if self.stale_ttl > 0:
+                    self._refresh_in_background(key, compute, ttl, value)
+                    return value
+            else:
+                if self._should_refresh_early(expires_at, delta):
+                    self._refresh_in_background(key, compute, ttl, value)
+                return value
+        return self._load(key, compute, ttl)
+
+    def _load(self, key: str, compute: Callable[[], Any], ttl: Ttl) -> Any:
+        """Cálculo single-flight: un solo hilo calcula, el resto espera su resultado."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            value = self._compute_with_lease(key, compute, ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _acquire_lease(self, key: str) -> Optional[str]:
+        """Token del lease, "" si la caché no admite leases, None si otro lo tiene."""
+        if not hasattr(self.cache, "acquire_lock"):
+            return ""
+        token = uuid.uuid4().hex
+        return token if self.cache.acquire_lock(lock_key(key), token, self.lease_ttl) else None
+
+    def _release_lease(self, key: str, token: str) -> None:
+        if token:
+            self.cache.release_lock(lock_key(key), token)
+
+    def _wait_for(self, key: str) -> Optional[Any]:
+        """Espera a que otro proceso con el lease publique el valor."""
+        deadline = time.monotonic() + self.lease_wait
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            value, expires_at, _ = unwrap(self.cache.get(key))
+            if value is not None and (expires_at is None or expires_at > time.time()):
+                return value
+        return None
+
+    def _compute_with_lease(self, key: str, compute: Callable[[], Any], ttl: Ttl) -> Any:
+        token = self._acquire_lease(key)
+        if token is None:
+            value = self._wait_for(key)
+            if value is not None:
+                return value
+            logger.warning(f"Lease de {key} sin resultado tras {self.lease_wait}s; se calcula")
+        try:
+            start = time.time()
+            value = compute()
+            self._write(key, value, self._ttl(ttl, value), time.time() - start)
+            return value
+        finally:
+            self._release_lease(key, token)
+
+    def _refresh_in_background(
+        self, key: str, compute: Callable[[], Any], ttl: Ttl, current: Any
+    ) -> None:
+        with self._lock:
+            if key in self._refreshing or key in self._in_flight:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, compute, ttl, current)
+
+    def _refresh(self, key: str, compute: Callable[[], Any], ttl: Ttl, current: Any) -> None:
+        try:
+            token = self._acquire_lease(key)
+            if token is None:
+                return  # otro proceso ya lo está refrescando
+            try:
+                start = time.time()
+                value = compute()
+                if not value and current:
+                    # Un refresco fallido no sustituye a un valor válido
+                    logger.warning(f"Refresco vacío de {key}; se mantiene el valor anterior")
+                    return
+                self._write(key, value, self._ttl(ttl, value), time.time() - start)
+            finally:
+                self._release_lease(key, token)
+        except Exception as e:
+            logger.error(f"Error al refrescar {key} en segundo plano: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class MemoryCache:
+    """
+    Caché en memoria LRU con expiración (TTL) y tamaño máximo.
+
+    Expone la misma interfaz básica que RedisCache (get/set/delete/exists) para usarse
+    en procesos de larga duración sin crecer indefinidamente. Es segura entre hilos.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 3600):
+        if max_size < 1:
+            raise ValueError("max_size debe ser al menos 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge_expired()
+            return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return self.exists(key)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at <= now]
+        for key in expired:
+            del self._data[key]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Obtiene un valor y lo marca como usado recientemente; None si no está o expiró."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Obtiene varios valores; None para los ausentes o expirados."""
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: Any, expire: Optional[float] = None) -> bool:
+        """Almacena un valor; `expire` (segundos) sustituye al TTL por defecto."""
+        ttl = self.ttl if expire is None else expire
+        expires_at = time.monotonic() + ttl if ttl is not None else float("inf")
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._purge_expired()
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+        return True
+
+    def set_many(self, mapping: Dict[str, Any], expire: Optional[float] = None) -> bool:
+        """Almacena varios valores con el mismo TTL."""
+        for key, value in mapping.items():
+            self.set(key, value, expire=expire)
+        return True
+
+    def delete(self, key: str) -> bool:
+        """Elimina un valor de la caché."""
+        with self._lock:
+            self._data.pop(key, None)
+        return True
+
+    def delete_many(self, keys: List[str]) -> bool:
+        """Elimina varios valores de la caché."""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+        return True
+
+    def exists(self, key: str) -> bool:
+        """Verifica si una clave existe (y no ha expirado) en la caché."""
+        return self.get(key) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class NullCache(MemoryCache):
+    """Caché que no guarda nada; desactiva la caché propia de un cliente."""
+
+    def __init__(self):
+        super().__init__(max_size=1, ttl=None)
+
+    def set(self, key: str, value: Any, expire: Optional[float] = None) -> bool:
+        return True
@@ -1,48 +1,114 @@
-import json
 import logging
-from typing import Any, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 import redis
+import redis.asyncio as aioredis
 from pydantic import BaseModel
 
 from ..config import get_settings
+from .codecs import Serializer
 
 logger = logging.getLogger(__name__)
 
+# Pools de conexiones compartidos por proceso, por (host, puerto, db)
+_pools: Dict[Tuple[str, int, int], redis.ConnectionPool] = {}
+_async_pools: Dict[Tuple[str, int, int], aioredis.ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+# Borra el lease solo si sigue perteneciendo a quien lo adquirió
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _pool_key() -> Tuple[str, int, int]:
+    settings = get_settings()
+    return settings.REDIS_HOST, settings.REDIS_PORT, settings.REDIS_DB
+
+
+def get_connection_pool() -> redis.ConnectionPool:
+    """Pool de conexiones Redis compartido por todas las instancias del proceso."""
+    key = _pool_key()
+    with _pools_lock:
+        if key not in _pools:
+            host, port, db = key
+            _pools[key] = redis.ConnectionPool(host=host, port=port, db=db)
+        return _pools[key]
+
+
+def get_async_connection_pool() -> aioredis.ConnectionPool:
+    """Pool de conexiones Redis asíncrono compartido por el proceso."""
+    key = _pool_key()
+    with _pools_lock:
+        if key not in _async_pools:
+            host, port, db = key
+            _async_pools[key] = aioredis.ConnectionPool(host=host, port=port, db=db)
+        return _async_pools[key]
+
+
+def _plain(value: Any) -> Any:
+    return value.dict() if isinstance(value, BaseModel) else value
+
 
 class RedisCache:
-    """Servicio de caché usando Redis."""
+    """
+    Servicio de caché usando Redis.
 
-    def __init__(self):
-        settings = get_settings()
-        self.redis_client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            decode_responses=True,
-        )
+    Los valores se guardan en binario con el Serializer configurado (msgpack y
+    compresión por encima de un umbral); los valores JSON de versiones anteriores se
+    siguen leyendo.
+    """
+
+    def __init__(self, serializer: Optional[Serializer] = None):
+        self.redis_client = redis.Redis(connection_pool=get_connection_pool())
+        self.serializer = serializer or Serializer.from_settings(get_settings())
 
     def get(self, key: str) -> Optional[Any]:
         """Obtiene un valor de la caché."""
         try:
-            value = self.redis_client.get(key)
-            if value:
-                return json.loads(value)
+            return self.serializer.loads(self.redis_client.get(key))
         except Exception as e:
             logger.error(f"Error al obtener valor de caché: {str(e)}")
         return None
 
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Obtiene varios valores en una sola operación (MGET); None para los ausentes."""
+        if not keys:
+            return []
+        try:
+            values = self.redis_client.mget(keys)
+            return [self.serializer.loads(value) for value in values]
+        except Exception as e:
+            logger.error(f"Error al obtener valores de caché: {str(e)}")
+        return [None] * len(keys)
+
     def set(self, key: str, value: Any, expire: int = 3600) -> bool:
         """Almacena un valor en la caché."""
         try:
-            if isinstance(value, BaseModel):
-                value = value.dict()
-            self.redis_client.setex(key, expire, json.dumps(value))
+            self.redis_client.setex(key, expire, self.serializer.dumps(_plain(value)))
             return True
         except Exception as e:
             logger.error(f"Error al almacenar valor en caché: {str(e)}")
             return False
 
+    def set_many(self, mapping: Dict[str, Any], expire: int = 3600) -> bool:
+        """Almacena varios valores en un solo viaje de red (pipeline de SETEX)."""
+        if not mapping:
+            return True
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipe.setex(key, expire, self.serializer.dumps(_plain(value)))
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error al almacenar valores en caché: {str(e)}")
+            return False
+
     def delete(self, key: str) -> bool:
         """Elimina un valor de la caché."""
         try:
@@ -52,6 +118,17 @@ class RedisCache:
             logger.error(f"Error al eliminar valor de caché: {str(e)}")
             return False
 
+    def delete_many(self, keys: List[str]) -> bool:
+        """Elimina varios valores con un solo DEL."""
+        if not keys:
+            return True
+        try:
+            self.redis_client.delete(*keys)
+            return True
+        except Exception as e:
+            logger.error(f"Error al eliminar valores de caché: {str(e)}")
+            return False
+
     def exists(self, key: str) -> bool:
         """Verifica si una clave existe en la caché."""
         try:
@@ -59,3 +136,98 @@ class RedisCache:
         except Exception as e:
             logger.error(f"Error al verificar existencia en caché: {str(e)}")
             return False
+
+    def acquire_lock(self, key: str, token: str, ttl: int) -> bool:
+        """Adquiere un lease (SET NX con expiración); False si otro lo tiene."""
+        try:
+            return bool(self.redis_client.set(key, token, nx=True, ex=ttl))
+        except Exception as e:
+            logger.error(f"Error al adquirir lease en caché: {str(e)}")
+            # Sin Redis no hay coordinación posible: se permite calcular
+            return True
+
+    def release_lock(self, key: str, token: str) -> bool:
+        """Libera un lease si sigue perteneciendo a `token`."""
+        try:
+            return bool(self.redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token))
+        except Exception as e:
+            logger.error(f"Error al liberar lease en caché: {str(e)}")
+            return False
+
+
+class AsyncRedisCache:
+    """
+    Variante asíncrona de RedisCache (redis.asyncio) para los flujos async.
+
+    Mismas operaciones y mismo formato de valores que RedisCache, por lo que ambas
+    pueden compartir claves. El pool asíncrono queda ligado al event loop que lo usa
+    primero.
+    """
+
+    def __init__(self, serializer: Optional[Serializer] = None):
+        self.redis_client = aioredis.Redis(connection_pool=get_async_connection_pool())
+        self.serializer = serializer or Serializer.from_settings(get_settings())
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Obtiene un valor de la caché."""
+        try:
+            return self.serializer.loads(await self.redis_client.get(key))
+        except Exception as e:
+            logger.error(f"Error al obtener valor de caché: {str(e)}")
+        return None
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Obtiene varios valores en una sola operación (MGET); None para los ausentes."""
+        if not keys:
+            return []
+        try:
+            return [self.serializer.loads(value) for value in await self.redis_client.mget(keys)]
+        except Exception as e:
+            logger.error(f"Error al obtener valores de caché: {str(e)}")
+        return [None] * len(keys)
+
+    async def set(self, key: str, value: Any, expire: int = 3600) -> bool:
+        """Almacena un valor en la caché."""
+        try:
+            await self.redis_client.setex(key, expire, self.serializer.dumps(_plain(value)))
+            return True
+        except Exception as e:
+            logger.error(f"Error al almacenar valor en caché: {str(e)}")
+            return False
+
+    async def set_many(self, mapping: Dict[str, Any], expire: int = 3600) -> bool:
+        """Almacena varios valores en un solo viaje de red (pipeline de SETEX)."""
+        if not mapping:
+            return True
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.setex(key, expire, self.serializer.dumps(_plain(value)))
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error al almacenar valores en caché: {str(e)}")
+            return False
+
+    async def delete(self, key: str) -> bool:
+        """Elimina un valor de la caché."""
+        return await self.delete_many([key])
+
+    async def delete_many(self, keys: List[str]) -> bool:
+        """Elimina varios valores con un solo DEL."""
+        if not keys:
+            return True
+        try:
+            await self.redis_client.delete(*keys)
+            return True
+        except Exception as e:
+            logger.error(f"Error al eliminar valores de caché: {str(e)}")
+            return False
+
+    async def exists(self, key: str) -> bool:
+        """Verifica si una clave existe en la caché."""
+        try:
+            return bool(await self.redis_client.exists(key))
+        except Exception as e:
+            logger.error(f"Error al verificar existencia en caché: {str(e)}")
+            return False
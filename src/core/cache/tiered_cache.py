@@ -0,0 +1,151 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.core.cache.memory_cache import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCache:
+    """
+    Caché por niveles: se consulta cada nivel en orden (p. ej. memoria del proceso y
+    luego Redis) y un acierto en un nivel inferior se copia a los superiores.
+
+    Las escrituras van a todos los niveles; en los niveles con TTL propio (MemoryCache)
+    la expiración se acota a ese TTL, de modo que la copia local nunca vive más que la
+    compartida ni queda obsoleta mucho tiempo entre procesos. Lleva métricas de
+    aciertos y fallos por nivel.
+    """
+
+    def __init__(self, tiers: Sequence, names: Optional[Sequence[str]] = None):
+        if not tiers:
+            raise ValueError("TieredCache necesita al menos un nivel")
+        self.tiers = list(tiers)
+        self.names = list(names) if names else [type(tier).__name__ for tier in self.tiers]
+        if len(self.names) != len(self.tiers):
+            raise ValueError("Debe haber un nombre por nivel")
+        self._stats = {name: {"hits": 0, "misses": 0} for name in self.names}
+
+    @classmethod
+    def with_redis(cls, redis_cache=None, max_size: int = 4096, ttl: float = 300) -> "TieredCache":
+        """Memoria del proceso (LRU con TTL) delante de Redis."""
+        if redis_cache is None:
+            from src.core.cache.redis_cache import RedisCache
+
+            redis_cache = RedisCache()
+        return cls([MemoryCache(max_size=max_size, ttl=ttl), redis_cache], ["memory", "redis"])
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Aciertos, fallos y tasa de aciertos por nivel."""
+        result = {}
+        for name, counts in self._stats.items():
+            total = counts["hits"] + counts["misses"]
+            result[name] = {**counts, "hit_rate": counts["hits"] / total if total else 0.0}
+        return result
+
+    def reset_stats(self) -> None:
+        for counts in self._stats.values():
+            counts["hits"] = counts["misses"] = 0
+
+    def _expire_for(self, tier, expire: Optional[float]) -> Optional[float]:
+        ttl = getattr(tier, "ttl", None) if isinstance(tier, MemoryCache) else None
+        if ttl is None:
+            return expire
+        return ttl if expire is None else min(expire, ttl)
+
+    def _set_tier(self, tier, key: str, value: Any, expire: Optional[float]) -> bool:
+        expire = self._expire_for(tier, expire)
+        if expire is None:
+            return tier.set(key, value)
+        return tier.set(key, value, expire=expire)
+
+    def _set_many_tier(self, tier, mapping: Dict[str, Any], expire: Optional[float]) -> bool:
+        if not hasattr(tier, "set_many"):
+            return all([self._set_tier(tier, key, value, expire) for key, value in mapping.items()])
+        expire = self._expire_for(tier, expire)
+        if expire is None:
+            return tier.set_many(mapping)
+        return tier.set_many(mapping, expire=expire)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Obtiene un valor del primer nivel que lo tenga."""
+        for level, (name, tier) in enumerate(zip(self.names, self.tiers)):
+            value = tier.get(key)
+            if value is None:
+                self._stats[name]["misses"] += 1
+                continue
+            self._stats[name]["hits"] += 1
+            for upper in self.tiers[:level]:
+                self._set_tier(upper, key, value, None)
+            return value
+        return None
+
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Obtiene varios valores; cada nivel solo recibe las claves que siguen sin resolver."""
+        values: List[Optional[Any]] = [None] * len(keys)
+        pending = list(range(len(keys)))
+        for level, (name, tier) in enumerate(zip(self.names, self.tiers)):
+            if not pending:
+                break
+            pending_keys = [keys[i] for i in pending]
+            if hasattr(tier, "get_many"):
+                found = tier.get_many(pending_keys)
+            else:
+                found = [tier.get(key) for key in pending_keys]
+
+            still_pending = []
+            promoted = {}
+            for i, value in zip(pending, found):
+                if value is None:
+                    self._stats[name]["misses"] += 1
+                    still_pending.append(i)
+                    continue
+                self._stats[name]["hits"] += 1
+                values[i] = value
+                promoted[keys[i]] = value
+            if promoted:
+                for upper in self.tiers[:level]:
+                    self._set_many_tier(upper, promoted, None)
+            pending = still_pending
+        return values
+
+    def set(self, key: str, value: Any, expire: Optional[float] = 3600) -> bool:
+        """Almacena un valor en todos los niveles."""
+        results = [self._set_tier(tier, key, value, expire) for tier in self.tiers]
+        return all(results)
+
+    def set_many(self, mapping: Dict[str, Any], expire: Optional[float] = 3600) -> bool:
+        """Almacena varios valores en todos los niveles, en bloque cuando el nivel lo admite."""
+        if not mapping:
+            return True
+        return all([self._set_many_tier(tier, mapping, expire) for tier in self.tiers])
+
+    def delete(self, key: str) -> bool:
+        """Elimina un valor de todos los niveles."""
+        return all([tier.delete(key) for tier in self.tiers])
+
+    def delete_many(self, keys: List[str]) -> bool:
+        """Elimina varios valores de todos los niveles."""
+        results = []
+        for tier in self.tiers:
+            if hasattr(tier, "delete_many"):
+                results.append(tier.delete_many(keys))
+            else:
+                results.append(all([tier.delete(key) for key in keys]))
+        return all(results)
+
+    def exists(self, key: str) -> bool:
+        return any(tier.exists(key) for tier in self.tiers)
+
+    def acquire_lock(self, key: str, token: str, ttl: int) -> bool:
+        """Lease en el primer nivel compartido que los admita (p. ej. Redis)."""
+        for tier in self.tiers:
+            if hasattr(tier, "acquire_lock"):
+                return tier.acquire_lock(key, token, ttl)
+        return True
+
+    def release_lock(self, key: str, token: str) -> bool:
+        for tier in self.tiers:
+            if hasattr(tier, "release_lock"):
+                return tier.release_lock(key, token)
+        return True
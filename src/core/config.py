@@ -68,6 +68,11 @@ class Settings(BaseSettings):
     # Configuración de APIs externas
     USDA_API_KEY: str = "Rntzc9HDaefGgZL0w3Sid120qfk4kdJD4YZuicE4"
     USDA_API_URL: str = "https://api.nal.usda.gov/fdc/v1"
+    USDA_API_TIMEOUT: float = 10.0  # segundos por petición
+    USDA_API_MAX_RETRIES: int = 3
+    USDA_API_RATE_LIMIT: int = 1000  # peticiones por hora (límite por clave de FDC)
+    USDA_API_MAX_CONNECTIONS: int = 20
+    FDC_MIRROR_PATH: Optional[str] = None  # réplica SQLite local (scripts/build_fdc_mirror.py)
 
     # Configuración de GitHub
     GITHUB_TOKEN: Optional[str] = Field(default=None, env="GITHUB_TOKEN")
@@ -76,6 +81,9 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    REDIS_CACHE_CODEC: str = "msgpack"  # msgpack | json
+    REDIS_CACHE_COMPRESSION: str = "zlib"  # zlib | lz4 | none
+    REDIS_CACHE_COMPRESSION_THRESHOLD: int = 1024  # bytes
 
     model_config = SettingsConfigDict(
         env_file=".env",
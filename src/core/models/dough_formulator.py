@@ -1,10 +1,13 @@
 import json
 import os
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 from pydantic import BaseModel
 
+from src.core.optimization import maximize_linear_on_bounded_simplex, maximize_on_bounded_simplex
+
 
 class Ingredient(BaseModel):
     name: str
@@ -24,9 +27,92 @@ class DoughFormulation(BaseModel):
     sustainability_score: float
 
 
+class OptimizationResult(BaseModel):
+    """Mejor formulación encontrada junto con estadísticas del solver."""
+
+    formulation: DoughFormulation
+    score: float
+    objective: float
+    method: str
+    iterations: int
+    converged: bool
+    n_ingredients: int
+    elapsed_seconds: float
+
+
+# Costo máximo aceptable usado para normalizar costos
+MAX_COST = 100.0
+
+# Propiedades de textura consideradas (valor por defecto 0.5 si faltan)
+TEXTURE_PROPERTIES = ["elasticity", "firmness", "moisture"]
+
+
+class IngredientMatrix:
+    """Matriz de propiedades de ingredientes para evaluación vectorizada."""
+
+    def __init__(self, ingredients_db: Dict[str, Dict[str, Ingredient]]):
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        ingredients: List[Ingredient] = []
+        for category in ingredients_db.values():
+            for name, ingredient in category.items():
+                if name in self.index:
+                    continue
+                self.index[name] = len(self.names)
+                self.names.append(name)
+                ingredients.append(ingredient)
+
+        self.nutrient_names: List[str] = sorted(
+            {nutrient for ing in ingredients for nutrient in ing.nutritional_value}
+        )
+
+        self.cost = np.array([ing.cost for ing in ingredients], dtype=float)
+        self.availability = np.array([ing.availability for ing in ingredients], dtype=float)
+        self.sustainability = np.array(
+            [ing.sustainability_score for ing in ingredients], dtype=float
+        )
+        self.texture = np.array(
+            [
+                [ing.texture_properties.get(prop, 0.5) for prop in TEXTURE_PROPERTIES]
+                for ing in ingredients
+            ],
+            dtype=float,
+        ).reshape(len(ingredients), len(TEXTURE_PROPERTIES))
+        self.nutrients = np.array(
+            [
+                [ing.nutritional_value.get(nutrient, 0.0) for nutrient in self.nutrient_names]
+                for ing in ingredients
+            ],
+            dtype=float,
+        ).reshape(len(ingredients), len(self.nutrient_names))
+
+        # Coeficientes por ingrediente de cada criterio de evaluación
+        elasticity, firmness, moisture = self.texture.T
+        normalized_cost = 1.0 - self.cost / MAX_COST
+        self.taste = (moisture + firmness) / 2
+        self.texture_score = (elasticity + firmness) / 2
+        self.scalability = (self.availability + normalized_cost) / 2
+        self.viability = (normalized_cost + self.availability + self.sustainability) / 3
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def to_vector(self, ingredients: List[Dict[str, float]]) -> np.ndarray:
+        """Convierte una lista de {nombre: proporción} en un vector alineado con la matriz."""
+        vector = np.zeros(len(self.names))
+        for ingredient_dict in ingredients:
+            for name, proportion in ingredient_dict.items():
+                row = self.index.get(name)
+                if row is not None:
+                    vector[row] += proportion
+        return vector
+
+
 class DoughFormulator:
     def __init__(self):
         self.ingredients_db = {}
+        self._ingredient_matrix: Optional[IngredientMatrix] = None
+        self._matrix_source = None
         self.load_ingredients()
 
     def load_ingredients(self):
@@ -67,6 +153,21 @@ class DoughFormulator:
                 }
             }
 
+        self._build_ingredient_matrix()
+
+    def _build_ingredient_matrix(self) -> IngredientMatrix:
+        """Construir la matriz de propiedades a partir de ingredients_db"""
+        self._ingredient_matrix = IngredientMatrix(self.ingredients_db)
+        self._matrix_source = self.ingredients_db
+        return self._ingredient_matrix
+
+    @property
+    def ingredient_matrix(self) -> IngredientMatrix:
+        """Matriz de propiedades; se reconstruye si ingredients_db fue reemplazado"""
+        if self._ingredient_matrix is None or self._matrix_source is not self.ingredients_db:
+            return self._build_ingredient_matrix()
+        return self._ingredient_matrix
+
     def optimize_formulation(self, target_properties: Dict[str, float]) -> DoughFormulation:
         """
         Optimizar la formulación considerando:
@@ -76,36 +177,141 @@ class DoughFormulator:
         - Sostenibilidad
         - Textura y sabor
         """
-        # Inicializar variables
-        best_formulation = None
-        best_score = float("-inf")
-
-        # Generar combinaciones de ingredientes
-        for category, ingredients in self.ingredients_db.items():
-            for name, ingredient in ingredients.items():
-                # Calcular proporciones iniciales
-                proportions = self._calculate_initial_proportions(ingredient, target_properties)
-
-                # Crear formulación
-                formulation = DoughFormulation(
-                    ingredients=[{name: prop} for prop in proportions],
-                    target_properties=target_properties,
-                    nutritional_profile=self._calculate_nutritional_profile(
-                        proportions, ingredient
-                    ),
-                    cost=self._calculate_cost(proportions, ingredient),
-                    sustainability_score=self._calculate_sustainability(proportions, ingredient),
-                )
-
-                # Evaluar formulación
-                score = self._evaluate_formulation_score(formulation)
-
-                # Actualizar mejor formulación
-                if score > best_score:
-                    best_score = score
-                    best_formulation = formulation
-
-        return best_formulation
+        if not len(self.ingredient_matrix):
+            return None
+        return self.optimize_blend(target_properties).formulation
+
+    def optimize_blend(
+        self,
+        target_properties: Dict[str, float],
+        bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+        nutrition_weight: float = 1.0,
+        max_iter: int = 2000,
+        tol: float = 1e-7,
+    ) -> OptimizationResult:
+        """
+        Buscar la mezcla de proporciones óptima sobre todos los ingredientes.
+
+        Maximiza el score total de `evaluate_formulations` menos una penalización
+        cuadrática por desviación relativa respecto a los nutrientes objetivo, sujeto a
+        que las proporciones sumen 1 y respeten las cotas de cada ingrediente.
+
+        Sin objetivos nutricionales el problema es lineal y se resuelve de forma exacta
+        (método "lp"); en caso contrario se usa gradiente proyectado acelerado con conjunto
+        de trabajo sobre el simplex acotado (método "projected_gradient").
+
+        Args:
+            target_properties: Valores nutricionales objetivo, p. ej. {"protein": 12.0}
+            bounds: Cotas (mínimo, máximo) por nombre de ingrediente; por defecto (0, 1)
+            nutrition_weight: Peso de la penalización nutricional
+            max_iter: Iteraciones máximas del gradiente proyectado
+            tol: Tolerancia de convergencia sobre el cambio en las proporciones
+
+        Returns:
+            OptimizationResult con la formulación y las estadísticas del solver
+        """
+        start = time.perf_counter()
+        matrix = self.ingredient_matrix
+        n = len(matrix)
+        if n == 0:
+            raise ValueError("No hay ingredientes cargados para optimizar")
+
+        lower = np.zeros(n)
+        upper = np.ones(n)
+        for name, (low, high) in (bounds or {}).items():
+            if name not in matrix.index:
+                raise ValueError(f"Ingrediente desconocido en las cotas: {name}")
+            lower[matrix.index[name]] = low
+            upper[matrix.index[name]] = high
+
+        # Sobre el simplex todos los promedios ponderados son lineales en las proporciones
+        linear = (
+            matrix.taste
+            + matrix.texture_score
+            + matrix.sustainability
+            + matrix.scalability
+            + matrix.viability
+        ) / 6
+        cost_gradient = -matrix.cost / MAX_COST / 6
+
+        # Penalización: media de ((p·N_k - t_k) / t_k)^2 sobre los nutrientes objetivo
+        targets = [
+            (matrix.nutrient_names.index(nutrient), value)
+            for nutrient, value in target_properties.items()
+            if nutrient in matrix.nutrient_names and value
+        ]
+        if targets and nutrition_weight > 0:
+            columns, values = zip(*targets)
+            scaled = matrix.nutrients[:, list(columns)] / np.asarray(values)
+        else:
+            scaled = np.zeros((n, 0))
+
+        def objective(p: np.ndarray) -> float:
+            cost_score = np.clip(1.0 - p @ matrix.cost / MAX_COST, 0.0, 1.0)
+            score = p @ linear + cost_score / 6
+            if scaled.shape[1]:
+                score -= nutrition_weight * np.mean((p @ scaled - 1.0) ** 2)
+            return float(score)
+
+        if not scaled.shape[1] and matrix.cost.max() <= MAX_COST:
+            method = "lp"
+            iterations = 1
+            converged = True
+            proportions = maximize_linear_on_bounded_simplex(linear + cost_gradient, lower, upper)
+        else:
+            method = "projected_gradient"
+
+            def gradient(p: np.ndarray) -> np.ndarray:
+                cost = p @ matrix.cost / MAX_COST
+                result = linear + (cost_gradient if 0.0 < 1.0 - cost < 1.0 else 0.0)
+                if scaled.shape[1]:
+                    residual = p @ scaled - 1.0
+                    result = result - nutrition_weight * 2 * scaled @ residual / len(residual)
+                return result
+
+            def lipschitz(indices: np.ndarray) -> float:
+                # Curvatura de la penalización en direcciones que conservan la suma
+                if not scaled.shape[1] or len(indices) < 2:
+                    return 0.0
+                centered = scaled[indices] - scaled[indices].mean(axis=0)
+                return 2 * nutrition_weight * np.linalg.norm(centered, 2) ** 2 / scaled.shape[1]
+
+            start_point = maximize_linear_on_bounded_simplex(linear + cost_gradient, lower, upper)
+            proportions, iterations, converged = maximize_on_bounded_simplex(
+                gradient, lipschitz, start_point, lower, upper, max_iter=max_iter, tol=tol
+            )
+
+        formulation = self._build_formulation(proportions, target_properties)
+        return OptimizationResult(
+            formulation=formulation,
+            score=float(self._evaluate_formulation_score(formulation)),
+            objective=objective(proportions),
+            method=method,
+            iterations=iterations,
+            converged=converged,
+            n_ingredients=n,
+            elapsed_seconds=time.perf_counter() - start,
+        )
+
+    def _build_formulation(
+        self, proportions: np.ndarray, target_properties: Dict[str, float]
+    ) -> DoughFormulation:
+        """Construir una DoughFormulation a partir de un vector de proporciones"""
+        matrix = self.ingredient_matrix
+        nutrients = proportions @ matrix.nutrients
+        return DoughFormulation(
+            ingredients=[
+                {name: float(proportions[row])}
+                for row, name in enumerate(matrix.names)
+                if proportions[row] > 1e-9
+            ],
+            target_properties=target_properties,
+            nutritional_profile={
+                nutrient: float(value) for nutrient, value in zip(matrix.nutrient_names, nutrients)
+            },
+            cost=float(proportions @ matrix.cost),
+            sustainability_score=float(proportions @ matrix.sustainability),
+        )
 
     def evaluate_formulation(self, formulation: DoughFormulation) -> Dict[str, float]:
         """
@@ -130,43 +336,52 @@ class DoughFormulator:
 
         return evaluation
 
-    def _calculate_initial_proportions(
-        self, ingredient: Ingredient, target_properties: Dict[str, float]
-    ) -> List[float]:
-        """Calcular proporciones iniciales basadas en propiedades objetivo"""
-        # Calcular proporciones basadas en valores nutricionales objetivo
-        proportions = []
-
-        for nutrient, target_value in target_properties.items():
-            if nutrient in ingredient.nutritional_value:
-                proportion = target_value / ingredient.nutritional_value[nutrient]
-                proportions.append(min(1.0, proportion))  # Limitar a 1.0
-
-        # Normalizar proporciones
-        if proportions:
-            total = sum(proportions)
-            proportions = [p / total for p in proportions]
-        else:
-            proportions = [0.3, 0.4, 0.3]  # Valores por defecto si no hay coincidencias
+    def evaluate_formulations(self, proportions: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Evaluar un lote de formulaciones en una sola pasada vectorizada.
 
-        return proportions
+        Args:
+            proportions: Matriz (n_formulaciones, n_ingredientes) con columnas alineadas
+                con `ingredient_matrix.names`
+
+        Returns:
+            Diccionario con los mismos criterios que `evaluate_formulation`, cada uno
+            como un array de longitud n_formulaciones. El costo y la sostenibilidad se
+            calculan a partir de las proporciones.
+        """
+        matrix = self.ingredient_matrix
+        proportions = np.atleast_2d(np.asarray(proportions, dtype=float))
+        if proportions.shape[1] != len(matrix):
+            raise ValueError(
+                f"Se esperaban {len(matrix)} columnas de proporciones, "
+                f"se recibieron {proportions.shape[1]}"
+            )
 
-    def _calculate_nutritional_profile(
-        self, proportions: List[float], ingredient: Ingredient
-    ) -> Dict[str, float]:
-        """Calcular perfil nutricional de la formulación"""
-        return {
-            nutrient: value * sum(proportions)
-            for nutrient, value in ingredient.nutritional_value.items()
+        cost = proportions @ matrix.cost
+        evaluation = {
+            "taste_score": self._weighted_mean(proportions, matrix.taste),
+            "texture_score": self._weighted_mean(proportions, matrix.texture_score),
+            "cost_score": np.clip(1.0 - cost / MAX_COST, 0.0, 1.0),
+            "sustainability_score": proportions @ matrix.sustainability,
+            "scalability_score": self._weighted_mean(proportions, matrix.scalability),
+            "commercial_viability": self._weighted_mean(proportions, matrix.viability),
         }
+        evaluation["total_score"] = np.mean(np.stack(list(evaluation.values())), axis=0)
+
+        return evaluation
 
-    def _calculate_cost(self, proportions: List[float], ingredient: Ingredient) -> float:
-        """Calcular costo total de la formulación"""
-        return ingredient.cost * sum(proportions)
+    @staticmethod
+    def _weighted_mean(proportions: np.ndarray, coefficients: np.ndarray) -> np.ndarray:
+        """Promedio ponderado por proporciones (0.5 si el peso total no es positivo)"""
+        total_weight = proportions.sum(axis=1)
+        weighted = proportions @ coefficients
+        safe_weight = np.where(total_weight > 0, total_weight, 1.0)
+        return np.where(total_weight > 0, weighted / safe_weight, 0.5)
 
-    def _calculate_sustainability(self, proportions: List[float], ingredient: Ingredient) -> float:
-        """Calcular score de sostenibilidad"""
-        return ingredient.sustainability_score * sum(proportions)
+    def _score_formulation(self, formulation: DoughFormulation, coefficients: np.ndarray) -> float:
+        """Promedio ponderado de un criterio para una formulación individual"""
+        vector = self.ingredient_matrix.to_vector(formulation.ingredients)
+        return float(self._weighted_mean(vector[np.newaxis, :], coefficients)[0])
 
     def _evaluate_formulation_score(self, formulation: DoughFormulation) -> float:
         """Evaluar score general de la formulación"""
@@ -175,59 +390,16 @@ class DoughFormulator:
 
     def _evaluate_taste(self, formulation: DoughFormulation) -> float:
         """Evaluar sabor de la formulación"""
-        # Calcular score de sabor basado en ingredientes y sus proporciones
-        taste_score = 0.0
-        total_weight = 0.0
-
-        for ingredient_dict in formulation.ingredients:
-            for name, proportion in ingredient_dict.items():
-                # Buscar el ingrediente en la base de datos
-                for category in self.ingredients_db.values():
-                    if name in category:
-                        ingredient = category[name]
-                        # Considerar propiedades que afectan el sabor
-                        taste_score += (
-                            proportion
-                            * (
-                                ingredient.texture_properties.get("moisture", 0.5)
-                                + ingredient.texture_properties.get("firmness", 0.5)
-                            )
-                            / 2
-                        )
-                        total_weight += proportion
-
-        return taste_score / total_weight if total_weight > 0 else 0.5
+        return self._score_formulation(formulation, self.ingredient_matrix.taste)
 
     def _evaluate_texture(self, formulation: DoughFormulation) -> float:
         """Evaluar textura de la formulación"""
-        # Calcular score de textura basado en propiedades de los ingredientes
-        texture_score = 0.0
-        total_weight = 0.0
-
-        for ingredient_dict in formulation.ingredients:
-            for name, proportion in ingredient_dict.items():
-                # Buscar el ingrediente en la base de datos
-                for category in self.ingredients_db.values():
-                    if name in category:
-                        ingredient = category[name]
-                        # Considerar propiedades de textura
-                        texture_score += (
-                            proportion
-                            * (
-                                ingredient.texture_properties.get("elasticity", 0.5)
-                                + ingredient.texture_properties.get("firmness", 0.5)
-                            )
-                            / 2
-                        )
-                        total_weight += proportion
-
-        return texture_score / total_weight if total_weight > 0 else 0.5
+        return self._score_formulation(formulation, self.ingredient_matrix.texture_score)
 
     def _evaluate_cost(self, formulation: DoughFormulation) -> float:
         """Evaluar costo de la formulación"""
         # Calcular score de costo (menor costo = mayor score)
-        max_cost = 100.0  # Costo máximo aceptable
-        cost_score = 1.0 - (formulation.cost / max_cost)
+        cost_score = 1.0 - (formulation.cost / MAX_COST)
         return max(0.0, min(1.0, cost_score))
 
     def _evaluate_sustainability(self, formulation: DoughFormulation) -> float:
@@ -236,54 +408,11 @@ class DoughFormulator:
 
     def _evaluate_scalability(self, formulation: DoughFormulation) -> float:
         """Evaluar escalabilidad de la formulación"""
-        # Calcular score de escalabilidad basado en disponibilidad de ingredientes
-        scalability_score = 0.0
-        total_weight = 0.0
-
-        for ingredient_dict in formulation.ingredients:
-            for name, proportion in ingredient_dict.items():
-                # Buscar el ingrediente en la base de datos
-                for category in self.ingredients_db.values():
-                    if name in category:
-                        ingredient = category[name]
-                        # Considerar disponibilidad y costos
-                        scalability_score += (
-                            proportion
-                            * (
-                                ingredient.availability
-                                + (1.0 - ingredient.cost / 100.0)  # Normalizar costo
-                            )
-                            / 2
-                        )
-                        total_weight += proportion
-
-        return scalability_score / total_weight if total_weight > 0 else 0.5
+        return self._score_formulation(formulation, self.ingredient_matrix.scalability)
 
     def _evaluate_commercial_viability(self, formulation: DoughFormulation) -> float:
         """Evaluar viabilidad comercial de la formulación"""
-        # Calcular score de viabilidad comercial basado en múltiples factores
-        viability_score = 0.0
-        total_weight = 0.0
-
-        for ingredient_dict in formulation.ingredients:
-            for name, proportion in ingredient_dict.items():
-                # Buscar el ingrediente en la base de datos
-                for category in self.ingredients_db.values():
-                    if name in category:
-                        ingredient = category[name]
-                        # Considerar costo, disponibilidad y sostenibilidad
-                        viability_score += (
-                            proportion
-                            * (
-                                (1.0 - ingredient.cost / 100.0)  # Normalizar costo
-                                + ingredient.availability
-                                + ingredient.sustainability_score
-                            )
-                            / 3
-                        )
-                        total_weight += proportion
-
-        return viability_score / total_weight if total_weight > 0 else 0.5
+        return self._score_formulation(formulation, self.ingredient_matrix.viability)
 
     def _calculate_nutritional_score(self, nutrients: Dict[str, float]) -> float:
         """Calcula el puntaje nutricional basado en los nutrientes."""
@@ -0,0 +1,20 @@
+"""
+Utilidades numéricas de optimización de PizzaAI
+"""
+
+from .pareto import ParetoArchive, dominates, non_dominated_sort, pareto_fronts
+from .simplex import (
+    maximize_linear_on_bounded_simplex,
+    maximize_on_bounded_simplex,
+    project_to_bounded_simplex,
+)
+
+__all__ = [
+    "project_to_bounded_simplex",
+    "maximize_linear_on_bounded_simplex",
+    "maximize_on_bounded_simplex",
+    "ParetoArchive",
+    "dominates",
+    "non_dominated_sort",
+    "pareto_fronts",
+]
@@ -0,0 +1,282 @@
+from typing import Any, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+
+def dominates(a: np.ndarray, b: np.ndarray) -> bool:
+    """True si `a` domina a `b` (minimización): no es peor en nada y es mejor en algo."""
+    return bool(np.all(a <= b) and np.any(a < b))
+
+
+def _dominated_by_any(points: np.ndarray, point: np.ndarray) -> bool:
+    """True si alguna fila de `points` domina a `point`."""
+    weakly = np.all(points <= point, axis=1)
+    return bool(np.any(weakly & np.any(points < point, axis=1)))
+
+
+def non_dominated_sort(points: np.ndarray) -> np.ndarray:
+    """
+    Asigna a cada punto el índice de su frente de Pareto (0 = no dominado), minimizando
+    todos los objetivos.
+
+    Implementa ENS-BS (Efficient Non-dominated Sort con búsqueda binaria): tras ordenar
+    lexicográficamente, un punto solo puede ser dominado por los anteriores, y el frente
+    de cada punto se localiza con búsqueda binaria sobre los frentes ya construidos, con
+    la comprobación de dominancia vectorizada por frente.
+
+    Args:
+        points: Matriz (n_puntos, n_objetivos)
+
+    Returns:
+        Array de enteros (n_puntos,) con el rango de cada punto
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2:
+        raise ValueError("points debe ser una matriz (n_puntos, n_objetivos)")
+    n = len(points)
+    ranks = np.zeros(n, dtype=int)
+    if n == 0:
+        return ranks
+
+    # np.lexsort usa la última clave como principal
+    order = np.lexsort(points.T[::-1])
+    fronts: List[List[int]] = []
+    front_arrays: List[np.ndarray] = []
+
+    for idx in order:
+        point = points[idx]
+        low, high = 0, len(fronts)
+        while low < high:
+            mid = (low + high) // 2
+            if front_arrays[mid] is None:
+                front_arrays[mid] = points[fronts[mid]]
+            if _dominated_by_any(front_arrays[mid], point):
+                low = mid + 1
+            else:
+                high = mid
+        if low == len(fronts):
+            fronts.append([])
+            front_arrays.append(None)
+        fronts[low].append(idx)
+        front_arrays[low] = None
+        ranks[idx] = low
+
+    return ranks
+
+
+def pareto_fronts(points: np.ndarray) -> List[np.ndarray]:
+    """Índices de los puntos de cada frente de Pareto, del mejor al peor."""
+    ranks = non_dominated_sort(points)
+    if ranks.size == 0:
+        return []
+    return [np.flatnonzero(ranks == rank) for rank in range(ranks.max() + 1)]
+
+
+def _weakly_dominates(a: Sequence[float], b: Sequence[float]) -> bool:
+    """a <= b en todos los objetivos (comparación escalar, más rápida que numpy en 2-4 dims)."""
+    return all(x <= y for x, y in zip(a, b))
+
+
+class _NDNode:
+    """Nodo de un ND-tree: hoja con puntos o nodo interno con hijos."""
+
+    __slots__ = ("parent", "children", "points", "items", "ideal", "nadir")
+
+    def __init__(self, parent: Optional["_NDNode"] = None):
+        self.parent = parent
+        self.children: List["_NDNode"] = []
+        self.points: Optional[np.ndarray] = None
+        self.items: List[Any] = []
+        self.ideal: Optional[List[float]] = None
+        self.nadir: Optional[List[float]] = None
+
+    @property
+    def is_leaf(self) -> bool:
+        return not self.children
+
+    def is_empty(self) -> bool:
+        return not self.items and not self.children
+
+    def count(self) -> int:
+        if self.is_leaf:
+            return len(self.items)
+        return sum(child.count() for child in self.children)
+
+    def expand_bounds(self, point: List[float]) -> None:
+        """Amplía la caja (ideal, nadir) del nodo y sus ancestros para incluir `point`."""
+        node = self
+        while node is not None:
+            if node.ideal is None:
+                node.ideal, node.nadir = list(point), list(point)
+            else:
+                node.ideal = [min(a, b) for a, b in zip(node.ideal, point)]
+                node.nadir = [max(a, b) for a, b in zip(node.nadir, point)]
+            node = node.parent
+
+    def distance_to(self, point: List[float]) -> float:
+        """Distancia (al cuadrado) entre `point` y el centro de la caja del nodo."""
+        return sum(((lo + hi) / 2 - x) ** 2 for lo, hi, x in zip(self.ideal, self.nadir, point))
+
+
+class ParetoArchive:
+    """
+    Archivo de Pareto incremental basado en un ND-tree (Jaszkiewicz y Lust, 2018).
+
+    Guarda solo puntos no dominados (minimización) junto con un objeto asociado
+    arbitrario, p. ej. el individuo que los produjo. Cada nodo mantiene una caja
+    (ideal, nadir) de sus puntos, de modo que al añadir un punto se descartan subárboles
+    enteros sin compararlo con cada punto: si el nadir de un nodo domina el punto, este
+    se rechaza, y si el punto domina el ideal del nodo, el subárbol completo se elimina.
+    Los puntos repetidos se rechazan.
+
+    Las cajas no se contraen al borrar puntos; siguen siendo cotas válidas, solo menos
+    ajustadas.
+    """
+
+    def __init__(self, max_leaf_size: int = 32, branching: Optional[int] = None):
+        if max_leaf_size < 2:
+            raise ValueError("max_leaf_size debe ser al menos 2")
+        self.max_leaf_size = max_leaf_size
+        self.branching = branching
+        self._root = _NDNode()
+        self._size = 0
+        self._n_objectives: Optional[int] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Any]:
+        for leaf in self._leaves():
+            yield from leaf.items
+
+    def items(self) -> List[Any]:
+        """Objetos asociados a los puntos del archivo."""
+        return list(self)
+
+    def points(self) -> np.ndarray:
+        """Matriz (n, n_objetivos) con los puntos del archivo."""
+        blocks = [leaf.points for leaf in self._leaves() if leaf.items]
+        if not blocks:
+            return np.empty((0, self._n_objectives or 0))
+        return np.vstack(blocks)
+
+    def add(self, point: Sequence[float], item: Any = None) -> bool:
+        """
+        Añade un punto si no está dominado por (ni repetido en) el archivo, eliminando los
+        puntos que domina. Retorna True si el punto se aceptó.
+        """
+        point = np.array(point, dtype=float).ravel()
+        if self._n_objectives is None:
+            self._n_objectives = len(point)
+        elif len(point) != self._n_objectives:
+            raise ValueError(
+                f"El punto tiene {len(point)} objetivos y el archivo {self._n_objectives}"
+            )
+
+        values = point.tolist()
+        if self._size and not self._update(self._root, point, values):
+            return False
+        if self._root.is_empty():
+            self._root = _NDNode()
+        self._insert(point, values, item)
+        self._size += 1
+        return True
+
+    def update(
+        self, points: Sequence[Sequence[float]], items: Optional[Sequence[Any]] = None
+    ) -> int:
+        """Añade varios puntos y retorna cuántos fueron aceptados."""
+        points = np.asarray(points, dtype=float)
+        if items is None:
+            items = [None] * len(points)
+        return sum(self.add(point, item) for point, item in zip(points, items))
+
+    def _leaves(self) -> Iterator[_NDNode]:
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.is_leaf:
+                yield node
+            else:
+                stack.extend(node.children)
+
+    def _update(self, node: _NDNode, point: np.ndarray, values: List[float]) -> bool:
+        """
+        Elimina del subárbol los puntos dominados por `point`. Retorna False si `point`
+        está dominado (o repetido) y debe rechazarse.
+        """
+        if _weakly_dominates(node.nadir, values):
+            return False
+        if _weakly_dominates(values, node.ideal):
+            self._size -= node.count()
+            node.children, node.points, node.items = [], None, []
+            return True
+        if not (_weakly_dominates(node.ideal, values) or _weakly_dominates(values, node.nadir)):
+            # Cajas incomparables: ningún punto del nodo domina ni es dominado
+            return True
+
+        if node.is_leaf:
+            if np.any(np.all(node.points <= point, axis=1)):
+                return False
+            keep = ~np.all(point <= node.points, axis=1)
+            if not keep.all():
+                self._size -= int((~keep).sum())
+                node.points = node.points[keep]
+                node.items = [it for it, k in zip(node.items, keep) if k]
+            return True
+
+        for child in node.children:
+            if not self._update(child, point, values):
+                return False
+        node.children = [child for child in node.children if not child.is_empty()]
+        if len(node.children) == 1:
+            self._collapse(node)
+        return True
+
+    def _collapse(self, node: _NDNode) -> None:
+        """Sustituye un nodo interno con un único hijo por el contenido de ese hijo."""
+        (child,) = node.children
+        node.children = child.children
+        node.points, node.items = child.points, child.items
+        for grandchild in node.children:
+            grandchild.parent = node
+
+    def _insert(self, point: np.ndarray, values: List[float], item: Any) -> None:
+        node = self._root
+        while not node.is_leaf:
+            node = min(node.children, key=lambda child: child.distance_to(values))
+        if node.points is None or not node.items:
+            node.points = point[None, :]
+        else:
+            node.points = np.vstack([node.points, point])
+        node.items.append(item)
+        node.expand_bounds(values)
+        if len(node.items) > self.max_leaf_size:
+            self._split(node)
+
+    def _split(self, leaf: _NDNode) -> None:
+        """Reparte los puntos de una hoja llena entre nuevos hijos (semillas alejadas)."""
+        points = leaf.points
+        branching = self.branching or points.shape[1] + 1
+        distances = np.linalg.norm(points[:, None, :] - points[None, :, :], axis=2)
+
+        # Primera semilla: el punto más alejado en promedio; las siguientes, el más alejado
+        # de las semillas ya elegidas
+        seeds = [int(np.argmax(distances.mean(axis=1)))]
+        while len(seeds) < min(branching, len(points)):
+            seeds.append(int(np.argmax(distances[:, seeds].min(axis=1))))
+
+        assignment = np.argmin(distances[:, seeds], axis=1)
+        assignment[seeds] = np.arange(len(seeds))
+        children = []
+        for child_idx in range(len(seeds)):
+            mask = assignment == child_idx
+            child = _NDNode(leaf)
+            child.points = points[mask]
+            child.items = [it for it, m in zip(leaf.items, mask) if m]
+            child.ideal = child.points.min(axis=0).tolist()
+            child.nadir = child.points.max(axis=0).tolist()
+            children.append(child)
+
+        leaf.points, leaf.items = None, []
+        leaf.children = children
@@ -0,0 +1,202 @@
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+
+def _check_bounds(lower: np.ndarray, upper: np.ndarray, total: float) -> None:
+    """Verifica que el simplex acotado {lower <= x <= upper, sum(x) = total} no esté vacío."""
+    if np.any(lower > upper):
+        raise ValueError("Cada cota inferior debe ser menor o igual que su cota superior")
+    if lower.sum() > total + 1e-12 or upper.sum() < total - 1e-12:
+        raise ValueError(
+            f"Cotas infactibles: la suma debe ser {total}, pero las cotas permiten "
+            f"[{lower.sum():.4f}, {upper.sum():.4f}]"
+        )
+
+
+def project_to_bounded_simplex(
+    values: np.ndarray,
+    lower: Optional[np.ndarray] = None,
+    upper: Optional[np.ndarray] = None,
+    total: float = 1.0,
+) -> np.ndarray:
+    """
+    Proyección euclidiana sobre {lower <= x <= upper, sum(x) = total}.
+
+    Acepta un vector o una matriz (una fila por punto) y proyecta todas las filas a la
+    vez. La proyección es clip(v - tau, lower, upper); como la suma es lineal a trozos y
+    decreciente en tau, tau se obtiene de forma exacta ordenando los puntos de quiebre
+    v - upper y v - lower de cada fila.
+
+    Args:
+        values: Vector (n,) o matriz (m, n) a proyectar
+        lower: Cotas inferiores por columna (por defecto 0)
+        upper: Cotas superiores por columna (por defecto total)
+        total: Suma requerida de cada fila
+
+    Returns:
+        Array con la misma forma que `values`
+    """
+    values = np.asarray(values, dtype=float)
+    points = np.atleast_2d(values)
+    rows, n = points.shape
+    lower = np.zeros(n) if lower is None else np.asarray(lower, dtype=float)
+    upper = np.full(n, float(total)) if upper is None else np.asarray(upper, dtype=float)
+    _check_bounds(lower, upper, total)
+
+    # En v - upper una variable deja la cota superior (la pendiente baja en 1) y en
+    # v - lower llega a la cota inferior (la pendiente sube en 1)
+    breakpoints = np.concatenate([points - upper, points - lower], axis=1)
+    steps = np.concatenate([np.ones((rows, n)), -np.ones((rows, n))], axis=1)
+    order = np.argsort(breakpoints, axis=1, kind="stable")
+    breakpoints = np.take_along_axis(breakpoints, order, axis=1)
+    free = np.cumsum(np.take_along_axis(steps, order, axis=1), axis=1)
+
+    # Suma de la proyección evaluada en cada punto de quiebre
+    sums = np.empty_like(breakpoints)
+    sums[:, 0] = upper.sum()
+    sums[:, 1:] = upper.sum() - np.cumsum(free[:, :-1] * np.diff(breakpoints, axis=1), axis=1)
+
+    # Último punto de quiebre cuya suma sigue siendo >= total, e interpolación lineal
+    segment = np.clip((sums >= total - 1e-15).sum(axis=1) - 1, 0, 2 * n - 1)
+    segment_start = np.take_along_axis(breakpoints, segment[:, np.newaxis], axis=1)[:, 0]
+    segment_sum = np.take_along_axis(sums, segment[:, np.newaxis], axis=1)[:, 0]
+    segment_free = np.take_along_axis(free, segment[:, np.newaxis], axis=1)[:, 0]
+    offset = np.divide(
+        segment_sum - total,
+        segment_free,
+        out=np.zeros(rows),
+        where=segment_free > 0,
+    )
+    tau = segment_start + offset
+
+    projected = np.clip(points - tau[:, np.newaxis], lower, upper)
+    return projected.reshape(values.shape)
+
+
+def maximize_linear_on_bounded_simplex(
+    coefficients: np.ndarray,
+    lower: Optional[np.ndarray] = None,
+    upper: Optional[np.ndarray] = None,
+    total: float = 1.0,
+) -> np.ndarray:
+    """
+    Resuelve exactamente max c·x sujeto a lower <= x <= upper y sum(x) = total.
+
+    Es un problema de mochila fraccionaria: se parte de las cotas inferiores y el resto
+    se asigna en orden decreciente de coeficiente hasta agotar `total`.
+    """
+    coefficients = np.asarray(coefficients, dtype=float)
+    n = coefficients.shape[0]
+    lower = np.zeros(n) if lower is None else np.asarray(lower, dtype=float)
+    upper = np.full(n, float(total)) if upper is None else np.asarray(upper, dtype=float)
+    _check_bounds(lower, upper, total)
+
+    solution = lower.copy()
+    remaining = total - lower.sum()
+    for i in np.argsort(-coefficients, kind="stable"):
+        if remaining <= 0:
+            break
+        added = min(upper[i] - lower[i], remaining)
+        solution[i] += added
+        remaining -= added
+    return solution
+
+
+def maximize_on_bounded_simplex(
+    gradient: Callable[[np.ndarray], np.ndarray],
+    lipschitz: Callable[[np.ndarray], float],
+    start: np.ndarray,
+    lower: Optional[np.ndarray] = None,
+    upper: Optional[np.ndarray] = None,
+    total: float = 1.0,
+    max_iter: int = 500,
+    tol: float = 1e-7,
+    working_set_size: int = 64,
+) -> Tuple[np.ndarray, int, bool]:
+    """
+    Maximiza una función cóncava y suave sobre {lower <= x <= upper, sum(x) = total}.
+
+    Usa gradiente proyectado acelerado (FISTA con reinicio adaptativo) sobre un conjunto
+    de trabajo de variables; el resto queda fijo. Al converger el subproblema se verifican
+    las condiciones KKT en todas las variables y se incorporan las que las violan, de modo
+    que el costo por iteración depende del tamaño del conjunto de trabajo y no del total.
+
+    Args:
+        gradient: Gradiente de la función objetivo evaluado en un x completo
+        lipschitz: Constante de Lipschitz del gradiente restringido a un subconjunto de
+            índices (en direcciones que conservan la suma)
+        start: Punto inicial factible
+        lower: Cotas inferiores (por defecto 0)
+        upper: Cotas superiores (por defecto total)
+        total: Suma requerida
+        max_iter: Iteraciones máximas de gradiente (sumando todos los subproblemas)
+        tol: Tolerancia sobre el cambio máximo en x y sobre las violaciones KKT
+        working_set_size: Variables que se incorporan al conjunto de trabajo por ronda
+
+    Returns:
+        Tupla (x, iteraciones, convergió)
+    """
+    x = np.array(start, dtype=float)
+    n = x.shape[0]
+    lower = np.zeros(n) if lower is None else np.asarray(lower, dtype=float)
+    upper = np.full(n, float(total)) if upper is None else np.asarray(upper, dtype=float)
+    _check_bounds(lower, upper, total)
+
+    full_gradient = gradient(x)
+    active = np.zeros(n, dtype=bool)
+    active[np.argsort(-full_gradient, kind="stable")[:working_set_size]] = True
+    active |= x > lower
+
+    iterations = 0
+    while iterations < max_iter:
+        indices = np.flatnonzero(active)
+        sub_lower, sub_upper = lower[indices], upper[indices]
+        sub_total = total - (x.sum() - x[indices].sum())
+        constant = lipschitz(indices)
+        step = 1.0 / constant if constant > 0 else 1.0
+
+        current = x[indices]
+        momentum_point = current
+        momentum = 1.0
+        while iterations < max_iter:
+            iterations += 1
+            x[indices] = momentum_point
+            sub_gradient = gradient(x)[indices]
+            updated = project_to_bounded_simplex(
+                momentum_point + step * sub_gradient, sub_lower, sub_upper, sub_total
+            )
+            change = np.abs(updated - current).max()
+            if (momentum_point - updated) @ (updated - current) > 0:
+                momentum = 1.0
+            next_momentum = (1 + np.sqrt(1 + 4 * momentum**2)) / 2
+            momentum_point = updated + (momentum - 1) / next_momentum * (updated - current)
+            current, momentum = updated, next_momentum
+            if change < tol:
+                break
+        x[indices] = current
+
+        # Multiplicador de la restricción de suma estimado con las variables libres
+        full_gradient = gradient(x)
+        at_lower = x <= lower + tol
+        at_upper = x >= upper - tol
+        free = active & ~at_lower & ~at_upper
+        if free.any():
+            tau = np.median(full_gradient[free])
+        elif (active & at_lower).any():
+            tau = full_gradient[active & at_lower].max()
+        else:
+            tau = full_gradient[active].min()
+
+        slack = tol * (1.0 + abs(tau))
+        violation = np.where(
+            at_lower, full_gradient - tau, np.where(at_upper, tau - full_gradient, 0.0)
+        )
+        violation[active] = 0.0
+        violators = np.flatnonzero(violation > slack)
+        if violators.size == 0:
+            return x, iterations, change < tol
+        worst = violators[np.argsort(-violation[violators], kind="stable")]
+        active[worst[:working_set_size]] = True
+
+    return x, iterations, False
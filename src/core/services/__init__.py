@@ -2,11 +2,26 @@
 Servicios de PizzaAI
 """
 
+from .catalog_warmup import CatalogWarmup
+from .fdc_mirror import FDCMirror
+from .similarity_index import NutrientSimilarityIndex
 from .simple_recommender import SimpleRecommender
+from .usda_async_client import AsyncUSDAClient
 from .usda_service import USDAService
 from ..config import get_settings
 
 settings = get_settings()
-usda_service = USDAService(api_key=settings.USDA_API_KEY)
+if settings.FDC_MIRROR_PATH:
+    usda_service = USDAService.from_mirror(settings.FDC_MIRROR_PATH)
+else:
+    usda_service = USDAService(api_key=settings.USDA_API_KEY)
 
-__all__ = ["usda_service", "USDAService", "SimpleRecommender"]
+__all__ = [
+    "usda_service",
+    "USDAService",
+    "AsyncUSDAClient",
+    "CatalogWarmup",
+    "FDCMirror",
+    "SimpleRecommender",
+    "NutrientSimilarityIndex",
+]
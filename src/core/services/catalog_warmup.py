@@ -0,0 +1,248 @@
+"""
+Precarga de la caché con el catálogo de ingredientes.
+
+Un worker recién arrancado (o un Redis vacío tras una conmutación) hace que las primeras
+peticiones vayan a la API de USDA. La precarga resuelve cada ingrediente del catálogo a
+su fdcId, obtiene sus registros compactos en bloque y en paralelo a través de
+USDAService (con lo que se rellenan todos los niveles de su caché) y los añade al
+índice de similitud local.
+
+Es idempotente (solo escribe en caché e índice valores que ya se sobrescriben en cada
+acceso) y reanudable: con `state_path` se guarda el progreso tras cada bloque, junto con
+el índice si se indica `index_path`, y si la ejecución se interrumpe la siguiente solo
+procesa lo pendiente. Al terminar se borra el
+estado, de modo que una nueva ejecución (p. ej. tras vaciarse Redis) vuelve a precargar
+todo el catálogo.
+"""
+
+import ast
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.core.services.food_record import record_vector
+from src.core.services.similarity_index import NutrientSimilarityIndex
+from src.core.services.usda_client import MAX_IDS_PER_REQUEST
+from src.core.services.usda_service import USDAService
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+BUILD_DATABASE_SCRIPT = os.path.join(PROJECT_ROOT, "scripts", "build_database.py")
+INGREDIENTS_JSON = os.path.join(PROJECT_ROOT, "src", "core", "data", "ingredients.json")
+
+
+def catalog_from_script(path: str = BUILD_DATABASE_SCRIPT) -> List[str]:
+    """
+    Lista INGREDIENTS de scripts/build_database.py. Se lee con ast: importar el script
+    lanzaría su descarga desde USDA.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "INGREDIENTS" for target in node.targets
+        ):
+            return list(ast.literal_eval(node.value))
+    return []
+
+
+def catalog_from_json(path: str = INGREDIENTS_JSON) -> List[str]:
+    """Claves (en inglés) de los ingredientes de src/core/data/ingredients.json."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return [name for category in data.values() for name in category]
+
+
+def catalog_from_database(session) -> Dict[str, Optional[str]]:
+    """Ingredientes de la tabla `ingredients` con su usda_id, si lo tienen."""
+    from src.core.models.ingredient import Ingredient
+
+    return {
+        ingredient.name: ingredient.usda_id
+        for ingredient in session.query(Ingredient.name, Ingredient.usda_id)
+    }
+
+
+def load_catalog(
+    script_path: Optional[str] = BUILD_DATABASE_SCRIPT,
+    json_path: Optional[str] = INGREDIENTS_JSON,
+    session=None,
+) -> Dict[str, Optional[str]]:
+    """
+    Catálogo {nombre: fdcId o None} combinando las tres fuentes; los nombres se
+    deduplican sin distinguir mayúsculas y prevalece el fdcId conocido.
+    """
+    sources: List[Dict[str, Optional[str]]] = []
+    if script_path:
+        sources.append(dict.fromkeys(catalog_from_script(script_path)))
+    if json_path:
+        sources.append(dict.fromkeys(catalog_from_json(json_path)))
+    if session is not None:
+        sources.append(catalog_from_database(session))
+
+    catalog: Dict[str, Optional[str]] = {}
+    for source in sources:
+        for name, fdc_id in source.items():
+            name = name.strip().lower()
+            if name and catalog.get(name) is None:
+                catalog[name] = str(fdc_id) if fdc_id else None
+    return catalog
+
+
+class CatalogWarmup:
+    """
+    Precarga concurrente de la caché de USDAService y del índice de similitud.
+
+    Args:
+        service: Servicio cuya caché se rellena (p. ej. con un TieredCache)
+        similarity_index: Índice local al que se añaden los vectores (opcional)
+        state_path: Archivo JSON de progreso para reanudar una ejecución interrumpida
+        index_path: Archivo .npz donde se guarda el índice junto con cada progreso
+        concurrency: Hilos para las búsquedas y los bloques de detalles
+        batch_size: Ingredientes por bloque; el progreso se guarda tras cada uno
+    """
+
+    def __init__(
+        self,
+        service: USDAService,
+        similarity_index: Optional[NutrientSimilarityIndex] = None,
+        state_path: Optional[str] = None,
+        index_path: Optional[str] = None,
+        concurrency: int = 8,
+        batch_size: int = 100,
+    ):
+        self.service = service
+        self.similarity_index = similarity_index
+        self.state_path = state_path
+        self.index_path = index_path
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict:
+        if self.state_path and os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        return {"resolved": {}, "done": []}
+
+    def _save_state(self) -> None:
+        # El índice se guarda antes que el estado: un ingrediente marcado como hecho
+        # siempre está en el índice guardado
+        if self.index_path and self.similarity_index is not None:
+            self.similarity_index.save(self.index_path)
+        if not self.state_path:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _clear_state(self) -> None:
+        """Da la ejecución por terminada: la siguiente empieza desde cero."""
+        self.state = {"resolved": {}, "done": []}
+        if self.state_path and os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def _resolve(self, name: str) -> Optional[str]:
+        """fdcId del primer resultado de búsqueda del ingrediente."""
+        try:
+            foods = self.service.search_foods(name, page_size=1)
+        except Exception as e:
+            logger.error(f"Error al buscar '{name}': {str(e)}")
+            return None
+        return str(foods[0]["fdcId"]) if foods else None
+
+    def _fetch(self, fdc_ids: List[str]) -> Dict[str, Dict]:
+        try:
+            return self.service.get_food_records(fdc_ids)
+        except Exception as e:
+            logger.error(f"Error al obtener {len(fdc_ids)} alimentos: {str(e)}")
+            return {}
+
+    def _index(self, name: str, record: Dict) -> None:
+        if self.similarity_index is None:
+            return
+        vector = np.nan_to_num(record_vector(record).astype(float))
+        if vector.any():
+            self.similarity_index.add(record["fdcId"], vector, record.get("description") or name)
+
+    def _process_batch(self, pool: ThreadPoolExecutor, batch: Dict[str, Optional[str]]) -> int:
+        """Resuelve, obtiene e indexa un bloque; retorna los alimentos cargados."""
+        resolved = self.state["resolved"]
+        to_resolve = [name for name, fdc_id in batch.items() if fdc_id is None]
+        for name, fdc_id in zip(to_resolve, pool.map(self._resolve, to_resolve)):
+            batch[name] = fdc_id
+        resolved.update(batch)
+
+        fdc_ids = list(dict.fromkeys(fdc_id for fdc_id in batch.values() if fdc_id))
+        chunks = [
+            fdc_ids[start : start + MAX_IDS_PER_REQUEST]
+            for start in range(0, len(fdc_ids), MAX_IDS_PER_REQUEST)
+        ]
+        records: Dict[str, Dict] = {}
+        for chunk_records in pool.map(self._fetch, chunks):
+            records.update(chunk_records)
+
+        loaded = 0
+        for name, fdc_id in batch.items():
+            record = records.get(fdc_id) if fdc_id else None
+            if record:
+                self._index(name, record)
+                loaded += 1
+        # Los que no se pudieron resolver u obtener se reintentan en la próxima ejecución
+        done = [name for name, fdc_id in batch.items() if fdc_id and fdc_id in records]
+        self.state["done"].extend(done)
+        self._save_state()
+        return loaded
+
+    def run(self, catalog: Dict[str, Optional[str]]) -> Dict:
+        """
+        Precarga el catálogo {nombre: fdcId o None}.
+
+        Returns:
+            Informe con totales, cobertura, ingredientes sin datos, duración y
+            alimentos por segundo
+        """
+        start = time.time()
+        done = set(self.state["done"])
+        resolved = self.state["resolved"]
+        pending = {
+            name: fdc_id or resolved.get(name)
+            for name, fdc_id in catalog.items()
+            if name not in done
+        }
+        resumed = len(catalog) - len(pending)
+        if resumed:
+            logger.info(f"Precarga reanudada: {resumed} ingredientes ya procesados")
+        logger.info(f"Precarga: {len(pending)} ingredientes pendientes")
+
+        loaded = 0
+        names = list(pending)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for offset in range(0, len(names), self.batch_size):
+                batch = {name: pending[name] for name in names[offset : offset + self.batch_size]}
+                loaded += self._process_batch(pool, batch)
+                logger.info(
+                    f"Precarga: {offset + len(batch)}/{len(names)} procesados, {loaded} cargados"
+                )
+
+        elapsed = time.time() - start
+        done = set(self.state["done"])
+        missing = sorted(name for name in catalog if name not in done)
+        self._clear_state()
+        return {
+            "ingredients": len(catalog),
+            "loaded": loaded,
+            "resumed": resumed,
+            "missing": missing,
+            "coverage": (len(catalog) - len(missing)) / len(catalog) if catalog else 1.0,
+            "elapsed": elapsed,
+            "throughput": loaded / elapsed if elapsed > 0 else 0.0,
+            "indexed": len(self.similarity_index) if self.similarity_index is not None else 0,
+        }
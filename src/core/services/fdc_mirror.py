@@ -0,0 +1,337 @@
+"""
+Réplica local de FoodData Central en SQLite.
+
+Importa las descargas masivas de FDC (CSV: food.csv, nutrient.csv, food_nutrient.csv;
+o JSON: FoundationFoods, SRLegacyFoods, SurveyFoods...) en una base SQLite con un índice
+de texto completo (FTS5) sobre las descripciones y una tabla de nutrientes por fdcId.
+
+FDCMirror expone la misma interfaz que USDAClient (search_foods, get_food_details,
+get_foods_details), de modo que USDAService puede usarla como backend sin red.
+"""
+
+import csv
+import json
+import logging
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS foods (
+    fdc_id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    data_type TEXT,
+    publication_date TEXT
+);
+CREATE TABLE IF NOT EXISTS nutrients (
+    nutrient_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    unit_name TEXT,
+    number TEXT
+);
+CREATE TABLE IF NOT EXISTS food_nutrients (
+    fdc_id INTEGER NOT NULL,
+    nutrient_id INTEGER NOT NULL,
+    amount REAL,
+    PRIMARY KEY (fdc_id, nutrient_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_foods_data_type ON foods (data_type);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5(
+    description, content='foods', content_rowid='fdc_id'
+);
+"""
+
+# Tipos de datos FDC que se consultan por defecto (los mismos que pide USDAClient)
+DEFAULT_DATA_TYPES = ("Survey (FNDDS)", "Foundation", "SR Legacy")
+
+# Nombres de los tipos de datos de los CSV (food.csv) y de las claves raíz de los JSON
+_DATA_TYPE_NAMES = {
+    "survey_fndds_food": "Survey (FNDDS)",
+    "foundation_food": "Foundation",
+    "sr_legacy_food": "SR Legacy",
+    "branded_food": "Branded",
+    "SurveyFoods": "Survey (FNDDS)",
+    "FoundationFoods": "Foundation",
+    "SRLegacyFoods": "SR Legacy",
+    "BrandedFoods": "Branded",
+}
+
+_BATCH_SIZE = 10000
+
+
+def _batched(rows: Iterable, size: int = _BATCH_SIZE) -> Iterable[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FDCMirror:
+    """
+    Base SQLite con los alimentos de FDC y sus nutrientes.
+
+    Las consultas usan FTS5 si SQLite lo soporta y, si no, LIKE sobre la descripción.
+    La conexión se comparte entre hilos protegida por un lock.
+    """
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA mmap_size=268435456")
+        self._conn.executescript(SCHEMA)
+        try:
+            self._conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite sin FTS5: las búsquedas usarán LIKE")
+            self.has_fts = False
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "FDCMirror":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM foods").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Importación
+    # ------------------------------------------------------------------
+    def import_csv(self, directory: Union[str, Path], data_types: Optional[Sequence[str]] = None):
+        """
+        Importa una descarga CSV de FDC (directorio con food.csv, nutrient.csv y
+        food_nutrient.csv). `data_types` limita los alimentos importados.
+
+        Returns:
+            Número de alimentos importados
+        """
+        directory = Path(directory)
+        wanted = set(data_types) if data_types else None
+        fdc_ids = set()
+
+        def food_rows():
+            with open(directory / "food.csv", newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    data_type = _DATA_TYPE_NAMES.get(row["data_type"], row["data_type"])
+                    if wanted and data_type not in wanted:
+                        continue
+                    fdc_ids.add(int(row["fdc_id"]))
+                    yield (
+                        int(row["fdc_id"]),
+                        row["description"],
+                        data_type,
+                        row.get("publication_date"),
+                    )
+
+        def nutrient_rows():
+            with open(directory / "nutrient.csv", newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    yield (int(row["id"]), row["name"], row["unit_name"], row.get("nutrient_nbr"))
+
+        def food_nutrient_rows():
+            with open(directory / "food_nutrient.csv", newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    fdc_id = int(row["fdc_id"])
+                    if fdc_id in fdc_ids:
+                        yield (fdc_id, int(row["nutrient_id"]), _to_float(row["amount"]))
+
+        with self._lock, self._conn:
+            self._insert("nutrients", nutrient_rows())
+            self._insert("foods", food_rows())
+            self._insert("food_nutrients", food_nutrient_rows())
+        self._rebuild_index()
+        logger.info(f"Importados {len(fdc_ids)} alimentos desde {directory}")
+        return len(fdc_ids)
+
+    def import_json(self, path: Union[str, Path], data_types: Optional[Sequence[str]] = None):
+        """
+        Importa una descarga JSON de FDC ({"FoundationFoods": [...]}, etc.) o una lista de
+        alimentos en formato de detalle.
+
+        Returns:
+            Número de alimentos importados
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            foods = []
+            for key, items in data.items():
+                for food in items:
+                    food.setdefault("dataType", _DATA_TYPE_NAMES.get(key, key))
+                    foods.append(food)
+        else:
+            foods = data
+        if data_types:
+            foods = [food for food in foods if food.get("dataType") in set(data_types)]
+        count = self.add_foods(foods)
+        logger.info(f"Importados {count} alimentos desde {path}")
+        return count
+
+    def add_foods(self, foods: Iterable[Dict]) -> int:
+        """Añade alimentos en formato FDC (detalle o búsqueda). Retorna cuántos se añadieron."""
+        food_rows, nutrient_rows, amount_rows = [], {}, []
+        for food in foods:
+            fdc_id = int(food["fdcId"])
+            food_rows.append(
+                (
+                    fdc_id,
+                    food.get("description", ""),
+                    food.get("dataType"),
+                    food.get("publicationDate"),
+                )
+            )
+            for entry in food.get("foodNutrients", []):
+                nutrient = entry.get("nutrient") or {}
+                nutrient_id = nutrient.get("id", entry.get("nutrientId"))
+                name = nutrient.get("name", entry.get("nutrientName"))
+                if nutrient_id is None or name is None:
+                    continue
+                nutrient_rows[int(nutrient_id)] = (
+                    int(nutrient_id),
+                    name,
+                    nutrient.get("unitName", entry.get("unitName")),
+                    nutrient.get("number", entry.get("nutrientNumber")),
+                )
+                amount = _to_float(entry.get("amount", entry.get("value")))
+                amount_rows.append((fdc_id, int(nutrient_id), amount))
+
+        with self._lock, self._conn:
+            self._insert("nutrients", nutrient_rows.values())
+            self._insert("foods", food_rows)
+            self._insert("food_nutrients", amount_rows)
+        self._rebuild_index()
+        return len(food_rows)
+
+    def _insert(self, table: str, rows: Iterable[tuple]) -> None:
+        columns = {"foods": 4, "nutrients": 4, "food_nutrients": 3}[table]
+        placeholders = ", ".join("?" * columns)
+        for batch in _batched(rows):
+            self._conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", batch)
+
+    def _rebuild_index(self) -> None:
+        if not self.has_fts:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO foods_fts(foods_fts) VALUES ('rebuild')")
+
+    # ------------------------------------------------------------------
+    # Consultas (interfaz de USDAClient)
+    # ------------------------------------------------------------------
+    def search_foods(
+        self,
+        query: str,
+        page_size: int = 5,
+        data_types: Optional[Sequence[str]] = DEFAULT_DATA_TYPES,
+    ) -> Dict:
+        """Busca alimentos por descripción, con el formato de respuesta de /foods/search."""
+        empty = {"foods": [], "totalHits": 0, "currentPage": 1, "totalPages": 0}
+        tokens = re.findall(r"\w+", query.lower())
+        if not tokens:
+            return empty
+
+        type_filter, type_params = "", []
+        if data_types:
+            type_filter = f" AND f.data_type IN ({', '.join('?' * len(data_types))})"
+            type_params = list(data_types)
+
+        if self.has_fts:
+            match = " ".join(f'"{token}"*' for token in tokens)
+            sql = (
+                "SELECT f.* FROM foods_fts JOIN foods f ON f.fdc_id = foods_fts.rowid "
+                f"WHERE foods_fts MATCH ?{type_filter} "
+                "ORDER BY foods_fts.rank, length(f.description) LIMIT ?"
+            )
+            params = [match, *type_params, page_size]
+        else:
+            conditions = " AND ".join("lower(f.description) LIKE ?" for _ in tokens)
+            sql = (
+                f"SELECT f.* FROM foods f WHERE {conditions}{type_filter} "
+                "ORDER BY length(f.description) LIMIT ?"
+            )
+            params = [*(f"%{token}%" for token in tokens), *type_params, page_size]
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            foods = [self._food_dict(row) for row in rows]
+        if not foods:
+            return empty
+        return {"foods": foods, "totalHits": len(foods), "currentPage": 1, "totalPages": 1}
+
+    def get_food_details(self, fdc_id) -> Dict:
+        """Detalles de un alimento; {} si no está en la réplica."""
+        return self.get_foods_details([fdc_id]).get(str(fdc_id), {})
+
+    def get_foods_details(self, fdc_ids: Iterable) -> Dict[str, Dict]:
+        """Detalles de varios alimentos: {fdcId (str): detalles}; los ausentes se omiten."""
+        ids = [int(fdc_id) for fdc_id in dict.fromkeys(fdc_ids) if str(fdc_id).isdigit()]
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM foods WHERE fdc_id IN ({', '.join('?' * len(ids))})", ids
+            ).fetchall()
+            return {str(row["fdc_id"]): self._food_dict(row) for row in rows}
+
+    def _food_dict(self, row: sqlite3.Row) -> Dict:
+        """
+        Alimento en formato FDC. Cada nutriente lleva tanto las claves del formato de
+        detalle (nutrient{...}/amount) como las del de búsqueda (nutrientName/value), para
+        que sirva a cualquier consumidor de USDAClient.
+        """
+        nutrients = self._conn.execute(
+            "SELECT n.nutrient_id, n.name, n.unit_name, n.number, fn.amount "
+            "FROM food_nutrients fn JOIN nutrients n ON n.nutrient_id = fn.nutrient_id "
+            "WHERE fn.fdc_id = ? ORDER BY n.nutrient_id",
+            (row["fdc_id"],),
+        ).fetchall()
+        return {
+            "fdcId": row["fdc_id"],
+            "description": row["description"],
+            "dataType": row["data_type"],
+            "publicationDate": row["publication_date"],
+            "foodNutrients": [
+                {
+                    "nutrient": {
+                        "id": n["nutrient_id"],
+                        "number": n["number"],
+                        "name": n["name"],
+                        "unitName": n["unit_name"],
+                    },
+                    "amount": n["amount"],
+                    "nutrientId": n["nutrient_id"],
+                    "nutrientNumber": n["number"],
+                    "nutrientName": n["name"],
+                    "unitName": n["unit_name"],
+                    "value": n["amount"],
+                }
+                for n in nutrients
+            ],
+        }
@@ -0,0 +1,97 @@
+"""
+Registro compacto de un alimento para caché.
+
+Los documentos de FoodData Central ocupan decenas de KB, pero los consumidores solo
+usan su descripción y unos pocos nutrientes. Un registro guarda fdcId, descripción,
+tipo de datos y un vector float32 (en base64) con los nutrientes de NUTRIENT_ORDER en
+sus unidades canónicas (NUTRIENT_UNITS); los nutrientes ausentes se guardan como NaN.
+Ocupa unos cientos de bytes y se expande de nuevo a un documento con formato FDC.
+"""
+
+import base64
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from src.core.services.nutrients import (
+    FDC_NUTRIENTS,
+    NUTRIENT_ORDER,
+    build_nutrient_index,
+    fdc_nutrient_entries,
+)
+
+# Cambia cuando cambia NUTRIENT_ORDER o la codificación del vector
+RECORD_SCHEMA = 1
+
+
+def normalize_food(food: Optional[Dict]) -> Dict:
+    """Registro compacto de un documento FDC (búsqueda o detalle); {} si está vacío."""
+    if not food:
+        return {}
+    if is_food_record(food):
+        return food
+    index = build_nutrient_index(fdc_nutrient_entries(food.get("foodNutrients", [])))
+    vector = np.array([index.get(n, np.nan) for n in NUTRIENT_ORDER], dtype=np.float32)
+    record = {
+        "fdcId": food.get("fdcId"),
+        "description": food.get("description", ""),
+        "schema": RECORD_SCHEMA,
+        "nutrients": base64.b64encode(vector.tobytes()).decode("ascii"),
+    }
+    if food.get("dataType"):
+        record["dataType"] = food["dataType"]
+    return record
+
+
+def is_food_record(value: Any) -> bool:
+    return isinstance(value, dict) and "schema" in value and "nutrients" in value
+
+
+def is_current(value: Any) -> bool:
+    """False para registros de un esquema anterior, que deben recalcularse."""
+    return not is_food_record(value) or value["schema"] == RECORD_SCHEMA
+
+
+def record_vector(record: Dict) -> np.ndarray:
+    """Vector float32 en el orden de NUTRIENT_ORDER (NaN para los ausentes)."""
+    return np.frombuffer(base64.b64decode(record["nutrients"]), dtype=np.float32)
+
+
+def record_nutrients(record: Dict) -> Dict[str, float]:
+    """Índice {id canónico: cantidad} con los nutrientes presentes."""
+    return {
+        nutrient: float(amount)
+        for nutrient, amount in zip(NUTRIENT_ORDER, record_vector(record))
+        if not np.isnan(amount)
+    }
+
+
+def expand_food(value: Dict) -> Dict:
+    """
+    Documento con formato FDC a partir de un registro; cada nutriente lleva las claves
+    de detalle (nutrient{...}/amount) y de búsqueda (nutrientName/value), como los de
+    FDCMirror. Los documentos que no son registros se devuelven tal cual.
+    """
+    if not is_food_record(value):
+        return value
+    food_nutrients = []
+    for nutrient, amount in record_nutrients(value).items():
+        nutrient_id, number, name, unit = FDC_NUTRIENTS[nutrient]
+        # float32 conserva ~7 cifras significativas
+        amount = float(f"{amount:.7g}")
+        food_nutrients.append(
+            {
+                "nutrient": {"id": nutrient_id, "number": number, "name": name, "unitName": unit},
+                "amount": amount,
+                "nutrientId": nutrient_id,
+                "nutrientNumber": number,
+                "nutrientName": name,
+                "unitName": unit,
+                "value": amount,
+            }
+        )
+    food = {"fdcId": value["fdcId"], "description": value["description"]}
+    if "dataType" in value:
+        food["dataType"] = value["dataType"]
+    food["foodNutrients"] = food_nutrients
+    return food
@@ -0,0 +1,182 @@
+"""
+Identificadores canónicos de nutrientes.
+
+Los nombres de nutrientes llegan con muchas variantes ("Protein", "protein",
+"Total lipid (fat)", número de nutriente de FDC...). Este módulo los traduce a un
+identificador canónico y define un orden fijo para representarlos como vector denso.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Orden fijo de los nutrientes en los vectores densos, con su unidad canónica
+NUTRIENT_UNITS: Dict[str, str] = {
+    "energy": "kcal",
+    "protein": "g",
+    "fat": "g",
+    "carbohydrate": "g",
+    "fiber": "g",
+    "sugars": "g",
+    "saturated_fat": "g",
+    "cholesterol": "mg",
+    "sodium": "mg",
+    "potassium": "mg",
+    "calcium": "mg",
+    "iron": "mg",
+    "magnesium": "mg",
+    "phosphorus": "mg",
+    "zinc": "mg",
+    "vitamin_a": "µg",
+    "vitamin_c": "mg",
+    "vitamin_d": "µg",
+    "vitamin_b12": "µg",
+    "water": "g",
+}
+NUTRIENT_ORDER: List[str] = list(NUTRIENT_UNITS)
+NUTRIENT_POSITION: Dict[str, int] = {nutrient: i for i, nutrient in enumerate(NUTRIENT_ORDER)}
+
+# Nutriente de FoodData Central que representa cada id canónico: (nutrientId,
+# nutrientNumber, nombre, unidad FDC)
+FDC_NUTRIENTS: Dict[str, tuple] = {
+    "energy": (1008, "208", "Energy", "KCAL"),
+    "protein": (1003, "203", "Protein", "G"),
+    "fat": (1004, "204", "Total lipid (fat)", "G"),
+    "carbohydrate": (1005, "205", "Carbohydrate, by difference", "G"),
+    "fiber": (1079, "291", "Fiber, total dietary", "G"),
+    "sugars": (2000, "269", "Sugars, total including NLEA", "G"),
+    "saturated_fat": (1258, "606", "Fatty acids, total saturated", "G"),
+    "cholesterol": (1253, "601", "Cholesterol", "MG"),
+    "sodium": (1093, "307", "Sodium, Na", "MG"),
+    "potassium": (1092, "306", "Potassium, K", "MG"),
+    "calcium": (1087, "301", "Calcium, Ca", "MG"),
+    "iron": (1089, "303", "Iron, Fe", "MG"),
+    "magnesium": (1090, "304", "Magnesium, Mg", "MG"),
+    "phosphorus": (1091, "305", "Phosphorus, P", "MG"),
+    "zinc": (1095, "309", "Zinc, Zn", "MG"),
+    "vitamin_a": (1106, "320", "Vitamin A, RAE", "UG"),
+    "vitamin_c": (1162, "401", "Vitamin C, total ascorbic acid", "MG"),
+    "vitamin_d": (1114, "328", "Vitamin D (D2 + D3)", "UG"),
+    "vitamin_b12": (1178, "418", "Vitamin B-12", "UG"),
+    "water": (1051, "255", "Water", "G"),
+}
+
+# Kilojulios por kilocaloría
+KJ_PER_KCAL = 4.184
+
+# Nombres alternativos (ya normalizados) -> identificador canónico. Incluye los nombres
+# de FoodData Central, sus números de nutriente (nutrientNumber) y sus ids (nutrientId)
+_ALIASES = {
+    "energy": ["calories", "calorie", "kcal", "energy (atwater general factors)", "208", "1008"],
+    "protein": ["proteins", "proteina", "proteína", "203", "1003"],
+    "fat": ["total lipid (fat)", "total fat", "lipids", "grasa", "grasas", "204", "1004"],
+    "carbohydrate": [
+        "carbohydrates",
+        "carbs",
+        "carbohydrate, by difference",
+        "carbohidratos",
+        "205",
+        "1005",
+    ],
+    "fiber": ["fiber, total dietary", "dietary fiber", "fibre", "fibra", "291", "1079"],
+    "sugars": [
+        "sugar",
+        "total sugars",
+        "sugars, total",
+        "sugars, total including nlea",
+        "azúcar",
+        "269",
+        "2000",
+    ],
+    "saturated_fat": ["fatty acids, total saturated", "saturated fat", "606", "1258"],
+    "cholesterol": ["colesterol", "601", "1253"],
+    "sodium": ["sodium, na", "sodio", "307", "1093"],
+    "potassium": ["potassium, k", "potasio", "306", "1092"],
+    "calcium": ["calcium, ca", "calcio", "301", "1087"],
+    "iron": ["iron, fe", "hierro", "303", "1089"],
+    "magnesium": ["magnesium, mg", "magnesio", "304", "1090"],
+    "phosphorus": ["phosphorus, p", "fósforo", "305", "1091"],
+    "zinc": ["zinc, zn", "309", "1095"],
+    "vitamin_a": ["vitamin a, rae", "vitamin a", "320", "1106"],
+    "vitamin_c": ["vitamin c, total ascorbic acid", "vitamin c", "401", "1162"],
+    "vitamin_d": ["vitamin d (d2 + d3)", "vitamin d", "328", "1114"],
+    "vitamin_b12": ["vitamin b-12", "vitamin b12", "418", "1178"],
+    "water": ["agua", "255", "1051"],
+}
+NUTRIENT_ALIASES: Dict[str, str] = {
+    alias: nutrient for nutrient, aliases in _ALIASES.items() for alias in aliases
+}
+NUTRIENT_ALIASES.update({nutrient: nutrient for nutrient in NUTRIENT_ORDER})
+NUTRIENT_ALIASES.update({nutrient.replace("_", " "): nutrient for nutrient in NUTRIENT_ORDER})
+
+
+def normalize_nutrient_name(name) -> str:
+    """Minúsculas, sin espacios sobrantes."""
+    return re.sub(r"\s+", " ", str(name).strip().lower())
+
+
+def canonical_nutrient(name) -> str:
+    """Identificador canónico del nutriente, o su nombre normalizado si no es conocido."""
+    normalized = normalize_nutrient_name(name)
+    return NUTRIENT_ALIASES.get(normalized, normalized)
+
+
+def _is_kilojoules(unit: Optional[str]) -> bool:
+    return normalize_nutrient_name(unit or "") == "kj"
+
+
+def build_nutrient_index(entries: Iterable[tuple]) -> Dict[str, float]:
+    """
+    Índice {id canónico: cantidad} a partir de tuplas (nombre, cantidad, unidad).
+
+    Si un nutriente aparece varias veces se conserva la primera aparición, salvo la
+    energía: se prefiere el valor en kcal y el valor en kJ solo se usa (convertido) si no
+    hay otro.
+    """
+    index: Dict[str, float] = {}
+    energy_from_kj = False
+    for name, amount, unit in entries:
+        if amount is None:
+            continue
+        nutrient = canonical_nutrient(name)
+        amount = float(amount)
+        if nutrient == "energy":
+            if _is_kilojoules(unit):
+                if "energy" not in index:
+                    index["energy"] = amount / KJ_PER_KCAL
+                    energy_from_kj = True
+                continue
+            if energy_from_kj:
+                index["energy"] = amount
+                energy_from_kj = False
+                continue
+        index.setdefault(nutrient, amount)
+    return index
+
+
+def fdc_nutrient_entries(food_nutrients: Iterable[Dict]) -> List[tuple]:
+    """
+    Tuplas (nombre, cantidad, unidad) de la lista foodNutrients de FDC, tanto en formato
+    de búsqueda (nutrientName/value/unitName) como de detalle (nutrient{...}/amount).
+    """
+    entries = []
+    for entry in food_nutrients:
+        nutrient = entry.get("nutrient") or {}
+        name = entry.get("nutrientName") or nutrient.get("name")
+        amount = entry.get("value", entry.get("amount"))
+        if name is None or amount is None:
+            continue
+        unit = entry.get("unitName") or nutrient.get("unitName") or ""
+        entries.append((name, amount, unit))
+    return entries
+
+
+def nutrient_vector(index: Dict[str, float]) -> np.ndarray:
+    """Vector denso (len(NUTRIENT_ORDER),) con las cantidades del índice; 0 si falta."""
+    vector = np.zeros(len(NUTRIENT_ORDER))
+    for nutrient, amount in index.items():
+        position = NUTRIENT_POSITION.get(nutrient)
+        if position is not None:
+            vector[position] = amount
+    return vector
@@ -1,18 +1,66 @@
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+import numpy as np
+
+from src.core.cache.memory_cache import MemoryCache
+from src.core.services.nutrients import (
+    NUTRIENT_ORDER,
+    NUTRIENT_POSITION,
+    build_nutrient_index,
+    fdc_nutrient_entries,
+)
+from src.core.services.similarity_index import NutrientSimilarityIndex
 from src.core.services.usda_service import USDAService
 
 logger = logging.getLogger(__name__)
 
+# Nutrientes comparados entre ingredientes: id canónico -> etiqueta
+COMPARISON_NUTRIENTS = {
+    "protein": "Proteína",
+    "fat": "Grasa total",
+    "carbohydrate": "Carbohidratos",
+    "energy": "Calorías",
+    "fiber": "Fibra",
+    "sodium": "Sodio",
+}
+
+# Nutrientes clave para el puntaje de similitud (ids canónicos). La vitamina B6 no está
+# en NUTRIENT_ORDER y los registros en caché no la conservan, así que no se cuenta
+KEY_NUTRIENTS = {
+    "protein",
+    "fat",
+    "carbohydrate",
+    "fiber",
+    "calcium",
+    "iron",
+    "magnesium",
+    "phosphorus",
+    "potassium",
+    "sodium",
+    "zinc",
+    "vitamin_c",
+    "vitamin_b12",
+}
+
 
 class RecommendationService:
     """Servicio para generar recomendaciones de ingredientes."""
 
-    def __init__(self, usda_service: USDAService):
+    def __init__(
+        self,
+        usda_service: USDAService,
+        similarity_index: Optional[NutrientSimilarityIndex] = None,
+        comparison_cache: Optional[MemoryCache] = None,
+    ):
         """Inicializa el servicio con las dependencias necesarias."""
         self.usda_service = usda_service
-        self._cache = {}  # Cache simple en memoria para pruebas
+        # Perfiles por ingrediente (no resultados por par) para las comparaciones
+        if comparison_cache is None:
+            comparison_cache = MemoryCache(max_size=1024, ttl=86400)
+        self.comparison_cache = comparison_cache
+        # Índice local con cada ingrediente cuyos detalles se han obtenido
+        self.similarity_index = similarity_index
 
     def get_recommendations(self, base_ingredient: str, limit: int = 5) -> List[Dict]:
         """
@@ -38,12 +86,20 @@ class RecommendationService:
             food for food in similar_foods if str(food["fdcId"]) != str(base_data.get("fdcId"))
         ][:limit]
 
-        # Enriquecer con detalles nutricionales
-        return [self._enrich_recommendation(food) for food in recommendations]
+        # Enriquecer con detalles nutricionales, obtenidos en una sola operación
+        details = self.usda_service.get_foods_details(
+            [str(food["fdcId"]) for food in recommendations]
+        )
+        return [
+            self._enrich_recommendation(food, details.get(str(food["fdcId"]), {}))
+            for food in recommendations
+        ]
 
-    def _enrich_recommendation(self, food: Dict) -> Dict:
+    def _enrich_recommendation(self, food: Dict, details: Optional[Dict] = None) -> Dict:
         """Enriquece una recomendación con datos nutricionales."""
-        details = self.usda_service.get_food_details(str(food["fdcId"]))
+        if details is None:
+            details = self.usda_service.get_food_details(str(food["fdcId"]))
+        self._index_food(details)
 
         return {
             "id": food["fdcId"],
@@ -52,36 +108,71 @@ class RecommendationService:
             "nutrients": self._extract_key_nutrients(details),
         }
 
-    def _calculate_similarity_score(self, food_details: Dict) -> float:
-        """Calcula un puntaje de similitud basado en nutrientes."""
-        nutrients = food_details.get("foodNutrients", [])
-        if not nutrients:
-            return 0.0
+    def _index_food(self, food_details: Optional[Dict]) -> None:
+        """Registra un alimento en el índice de similitud, si hay uno."""
+        if self.similarity_index is not None and isinstance(food_details, dict):
+            self.similarity_index.add_food(food_details)
 
-        # Puntaje basado en presencia de nutrientes clave
-        score = 0.0
-        total_nutrients = len(nutrients)
+    def get_similar_ingredients(
+        self, base_ingredient: str, limit: int = 5, exact: bool = True
+    ) -> List[Dict]:
+        """
+        Ingredientes con perfil nutricional más parecido según el índice local.
 
-        for nutrient in nutrients:
-            if nutrient.get("nutrientName", "").lower() in {
-                "protein",
-                "total lipid (fat)",
-                "carbohydrate",
-                "fiber",
-                "calcium",
-                "iron",
-                "magnesium",
-                "phosphorus",
-                "potassium",
-                "sodium",
-                "zinc",
-                "vitamin c",
-                "vitamin b6",
-                "vitamin b12",
-            }:
-                score += 1
+        Si el ingrediente base ya está en el índice la consulta no hace llamadas de red;
+        si no, se obtiene una vez de USDA y se añade. Solo se consideran ingredientes ya
+        indexados.
+
+        Args:
+            base_ingredient: Nombre del ingrediente base
+            limit: Número máximo de ingredientes
+            exact: False para una consulta aproximada (IVF)
+
+        Returns:
+            Lista de ingredientes con id, nombre, similitud y nutrientes por 100 g
+        """
+        if self.similarity_index is None:
+            return []
+        index = self.similarity_index
 
-        return score / max(total_nutrients, 1) * 10
+        key = index.find(base_ingredient)
+        if key is None:
+            base_data = self.usda_service.get_food_nutrition(base_ingredient)
+            if not base_data or not index.add_food(base_data):
+                return []
+            key = str(base_data["fdcId"])
+
+        similar = []
+        for fdc_id, name, distance in index.similar_to(key, limit, exact=exact):
+            vector = index.get_vector(fdc_id)
+            similar.append(
+                {
+                    "id": fdc_id,
+                    "name": name,
+                    "score": 1.0 / (1.0 + distance),
+                    "nutrients": {
+                        nutrient: float(value)
+                        for nutrient, value in zip(NUTRIENT_ORDER, vector)
+                        if value
+                    },
+                }
+            )
+        return similar
+
+    def _calculate_similarity_score(self, food_details: Dict) -> float:
+        """
+        Calcula un puntaje de similitud basado en nutrientes: fracción de nutrientes clave
+        entre los nutrientes canónicos (NUTRIENT_ORDER) del alimento, de modo que el
+        puntaje no depende de si el documento viene completo de USDA o de un registro
+        compacto en caché.
+        """
+        index = build_nutrient_index(fdc_nutrient_entries(food_details.get("foodNutrients", [])))
+        present = [nutrient for nutrient in index if nutrient in NUTRIENT_POSITION]
+        if not present:
+            return 0.0
+
+        score = sum(1 for nutrient in present if nutrient in KEY_NUTRIENTS)
+        return score / len(present) * 10
 
     def _extract_key_nutrients(self, food_details: Dict) -> Dict[str, float]:
         """Extrae los nutrientes clave de los detalles del alimento."""
@@ -106,62 +197,102 @@ class RecommendationService:
     def get_nutritional_comparison(self, ingredient1: str, ingredient2: str) -> Dict:
         """Compara el perfil nutricional de dos ingredientes."""
         try:
-            # Verificar cache
-            cache_key = f"comp:{ingredient1}:{ingredient2}"
-            if cache_key in self._cache:
-                logger.info(f"Usando comparación en caché para: {ingredient1} y {ingredient2}")
-                return self._cache[cache_key]
-
-            # Obtener detalles de ambos ingredientes
-            search1 = self.usda_service.search_foods(ingredient1, page_size=1)
-            search2 = self.usda_service.search_foods(ingredient2, page_size=1)
-
-            if not search1.get("foods") or not search2.get("foods"):
+            vector1 = self._ingredient_vector(ingredient1)
+            vector2 = self._ingredient_vector(ingredient2)
+            if vector1 is None or vector2 is None:
                 return {}
 
-            details1 = self.usda_service.get_food_details(search1["foods"][0]["fdcId"])
-            details2 = self.usda_service.get_food_details(search2["foods"][0]["fdcId"])
-
-            # Comparar nutrientes clave
-            key_nutrients = {
-                "Protein": "Proteína",
-                "Total lipid (fat)": "Grasa total",
-                "Carbohydrate, by difference": "Carbohidratos",
-                "Energy": "Calorías",
-                "Fiber, total dietary": "Fibra",
-                "Sodium, Na": "Sodio",
-            }
-
-            comparison = {}
-            for nutrient_id, nutrient_name in key_nutrients.items():
-                value1 = next(
-                    (
-                        n.get("amount", 0)
-                        for n in details1.get("foodNutrients", [])
-                        if n.get("nutrient", {}).get("name") == nutrient_id
-                    ),
-                    0,
-                )
-                value2 = next(
-                    (
-                        n.get("amount", 0)
-                        for n in details2.get("foodNutrients", [])
-                        if n.get("nutrient", {}).get("name") == nutrient_id
-                    ),
-                    0,
-                )
-
-                comparison[nutrient_name] = {
-                    "ingredient1": value1,
-                    "ingredient2": value2,
-                    "difference": value2 - value1,
+            differences = vector2 - vector1
+            return {
+                label: {
+                    "ingredient1": float(vector1[i]),
+                    "ingredient2": float(vector2[i]),
+                    "difference": float(differences[i]),
                 }
+                for i, label in enumerate(COMPARISON_NUTRIENTS.values())
+            }
 
-            # Almacenar en caché
-            self._cache[cache_key] = comparison
+        except Exception as e:
+            logger.error(f"Error al comparar ingredientes: {str(e)}")
+            return {}
 
-            return comparison
+    def get_comparison_matrix(self, ingredients: List[str]) -> Dict:
+        """
+        Compara todos los pares de una lista de ingredientes.
 
+        Returns:
+            Diccionario con los ingredientes encontrados y, por nutriente, sus valores y la
+            matriz de diferencias donde differences[i][j] = valor[j] - valor[i]
+        """
+        try:
+            vectors = self._ingredient_vectors(ingredients)
         except Exception as e:
             logger.error(f"Error al comparar ingredientes: {str(e)}")
             return {}
+
+        found = [ingredient for ingredient in ingredients if vectors.get(ingredient) is not None]
+        if not found:
+            return {}
+        matrix = np.array([vectors[ingredient] for ingredient in found])
+        differences = matrix[None, :, :] - matrix[:, None, :]
+        return {
+            "ingredients": found,
+            "nutrients": {
+                label: {
+                    "values": matrix[:, i].tolist(),
+                    "differences": differences[:, :, i].tolist(),
+                }
+                for i, label in enumerate(COMPARISON_NUTRIENTS.values())
+            },
+        }
+
+    @staticmethod
+    def _comparison_key(ingredient: str) -> str:
+        return f"vector:{ingredient.strip().lower()}"
+
+    @staticmethod
+    def _comparison_vector(food_details: Dict) -> np.ndarray:
+        """Vector de los nutrientes de COMPARISON_NUTRIENTS (0 si faltan)."""
+        index = build_nutrient_index(fdc_nutrient_entries(food_details.get("foodNutrients", [])))
+        return np.array([index.get(nutrient, 0.0) for nutrient in COMPARISON_NUTRIENTS])
+
+    def _search_first_id(self, ingredient: str):
+        """fdcId del primer resultado de búsqueda, o None."""
+        result = self.usda_service.search_foods(ingredient, page_size=1)
+        foods = result.get("foods", []) if isinstance(result, dict) else result
+        return foods[0]["fdcId"] if foods else None
+
+    def _ingredient_vector(self, ingredient: str) -> Optional[np.ndarray]:
+        """Vector de comparación de un ingrediente, desde la caché o desde USDA."""
+        cache_key = self._comparison_key(ingredient)
+        vector = self.comparison_cache.get(cache_key)
+        if vector is not None:
+            logger.info(f"Usando perfil en caché para: {ingredient}")
+            return vector
+
+        fdc_id = self._search_first_id(ingredient)
+        if fdc_id is None:
+            return None
+        vector = self._comparison_vector(self.usda_service.get_food_details(fdc_id))
+        self.comparison_cache.set(cache_key, vector)
+        return vector
+
+    def _ingredient_vectors(self, ingredients: List[str]) -> Dict[str, Optional[np.ndarray]]:
+        """Vectores de varios ingredientes; los que faltan en caché se piden en bloque."""
+        vectors = {}
+        missing = {}
+        for ingredient in dict.fromkeys(ingredients):
+            vectors[ingredient] = self.comparison_cache.get(self._comparison_key(ingredient))
+            if vectors[ingredient] is None:
+                fdc_id = self._search_first_id(ingredient)
+                if fdc_id is not None:
+                    missing[ingredient] = str(fdc_id)
+
+        if missing:
+            details = self.usda_service.get_foods_details(list(missing.values()))
+            for ingredient, fdc_id in missing.items():
+                if fdc_id in details:
+                    vector = self._comparison_vector(details[fdc_id])
+                    self.comparison_cache.set(self._comparison_key(ingredient), vector)
+                    vectors[ingredient] = vector
+        return vectors
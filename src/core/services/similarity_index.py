@@ -0,0 +1,325 @@
+"""
+Índice local de similitud entre ingredientes según su perfil nutricional.
+
+Cada ingrediente se representa con su vector de nutrientes por 100 g (orden de
+NUTRIENT_ORDER, como los devuelve FoodData Central). Para que los nutrientes en mg o µg
+no dominen a los que están en g, cada dimensión se escala por su desviación estándar en
+el índice antes de medir distancias.
+
+Las consultas k-NN pueden ser exactas (fuerza bruta vectorizada) o aproximadas con un
+índice IVF: los vectores se agrupan con k-means y solo se revisan las `n_probe` listas
+más cercanas a la consulta. Los ingredientes añadidos después de construir el índice se
+asignan al centroide más cercano; la escala y el k-means solo se recalculan cuando el
+índice ha cambiado en más de REBUILD_FRACTION.
+"""
+
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.services.nutrients import (
+    NUTRIENT_ORDER,
+    build_nutrient_index,
+    fdc_nutrient_entries,
+    nutrient_vector,
+)
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("cosine", "euclidean")
+
+# Por debajo de este tamaño las consultas aproximadas recorren todo el índice
+MIN_IVF_SIZE = 256
+
+# Fracción de ingredientes añadidos o modificados desde la última construcción a partir
+# de la cual se recalculan la escala y las listas IVF
+REBUILD_FRACTION = 0.2
+
+
+def _kmeans(
+    vectors: np.ndarray, n_clusters: int, n_iter: int = 15, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """k-means (Lloyd) con inicialización k-means++; retorna (centroides, asignaciones)."""
+    rng = np.random.default_rng(seed)
+    centroids = [vectors[rng.integers(len(vectors))]]
+    distances = np.sum((vectors - centroids[0]) ** 2, axis=1)
+    for _ in range(1, n_clusters):
+        total = distances.sum()
+        idx = (
+            rng.choice(len(vectors), p=distances / total)
+            if total > 0
+            else rng.integers(len(vectors))
+        )
+        centroids.append(vectors[idx])
+        distances = np.minimum(distances, np.sum((vectors - vectors[idx]) ** 2, axis=1))
+    centroids = np.array(centroids)
+
+    assignment = np.zeros(len(vectors), dtype=int)
+    for _ in range(n_iter):
+        distances = (
+            np.sum(vectors**2, axis=1)[:, None]
+            - 2 * vectors @ centroids.T
+            + np.sum(centroids**2, axis=1)[None, :]
+        )
+        new_assignment = np.argmin(distances, axis=1)
+        for c in range(n_clusters):
+            members = new_assignment == c
+            if members.any():
+                centroids[c] = vectors[members].mean(axis=0)
+        if np.array_equal(new_assignment, assignment):
+            break
+        assignment = new_assignment
+    return centroids, assignment
+
+
+class NutrientSimilarityIndex:
+    """
+    Índice k-NN de ingredientes por perfil nutricional, persistible en disco (.npz).
+
+    Los ingredientes se identifican por una clave (fdcId) y guardan su descripción. Los
+    parámetros derivados (escala por dimensión, listas IVF) se construyen de forma
+    perezosa en la primera consulta y se actualizan de forma incremental al añadir
+    ingredientes; volver a añadir uno sin cambios no los invalida.
+    """
+
+    def __init__(self, metric: str = "cosine", n_lists: Optional[int] = None, n_probe: int = 4):
+        if metric not in METRICS:
+            raise ValueError(f"Métrica no soportada: {metric}. Opciones: {METRICS}")
+        self.metric = metric
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self._keys: List[str] = []
+        self._names: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._vectors = np.empty((0, len(NUTRIENT_ORDER)))
+        self._pending: List[np.ndarray] = []
+        self._reset_derived()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return str(key) in self._positions
+
+    def _reset_derived(self) -> None:
+        self._scale: Optional[np.ndarray] = None
+        self._normalized: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._assignment: Optional[np.ndarray] = None
+        self._built_size = 0
+        self._changes = 0
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Matriz (n, len(NUTRIENT_ORDER)) con los vectores por 100 g."""
+        if self._pending:
+            self._vectors = np.vstack([self._vectors, *self._pending])
+            self._pending = []
+        return self._vectors
+
+    def add(self, key, vector: Sequence[float], name: str = "") -> None:
+        """Añade (o reemplaza) un ingrediente con su vector de nutrientes por 100 g."""
+        vector = np.asarray(vector, dtype=float).ravel()
+        if vector.shape != (len(NUTRIENT_ORDER),):
+            raise ValueError(f"El vector debe tener {len(NUTRIENT_ORDER)} componentes")
+        key = str(key)
+        position = self._positions.get(key)
+        if position is None:
+            self._positions[key] = len(self._keys)
+            self._keys.append(key)
+            self._names.append(name)
+            self._pending.append(vector[None, :])
+            self._changes += 1
+            return
+
+        self._names[position] = name or self._names[position]
+        if np.array_equal(self.vectors[position], vector):
+            return
+        self.vectors[position] = vector
+        self._changes += 1
+        if self._normalized is not None and position < len(self._normalized):
+            self._normalized[position] = self._normalize(vector)
+            self._assign(np.array([position]))
+
+    def add_food(self, food_details: Dict) -> bool:
+        """
+        Añade un alimento en formato FDC (búsqueda o detalle). Retorna False si no tiene
+        fdcId o nutrientes.
+        """
+        key = food_details.get("fdcId")
+        index = build_nutrient_index(fdc_nutrient_entries(food_details.get("foodNutrients", [])))
+        if key is None or not index:
+            return False
+        self.add(key, nutrient_vector(index), food_details.get("description", ""))
+        return True
+
+    def get_vector(self, key) -> Optional[np.ndarray]:
+        position = self._positions.get(str(key))
+        return None if position is None else self.vectors[position].copy()
+
+    def get_name(self, key) -> Optional[str]:
+        position = self._positions.get(str(key))
+        return None if position is None else self._names[position]
+
+    def find(self, name: str) -> Optional[str]:
+        """Clave del ingrediente cuya descripción coincide con `name` (sin mayúsculas)."""
+        name = name.strip().lower()
+        matches = [key for key, desc in zip(self._keys, self._names) if desc.lower() == name]
+        if not matches:
+            matches = [key for key, desc in zip(self._keys, self._names) if name in desc.lower()]
+        return matches[0] if matches else None
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        scaled = vectors / self._scale
+        if self.metric == "cosine":
+            norms = np.linalg.norm(scaled, axis=-1, keepdims=True)
+            scaled = np.divide(scaled, norms, out=np.zeros_like(scaled), where=norms > 0)
+        return scaled
+
+    def _build(self) -> None:
+        vectors = self.vectors
+        std = vectors.std(axis=0) if len(vectors) > 1 else np.zeros(vectors.shape[1])
+        self._scale = np.where(std > 0, std, 1.0)
+        self._normalized = self._normalize(vectors)
+
+        n_lists = self.n_lists or int(np.sqrt(len(vectors)))
+        if len(vectors) >= MIN_IVF_SIZE and n_lists > 1:
+            self._centroids, self._assignment = _kmeans(self._normalized, n_lists)
+            self._lists = [np.flatnonzero(self._assignment == c) for c in range(n_lists)]
+        else:
+            self._centroids, self._assignment, self._lists = None, None, []
+        self._built_size = len(vectors)
+        self._changes = 0
+
+    def _assign(self, rows: np.ndarray) -> None:
+        """Mueve las filas a la lista IVF de su centroide más cercano (sin re-agrupar)."""
+        if self._centroids is None or rows.size == 0:
+            return
+        points = self._normalized[rows]
+        distances = (
+            np.sum(points**2, axis=1)[:, None]
+            - 2 * points @ self._centroids.T
+            + np.sum(self._centroids**2, axis=1)[None, :]
+        )
+        nearest = np.argmin(distances, axis=1)
+        previous = self._assignment[rows]
+        moved = previous != nearest
+        for c in np.unique(previous[moved & (previous >= 0)]):
+            leaving = rows[moved & (previous == c)]
+            self._lists[c] = self._lists[c][~np.isin(self._lists[c], leaving)]
+        for c in np.unique(nearest[moved]):
+            self._lists[c] = np.concatenate([self._lists[c], rows[moved & (nearest == c)]])
+        self._assignment[rows] = nearest
+
+    def _sync(self) -> None:
+        """Pone al día los parámetros derivados antes de una consulta."""
+        size = len(self._keys)
+        crosses_ivf = self._centroids is None and self._built_size < MIN_IVF_SIZE <= size
+        if (
+            self._normalized is None
+            or crosses_ivf
+            or self._changes > REBUILD_FRACTION * self._built_size
+        ):
+            self._build()
+            return
+        built = len(self._normalized)
+        if size > built:
+            rows = np.arange(built, size)
+            self._normalized = np.vstack([self._normalized, self._normalize(self.vectors[rows])])
+            if self._assignment is not None:
+                self._assignment = np.concatenate(
+                    [self._assignment, np.full(rows.size, -1, dtype=self._assignment.dtype)]
+                )
+                self._assign(rows)
+
+    def _distances(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        candidates = self._normalized[rows]
+        if self.metric == "cosine":
+            return 1.0 - candidates @ query
+        return np.linalg.norm(candidates - query, axis=1)
+
+    def query(
+        self,
+        vector: Sequence[float],
+        k: int = 5,
+        exact: bool = True,
+        n_probe: Optional[int] = None,
+        exclude: Sequence = (),
+    ) -> List[Tuple[str, str, float]]:
+        """
+        Los `k` ingredientes más cercanos al vector (por 100 g).
+
+        Returns:
+            Lista de (clave, descripción, distancia) de menor a mayor distancia. Con la
+            métrica coseno la distancia es 1 - similitud.
+        """
+        if not self._keys or k <= 0:
+            return []
+        self._sync()
+        query = self._normalize(np.asarray(vector, dtype=float).ravel())
+
+        if exact or self._centroids is None:
+            rows = np.arange(len(self._keys))
+        else:
+            order = np.argsort(np.linalg.norm(self._centroids - query, axis=1))
+            probe = order[: n_probe or self.n_probe]
+            rows = np.concatenate([self._lists[c] for c in probe])
+
+        excluded = {self._positions[str(key)] for key in exclude if str(key) in self._positions}
+        if excluded:
+            rows = rows[~np.isin(rows, list(excluded))]
+        if rows.size == 0:
+            return []
+
+        distances = self._distances(rows, query)
+        if rows.size > k:
+            best = np.argpartition(distances, k - 1)[:k]
+        else:
+            best = np.arange(rows.size)
+        best = best[np.lexsort((rows[best], distances[best]))]
+        return [(self._keys[rows[i]], self._names[rows[i]], float(distances[i])) for i in best]
+
+    def similar_to(self, key, k: int = 5, exact: bool = True) -> List[Tuple[str, str, float]]:
+        """Los `k` ingredientes más parecidos a uno del índice (excluyéndolo)."""
+        vector = self.get_vector(key)
+        if vector is None:
+            return []
+        return self.query(vector, k, exact=exact, exclude=[key])
+
+    def save(self, path: str) -> None:
+        """
+        Guarda el índice en un archivo .npz (los parámetros derivados se recalculan). Se
+        escribe en un temporal y se renombra, así que un lector nunca ve un archivo a medias.
+        """
+        path = str(path)
+        if not path.endswith(".npz"):
+            path = f"{path}.npz"
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                keys=np.array(self._keys, dtype=str),
+                names=np.array(self._names, dtype=str),
+                vectors=self.vectors,
+                nutrients=np.array(NUTRIENT_ORDER, dtype=str),
+                metric=np.array(self.metric),
+            )
+        os.replace(tmp_path, path)
+        logger.info(f"Índice de similitud guardado en {path} ({len(self)} ingredientes)")
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "NutrientSimilarityIndex":
+        """Carga un índice guardado con `save`."""
+        with np.load(path) as data:
+            if data["nutrients"].tolist() != NUTRIENT_ORDER:
+                raise ValueError(f"El índice {path} usa otro orden de nutrientes")
+            kwargs.setdefault("metric", str(data["metric"]))
+            index = cls(**kwargs)
+            keys, names = data["keys"].tolist(), data["names"].tolist()
+            index._keys, index._names = keys, names
+            index._positions = {key: i for i, key in enumerate(keys)}
+            index._vectors = data["vectors"].astype(float)
+        return index
@@ -2,7 +2,9 @@ import logging
 import time
 from typing import Dict, List, Optional
 
-import requests
+from src.core.cache.keys import food_key, search_key
+from src.core.cache.memory_cache import MemoryCache
+from src.core.services.usda_client import SEARCH_DATA_TYPES, create_session
 
 logger = logging.getLogger(__name__)
 
@@ -13,27 +15,27 @@ class SimpleRecommender:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://api.nal.usda.gov/fdc/v1"
-        self.session = requests.Session()
-        self.session.headers.update({"X-Api-Key": self.api_key, "Content-Type": "application/json"})
-        self._cache = {}  # Cache simple en memoria
+        # Pool de conexiones con timeout y reintentos
+        self.session = create_session(self.api_key)
+        self._cache = MemoryCache(max_size=1024)  # Cache en memoria acotada (LRU + TTL)
 
     def search_foods(self, query: str, page_size: int = 5) -> List[Dict]:
         """Busca alimentos en la base de datos de USDA."""
-        cache_key = f"search:{query}:{page_size}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        cache_key = search_key(query, page_size)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
             
         try:
             logger.info(f"Buscando alimentos para: {query}")
             
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/foods/search",
                 params={
                     "query": query,
                     "pageSize": page_size,
-                    "dataType": ["Survey (FNDDS)", "Foundation", "SR Legacy"],
+                    "dataType": SEARCH_DATA_TYPES,
                 },
-                headers={"X-Api-Key": self.api_key}
             )
             
             if response.status_code == 200:
@@ -49,17 +51,15 @@ class SimpleRecommender:
 
     def get_food_details(self, fdc_id: str) -> Optional[Dict]:
         """Obtiene detalles de un alimento específico."""
-        cache_key = f"food:{fdc_id}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        cache_key = food_key(fdc_id)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
             
         try:
             logger.info(f"Obteniendo detalles para alimento ID: {fdc_id}")
             
-            response = requests.get(
-                f"{self.base_url}/food/{fdc_id}",
-                headers={"X-Api-Key": self.api_key}
-            )
+            response = self.session.get(f"{self.base_url}/food/{fdc_id}")
             
             if response.status_code == 200:
                 data = response.json()
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+import httpx
+
+from src.core.cache.keys import food_key, search_key
+from src.core.cache.memory_cache import MemoryCache
+from src.core.config import get_settings
+from src.core.services.usda_client import MAX_IDS_PER_REQUEST, SEARCH_DATA_TYPES
+
+logger = logging.getLogger(__name__)
+
+# Códigos que justifican reintentar la petición
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Limitador de tasa por token bucket.
+
+    Se recarga a `rate` tokens por segundo hasta `capacity`. Las cabeceras de límite de
+    FoodData Central (X-RateLimit-Limit / X-RateLimit-Remaining, por hora) ajustan la
+    tasa y recortan los tokens disponibles a lo que el servidor aún permite.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Espera hasta disponer de un token y lo consume."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self._blocked_until > now:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def update_from_headers(self, headers: httpx.Headers) -> None:
+        """Ajusta el bucket con las cabeceras de límite de la respuesta."""
+        try:
+            limit = headers.get("X-RateLimit-Limit")
+            remaining = headers.get("X-RateLimit-Remaining")
+            if limit is not None:
+                self.rate = max(int(limit), 1) / 3600
+            if remaining is not None:
+                self._refill()
+                self._tokens = min(self._tokens, float(remaining))
+        except ValueError:
+            logger.debug(f"Cabeceras de límite no válidas: {dict(headers)}")
+
+    def block_for(self, seconds: float) -> None:
+        """Detiene la emisión de tokens durante `seconds` (p. ej. tras un 429)."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class AsyncUSDAClient:
+    """
+    Cliente asíncrono para la API de USDA.
+
+    Comparte un pool de conexiones httpx entre todas las peticiones, aplica timeouts por
+    petición, reintenta errores transitorios (429/5xx, errores de red) con backoff
+    exponencial y jitter, respeta el límite de tasa de FDC con un token bucket y
+    agrupa las consultas idénticas concurrentes en una sola petición en curso.
+
+    Los métodos devuelven los mismos valores que USDAClient, incluidos los valores
+    vacíos cuando la petición falla.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        rate_limit: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        burst: int = 10,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        cache: Optional[MemoryCache] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        settings = get_settings()
+        self.api_key = api_key or settings.USDA_API_KEY
+        self.base_url = base_url or getattr(settings, "USDA_API_BASE_URL", settings.USDA_API_URL)
+        self.max_retries = settings.USDA_API_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        rate_limit = rate_limit or settings.USDA_API_RATE_LIMIT
+        self.rate_limiter = TokenBucket(rate=rate_limit / 3600, capacity=burst)
+        self._cache = cache if cache is not None else MemoryCache(max_size=2048)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"X-Api-Key": self.api_key, "Content-Type": "application/json"},
+            timeout=httpx.Timeout(timeout or settings.USDA_API_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=max_connections or settings.USDA_API_MAX_CONNECTIONS
+            ),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "AsyncUSDAClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def search_foods(self, query: str, page_size: int = 5) -> Dict:
+        """Busca alimentos en la base de datos de USDA."""
+        params = {"query": query, "pageSize": page_size, "dataType": SEARCH_DATA_TYPES}
+        result = await self._cached(
+            search_key(query, page_size),
+            lambda: self._request("GET", "/foods/search", params=params),
+        )
+        if result is None:
+            return {"foods": [], "totalHits": 0, "currentPage": 1, "totalPages": 0}
+        return result
+
+    async def get_food_details(self, fdc_id) -> Dict:
+        """Obtiene detalles de un alimento específico."""
+        result = await self._cached(
+            food_key(fdc_id), lambda: self._request("GET", f"/food/{fdc_id}")
+        )
+        return result or {}
+
+    async def get_foods_details(self, fdc_ids: Iterable) -> Dict[str, Dict]:
+        """
+        Obtiene los detalles de varios alimentos con el endpoint multi-id (POST /foods);
+        los bloques de MAX_IDS_PER_REQUEST ids se piden concurrentemente.
+        """
+        results = {}
+        missing = []
+        for fdc_id in dict.fromkeys(str(fdc_id) for fdc_id in fdc_ids):
+            cached = self._cache.get(food_key(fdc_id))
+            if cached is not None:
+                results[fdc_id] = cached
+            else:
+                missing.append(fdc_id)
+
+        chunks = [
+            missing[start : start + MAX_IDS_PER_REQUEST]
+            for start in range(0, len(missing), MAX_IDS_PER_REQUEST)
+        ]
+        responses = await asyncio.gather(
+            *(
+                self._coalesced(
+                    f"foods:{','.join(chunk)}",
+                    lambda chunk=chunk: self._request(
+                        "POST",
+                        "/foods",
+                        json={"fdcIds": [int(i) if i.isdigit() else i for i in chunk]},
+                    ),
+                )
+                for chunk in chunks
+            )
+        )
+        for foods in responses:
+            for food in foods or []:
+                fdc_id = str(food.get("fdcId"))
+                self._cache.set(food_key(fdc_id), food)
+                results[fdc_id] = food
+        return results
+
+    async def _cached(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Valor en caché o, si falta, el resultado (agrupado) de `fetch`."""
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        result = await self._coalesced(key, fetch)
+        if result is not None:
+            self._cache.set(key, result)
+        return result
+
+    async def _coalesced(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Ejecuta `fetch` una sola vez por clave: las llamadas concurrentes con la misma
+        clave esperan el resultado de la petición en curso.
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fetch())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # shield: cancelar a un interesado no cancela la petición compartida
+        return await asyncio.shield(future)
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Backoff exponencial con jitter completo; Retry-After actúa como mínimo."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        if retry_after is not None:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    async def _request(self, method: str, path: str, **kwargs) -> Optional[Any]:
+        """Petición con límite de tasa y reintentos; None si falla definitivamente."""
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            try:
+                response = await self._client.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Error de conexión con USDA ({method} {path}): {str(e)}")
+                    return None
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"Error de conexión con USDA, reintento en {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+
+            self.rate_limiter.update_from_headers(response.headers)
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                delay = self._backoff_delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(
+                    f"USDA respondió {response.status_code} ({method} {path}), "
+                    f"reintento en {delay:.2f}s"
+                )
+                if response.status_code == 429:
+                    # Límite excedido: se frena a todas las peticiones, no solo a esta
+                    self.rate_limiter.block_for(delay)
+                else:
+                    await asyncio.sleep(delay)
+                continue
+
+            try:
+                response.raise_for_status()
+                return response.json()
+            except (httpx.HTTPStatusError, ValueError) as e:
+                logger.error(f"Error en la respuesta de USDA ({method} {path}): {str(e)}")
+                return None
+        return None
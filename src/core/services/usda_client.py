@@ -1,40 +1,97 @@
 import logging
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from src.core.cache.keys import food_key, search_key
+from src.core.cache.memory_cache import MemoryCache
 from src.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Máximo de fdcIds por petición al endpoint POST /foods de FoodData Central
+MAX_IDS_PER_REQUEST = 20
+
+SEARCH_DATA_TYPES = ["Survey (FNDDS)", "Foundation", "SR Legacy"]
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter que aplica un timeout por defecto a las peticiones que no lo indican."""
+
+    def __init__(self, timeout: float, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session(
+    api_key: str, timeout: float = 10.0, max_retries: int = 3, pool_maxsize: int = 20
+) -> requests.Session:
+    """
+    Sesión HTTP para la API de USDA con pool de conexiones, timeout por defecto y
+    reintentos con backoff exponencial ante errores de red, 429 y 5xx (respetando
+    Retry-After).
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,  # POST /foods es una consulta, se puede reintentar
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(timeout, max_retries=retry, pool_maxsize=pool_maxsize)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"X-Api-Key": api_key, "Content-Type": "application/json"})
+    return session
+
 
 class USDAClient:
     """Cliente para interactuar con la API de USDA."""
 
-    def __init__(self, api_key=None):
-        """Inicializa el cliente con la configuración necesaria."""
+    def __init__(self, api_key=None, cache: Optional[MemoryCache] = None):
+        """
+        Inicializa el cliente con la configuración necesaria.
+
+        `cache` sustituye a la caché en memoria propia (p. ej. NullCache cuando quien usa
+        el cliente ya tiene su propia caché).
+        """
         settings = get_settings()
         self.api_key = api_key or settings.USDA_API_KEY
         self.base_url = settings.USDA_API_BASE_URL
-        self.session = requests.Session()
-        self.session.headers.update({"X-Api-Key": self.api_key, "Content-Type": "application/json"})
-        self._cache = {}  # Cache simple en memoria para pruebas
+        self.session = create_session(
+            self.api_key,
+            timeout=settings.USDA_API_TIMEOUT,
+            max_retries=settings.USDA_API_MAX_RETRIES,
+            pool_maxsize=settings.USDA_API_MAX_CONNECTIONS,
+        )
+        # Caché en memoria acotada (LRU + TTL)
+        self._cache = cache if cache is not None else MemoryCache(max_size=2048)
 
     def search_foods(self, query: str, page_size: int = 5) -> Dict:
         """Busca alimentos en la base de datos de USDA."""
         try:
             # Verificar cache
-            cache_key = f"search:{query}:{page_size}"
-            if cache_key in self._cache:
+            cache_key = search_key(query, page_size)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
                 logger.info(f"Usando búsqueda en caché para: {query}")
-                return self._cache[cache_key]
+                return cached
 
             response = self.session.get(
                 f"{self.base_url}/foods/search",
                 params={
                     "query": query,
                     "pageSize": page_size,
-                    "dataType": ["Survey (FNDDS)", "Foundation", "SR Legacy"],
+                    "dataType": SEARCH_DATA_TYPES,
                 },
             )
             response.raise_for_status()
@@ -52,10 +109,11 @@ class USDAClient:
         """Obtiene detalles de un alimento específico."""
         try:
             # Verificar cache
-            cache_key = f"food:{fdc_id}"
-            if cache_key in self._cache:
+            cache_key = food_key(fdc_id)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
                 logger.info(f"Usando detalles en caché para alimento: {fdc_id}")
-                return self._cache[cache_key]
+                return cached
 
             response = self.session.get(f"{self.base_url}/food/{fdc_id}")
             response.raise_for_status()
@@ -69,6 +127,45 @@ class USDAClient:
             logger.error(f"Error al obtener detalles del alimento {fdc_id}: {str(e)}")
             return {}
 
+    def get_foods_details(self, fdc_ids: Iterable) -> Dict[str, Dict]:
+        """
+        Obtiene los detalles de varios alimentos con el endpoint multi-id (POST /foods),
+        en bloques de MAX_IDS_PER_REQUEST. Los ids en caché no se piden.
+
+        Returns:
+            Diccionario {fdcId (str): detalles}; los alimentos no encontrados se omiten
+        """
+        results = {}
+        missing = []
+        for fdc_id in dict.fromkeys(str(fdc_id) for fdc_id in fdc_ids):
+            cached = self._cache.get(food_key(fdc_id))
+            if cached is not None:
+                results[fdc_id] = cached
+            else:
+                missing.append(fdc_id)
+
+        for start in range(0, len(missing), MAX_IDS_PER_REQUEST):
+            chunk = missing[start : start + MAX_IDS_PER_REQUEST]
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/foods",
+                    json={
+                        "fdcIds": [int(fdc_id) if fdc_id.isdigit() else fdc_id for fdc_id in chunk]
+                    },
+                )
+                response.raise_for_status()
+                foods = response.json()
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error al obtener detalles de los alimentos {chunk}: {str(e)}")
+                continue
+
+            for food in foods or []:
+                fdc_id = str(food.get("fdcId"))
+                self._cache[food_key(fdc_id)] = food
+                results[fdc_id] = food
+
+        return results
+
     def parse_nutrition_data(self, food_data: Dict) -> Dict:
         """Parsea los datos nutricionales de la respuesta de USDA."""
         nutrients = {}
@@ -1,12 +1,33 @@
 from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, PrivateAttr
+from src.core.cache.keys import (
+    FOOD_TTL,
+    NEGATIVE_TTL,
+    SEARCH_TTL,
+    STALE_TTL,
+    food_key,
+    raw_food_key,
+    search_key,
+)
+from src.core.cache.loader import CacheLoader
+from src.core.cache.memory_cache import NullCache
 from src.core.cache.redis_cache import RedisCache
+from src.core.services.fdc_mirror import FDCMirror
+from src.core.services.food_record import expand_food, is_current, normalize_food
+from src.core.services.nutrients import (
+    build_nutrient_index,
+    canonical_nutrient,
+    fdc_nutrient_entries,
+    nutrient_vector,
+)
 from src.core.services.usda_client import USDAClient
 
 
 class NutrientInfo(BaseModel):
     """Información sobre un nutriente."""
+
     name: str
     amount: float
     unit: str
@@ -14,50 +35,196 @@ class NutrientInfo(BaseModel):
 
 class FoodItem(BaseModel):
     """Modelo para un alimento de la API de USDA."""
+
     fdcId: str
     description: str
     nutrients: List[NutrientInfo] = []
 
+    # Índices construidos en el primer acceso (ver src/core/services/nutrients.py)
+    _nutrient_index: Optional[Dict[str, float]] = PrivateAttr(default=None)
+    _nutrient_vector: Optional[np.ndarray] = PrivateAttr(default=None)
+
+    @property
+    def nutrient_index(self) -> Dict[str, float]:
+        """Cantidad por id canónico de nutriente. Se calcula una vez: no mutar `nutrients`."""
+        if self._nutrient_index is None:
+            self._nutrient_index = build_nutrient_index(
+                (n.name, n.amount, n.unit) for n in self.nutrients
+            )
+        return self._nutrient_index
+
+    @property
+    def nutrient_vector(self) -> np.ndarray:
+        """Vector denso de cantidades en el orden de NUTRIENT_ORDER (solo lectura)."""
+        if self._nutrient_vector is None:
+            vector = nutrient_vector(self.nutrient_index)
+            vector.setflags(write=False)
+            self._nutrient_vector = vector
+        return self._nutrient_vector
+
+    def nutrient_amount(self, name: str, default: Optional[float] = None) -> Optional[float]:
+        """Cantidad de un nutriente por cualquiera de sus nombres (O(1))."""
+        return self.nutrient_index.get(canonical_nutrient(name), default)
+
+    @classmethod
+    def from_usda(cls, data: Dict) -> "FoodItem":
+        """
+        Crea un FoodItem desde un documento de la API de USDA, ya sea un resultado de
+        búsqueda (nutrientName/value/unitName) o un detalle (nutrient{name,unitName}/amount).
+        """
+        if isinstance(data, cls):
+            return data
+        nutrients = [
+            NutrientInfo(name=name, amount=amount, unit=unit)
+            for name, amount, unit in fdc_nutrient_entries(data.get("foodNutrients", []))
+        ]
+        return cls(
+            fdcId=str(data.get("fdcId", "")),
+            description=data.get("description", ""),
+            nutrients=nutrients,
+        )
+
 
 class USDAService:
     """Servicio para interactuar con la API de USDA."""
 
-    def __init__(self, api_key: str = None, cache: RedisCache = None):
-        """Inicializa el servicio USDA."""
-        self.client = USDAClient(api_key)
+    def __init__(
+        self,
+        api_key: str = None,
+        cache: RedisCache = None,
+        backend=None,
+        stale_ttl: float = STALE_TTL,
+        raw_cache=None,
+    ):
+        """
+        Inicializa el servicio USDA.
+
+        `cache` puede ser un RedisCache o un TieredCache (memoria delante de Redis); si se
+        indica, el cliente de la API no mantiene una caché propia duplicada y las lecturas
+        pasan por un CacheLoader (single-flight, refresco anticipado y, durante
+        `stale_ttl` segundos tras caducar, se sirve el valor anterior mientras se
+        refresca; 0 lo desactiva). `backend` sustituye al cliente por cualquier objeto
+        con su misma interfaz, p. ej. una réplica local FDCMirror.
+
+        Los detalles de alimentos se guardan en `cache` como registros compactos (ver
+        food_record.py); si se indica `raw_cache` (nivel frío), también se guarda ahí el
+        documento FDC completo, accesible con get_raw_food_details.
+        """
+        if backend is None:
+            backend = USDAClient(api_key, cache=NullCache() if cache is not None else None)
+        self.client = backend
         self.cache = cache
+        self.loader = CacheLoader(cache, stale_ttl=stale_ttl) if cache is not None else None
+        self.raw_cache = raw_cache
+
+    @classmethod
+    def from_mirror(cls, path: str, cache: RedisCache = None) -> "USDAService":
+        """Servicio que responde desde una réplica local de FDC, sin red."""
+        return cls(cache=cache, backend=FDCMirror(path))
 
     def search_foods(self, query: str, page_size: int = 5) -> List[Dict]:
         """Busca alimentos en la base de datos USDA."""
-        if self.cache:
-            cache_key = f"search:{query}:{page_size}"
-            cached_result = self.cache.get(cache_key)
-            if cached_result:
-                return cached_result
-
-        result = self.client.search_foods(query, page_size)
-        if "foods" in result:
-            result = result["foods"]
 
-        if self.cache:
-            self.cache.set(cache_key, result, expire=3600)  # Cache por 1 hora
-
-        return result
+        def fetch() -> List[Dict]:
+            result = self.client.search_foods(query, page_size)
+            if "foods" in result:
+                result = result["foods"]
+            return result
+
+        if self.loader is None:
+            return fetch()
+        # Una lista vacía en caché es un resultado negativo reciente
+        return self.loader.get_or_compute(
+            search_key(query, page_size),
+            fetch,
+            ttl=lambda result: SEARCH_TTL if result else NEGATIVE_TTL,
+        )
 
     def get_food_details(self, food_id: str) -> Dict:
-        """Obtiene detalles de un alimento específico."""
-        if self.cache:
-            cache_key = f"food:{food_id}"
-            cached_result = self.cache.get(cache_key)
-            if cached_result:
-                return cached_result
-
-        result = self.client.get_food_details(food_id)
-
-        if self.cache:
-            self.cache.set(cache_key, result, expire=86400)  # Cache por 24 horas
-
-        return result
+        """
+        Obtiene detalles de un alimento específico. Con caché, los nutrientes se limitan
+        a los de NUTRIENT_ORDER, en sus unidades canónicas.
+        """
+        if self.loader is None:
+            return self.client.get_food_details(food_id)
+        return expand_food(self.get_food_record(food_id))
+
+    def get_food_record(self, food_id: str) -> Dict:
+        """Registro compacto de un alimento ({} si no existe)."""
+        if self.loader is None:
+            return normalize_food(self.client.get_food_details(food_id))
+
+        def fetch() -> Dict:
+            food = self.client.get_food_details(food_id)
+            self._store_raw({str(food_id): food})
+            return normalize_food(food)
+
+        return self.loader.get_or_compute(
+            food_key(food_id),
+            fetch,
+            ttl=lambda record: FOOD_TTL if record else NEGATIVE_TTL,
+            valid=is_current,
+        )
+
+    def get_raw_food_details(self, food_id: str) -> Dict:
+        """Documento FDC completo, desde el nivel frío si está o desde USDA."""
+        if self.raw_cache is not None:
+            cached = self.raw_cache.get(raw_food_key(food_id))
+            if cached:
+                return cached
+        food = self.client.get_food_details(food_id)
+        self._store_raw({str(food_id): food})
+        return food
+
+    def _store_raw(self, foods: Dict[str, Dict]) -> None:
+        if self.raw_cache is None:
+            return
+        foods = {raw_food_key(food_id): food for food_id, food in foods.items() if food}
+        if foods:
+            self.raw_cache.set_many(foods, expire=FOOD_TTL)
+
+    def get_foods_details(self, food_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Obtiene detalles de varios alimentos: los aciertos de caché se leen con una sola
+        operación y el resto se pide a USDA en peticiones multi-id. Las entradas caducadas
+        se vuelven a pedir en el mismo lote en lugar de servirse obsoletas.
+
+        Returns:
+            Diccionario {fdcId (str): detalles}; los alimentos no encontrados se omiten
+        """
+        if self.loader is None:
+            return self.client.get_foods_details(
+                list(dict.fromkeys(str(food_id) for food_id in food_ids))
+            )
+        records = self.get_food_records(food_ids)
+        return {food_id: expand_food(record) for food_id, record in records.items()}
+
+    def get_food_records(self, food_ids: List[str]) -> Dict[str, Dict]:
+        """Registros compactos de varios alimentos; los no encontrados se omiten."""
+        food_ids = list(dict.fromkeys(str(food_id) for food_id in food_ids))
+        results = {}
+        missing = food_ids
+        if self.loader is not None:
+            cached = self.loader.get_many(
+                [food_key(food_id) for food_id in food_ids], valid=is_current
+            )
+            hits = {food_id: value for food_id, value in zip(food_ids, cached) if value is not None}
+            missing = [food_id for food_id in food_ids if food_id not in hits]
+            # Los {} en caché son alimentos que no existen: no se piden ni se devuelven
+            results = {food_id: value for food_id, value in hits.items() if value}
+
+        if missing:
+            fetched = self.client.get_foods_details(missing)
+            self._store_raw(fetched)
+            records = {food_id: normalize_food(food) for food_id, food in fetched.items()}
+            if self.loader is not None:
+                found = {food_key(i): records[i] for i in missing if i in records}
+                absent = {food_key(i): {} for i in missing if i not in records}
+                self.loader.set_many(found, ttl=FOOD_TTL)
+                self.loader.set_many(absent, ttl=NEGATIVE_TTL)
+            results.update(records)
+
+        return results
 
     def get_food_nutrition(self, food_name: str) -> Dict:
         """Obtiene información nutricional de un alimento por nombre."""
@@ -1,11 +1,26 @@
-from typing import Dict, List
+import asyncio
+import inspect
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Set
 
 import numpy as np
 from pydantic import BaseModel
 
+from src.core.services.nutrients import NUTRIENT_ORDER, NUTRIENT_POSITION, canonical_nutrient
 from src.core.services.usda_service import FoodItem, USDAService
 from src.features.nutrition.nutrition_analyzer import NutritionAnalyzer
 
+logger = logging.getLogger(__name__)
+
+# Términos de búsqueda por defecto si el usuario no tiene ingredientes favoritos
+DEFAULT_SEARCH_TERMS = ["pizza", "dough", "cheese", "tomato"]
+
+# Máximo de búsquedas simultáneas contra USDA por solicitud
+MAX_CONCURRENT_SEARCHES = 8
+
+# Usuarios puntuados a la vez en get_recommendations_batch (acota matrices usuarios x alimentos)
+BATCH_USER_CHUNK = 1024
+
 
 class UserPreferences(BaseModel):
     dietary_restrictions: List[str] = []
@@ -21,64 +36,299 @@ class Recommendation(BaseModel):
     nutritional_benefits: Dict[str, float]
 
 
+class DietProfile:
+    """
+    Perfil nutricional agregado de la dieta actual.
+
+    El vector de totales (en el orden de NUTRIENT_ORDER) se calcula una vez por
+    solicitud; el efecto de añadir un candidato se obtiene sumando su vector, sin
+    recorrer de nuevo la dieta.
+    """
+
+    def __init__(self, current_diet: List[FoodItem]):
+        self.is_empty = not current_diet
+        self.totals = np.zeros(len(NUTRIENT_ORDER))
+        for food in current_diet:
+            self.totals += food.nutrient_vector
+
+    def balance_score(self, food: FoodItem) -> float:
+        """Mejora relativa media de los nutrientes presentes en la dieta al añadir el alimento."""
+        if self.is_empty:
+            return 0.5
+        present = self.totals > 0
+        if not present.any():
+            return 0.0
+        improvements = food.nutrient_vector[present] / self.totals[present]
+        return float(np.mean(np.maximum(improvements, 0)))
+
+    def benefits(self, food: FoodItem) -> Dict[str, float]:
+        """Nutrientes que aumentan al añadir el alimento y en cuánto."""
+        if self.is_empty:
+            return {nutrient.name: nutrient.amount for nutrient in food.nutrients}
+        return {nutrient: amount for nutrient, amount in food.nutrient_index.items() if amount > 0}
+
+
+def _term_matrix(terms: List[str], descriptions: List[str]) -> np.ndarray:
+    """Matriz booleana (n_términos, n_alimentos): el término aparece en la descripción."""
+    matrix = np.zeros((len(terms), len(descriptions)), dtype=bool)
+    for i, term in enumerate(terms):
+        matrix[i] = [term in description for description in descriptions]
+    return matrix
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Índices de los k mayores scores positivos, de mayor a menor, con selección parcial
+    (np.partition). Ante empates gana el índice menor, como con un ordenamiento estable.
+    """
+    candidates = np.flatnonzero(scores > 0)
+    if k <= 0 or candidates.size == 0:
+        return candidates[:0]
+    values = scores[candidates]
+    if candidates.size > k:
+        kth = np.partition(values, candidates.size - k)[candidates.size - k]
+        above = candidates[values > kth]
+        ties = candidates[values == kth][: k - above.size]
+        candidates = np.concatenate([above, ties])
+        values = scores[candidates]
+    return candidates[np.lexsort((candidates, -values))]
+
+
 class RecommendationEngine:
-    def __init__(self):
+    def __init__(self, max_concurrent_searches: int = MAX_CONCURRENT_SEARCHES):
         self.usda_service = USDAService()
-        self.nutrition_analyzer = NutritionAnalyzer()
+        self.nutrition_analyzer = NutritionAnalyzer(self.usda_service)
+        self.max_concurrent_searches = max_concurrent_searches
 
     async def get_recommendations(
         self, user_prefs: UserPreferences, current_diet: List[FoodItem], limit: int = 5
     ) -> List[Recommendation]:
         """Genera recomendaciones personalizadas basadas en preferencias y dieta actual."""
-        # Obtener alimentos potenciales
-        potential_foods = await self._get_potential_foods(user_prefs)
-
-        # Calcular scores para cada alimento
-        scored_foods = []
-        for food in potential_foods:
-            score = await self._calculate_food_score(food, user_prefs, current_diet)
-            if score > 0:
-                reasons = self._generate_recommendation_reasons(food, score)
-                nutritional_benefits = self._calculate_nutritional_benefits(food, current_diet)
-
-                scored_foods.append(
-                    Recommendation(
-                        food_item=food,
-                        score=score,
-                        reasons=reasons,
-                        nutritional_benefits=nutritional_benefits,
+        # Perfil de la dieta actual, calculado una sola vez por solicitud
+        profile = DietProfile(current_diet)
+
+        foods = [food async for food in self._iter_potential_foods(user_prefs)]
+        if not foods:
+            return []
+
+        # Fase 1: scores de todos los candidatos como un array; fase 2: solo los mejores
+        # se convierten en Recommendation (razones y beneficios)
+        scores = self.score_candidates(foods, [user_prefs], [profile])[0]
+        return [
+            self._build_recommendation(foods[i], scores[i], current_diet, profile)
+            for i in _top_k(scores, limit)
+        ]
+
+    async def get_recommendations_batch(
+        self,
+        users: Dict[str, UserPreferences],
+        diets: Optional[Dict[str, List[FoodItem]]] = None,
+        limit: int = 5,
+        candidate_foods: Optional[List[FoodItem]] = None,
+    ) -> Dict[str, List[Recommendation]]:
+        """
+        Recomendaciones para muchos usuarios contra un conjunto compartido de candidatos.
+
+        Si no se indica `candidate_foods`, se buscan una sola vez los términos de todos los
+        usuarios, de modo que cada usuario puede recibir alimentos encontrados por los
+        términos de otros. Las restricciones dietéticas se aplican por usuario. Los scores
+        se calculan como matrices (usuarios x alimentos) por bloques de BATCH_USER_CHUNK.
+        """
+        diets = diets or {}
+        user_ids = list(users)
+        if candidate_foods is None:
+            terms = [
+                term
+                for prefs in users.values()
+                for term in (prefs.favorite_ingredients or DEFAULT_SEARCH_TERMS)
+            ]
+            candidate_foods = await self._get_potential_foods(
+                UserPreferences(favorite_ingredients=list(dict.fromkeys(terms)))
+            )
+
+        results: Dict[str, List[Recommendation]] = {}
+        if not candidate_foods:
+            return {user_id: [] for user_id in user_ids}
+
+        for start in range(0, len(user_ids), BATCH_USER_CHUNK):
+            chunk = user_ids[start : start + BATCH_USER_CHUNK]
+            prefs = [users[user_id] for user_id in chunk]
+            profiles = [DietProfile(diets.get(user_id, [])) for user_id in chunk]
+
+            scores = self.score_candidates(candidate_foods, prefs, profiles)
+            scores[self._restriction_mask(candidate_foods, prefs)] = 0.0
+
+            for row, user_id in enumerate(chunk):
+                results[user_id] = [
+                    self._build_recommendation(
+                        candidate_foods[i], scores[row, i], diets.get(user_id, []), profiles[row]
                     )
+                    for i in _top_k(scores[row], limit)
+                ]
+        return results
+
+    def score_candidates(
+        self,
+        foods: List[FoodItem],
+        users: Sequence[UserPreferences],
+        profiles: Sequence[DietProfile],
+    ) -> np.ndarray:
+        """
+        Scores (n_usuarios, n_alimentos) equivalentes a `_calculate_food_score`: promedio
+        de los scores nutricional (si hay objetivos), de ingredientes (si hay favoritos) y
+        de balance con la dieta, calculados con operaciones matriciales.
+        """
+        n_users, n_foods = len(users), len(foods)
+        nutrients = np.array([food.nutrient_vector for food in foods]).reshape(n_foods, -1)
+        total = np.zeros((n_users, n_foods))
+        n_components = np.ones((n_users, 1))
+
+        # Score nutricional: un objetivo (columna) a la vez para acotar memoria
+        goals: Dict[str, List[tuple]] = {}
+        for u, prefs in enumerate(users):
+            for nutrient, target in prefs.nutritional_goals.items():
+                goals.setdefault(canonical_nutrient(nutrient), []).append((u, target))
+        goal_counts = np.array([len(prefs.nutritional_goals) for prefs in users], dtype=float)
+        if goals:
+            nutritional = np.zeros((n_users, n_foods))
+            for nutrient, targets in goals.items():
+                position = NUTRIENT_POSITION.get(nutrient)
+                if position is not None:
+                    values = nutrients[:, position]
+                else:
+                    values = np.array([food.nutrient_index.get(nutrient, 0.0) for food in foods])
+                rows = np.array([u for u, _ in targets], dtype=int)
+                target = np.array([t for _, t in targets], dtype=float)[:, None]
+                scale = np.maximum(target, values[None, :])
+                # Valor y objetivo en 0 cuentan como coincidencia perfecta
+                error = np.divide(
+                    np.abs(values[None, :] - target),
+                    scale,
+                    out=np.zeros_like(scale),
+                    where=scale != 0,
                 )
+                np.add.at(nutritional, rows, 1 - error)
+            has_goals = goal_counts > 0
+            total[has_goals] += nutritional[has_goals] / goal_counts[has_goals, None]
+            n_components[has_goals] += 1
 
-        # Ordenar por score y retornar los mejores
-        scored_foods.sort(key=lambda x: x.score, reverse=True)
-        return scored_foods[:limit]
+        # Score por ingredientes favoritos
+        favorites = [[ing.lower() for ing in prefs.favorite_ingredients] for prefs in users]
+        terms = list(dict.fromkeys(term for user_terms in favorites for term in user_terms))
+        if terms:
+            descriptions = [food.description.lower() for food in foods]
+            term_index = {term: i for i, term in enumerate(terms)}
+            incidence = np.zeros((n_users, len(terms)))
+            for u, user_terms in enumerate(favorites):
+                for term in user_terms:
+                    incidence[u, term_index[term]] += 1
+            matches = incidence @ _term_matrix(terms, descriptions)
+            counts = incidence.sum(axis=1)
+            has_favorites = counts > 0
+            total[has_favorites] += matches[has_favorites] / counts[has_favorites, None]
+            n_components[has_favorites] += 1
+
+        # Score por balance nutricional: mejora relativa media sobre nutrientes presentes
+        totals = np.array([profile.totals for profile in profiles]).reshape(n_users, -1)
+        present = totals > 0
+        n_present = present.sum(axis=1)
+        inverse = np.divide(1.0, totals, out=np.zeros_like(totals), where=present)
+        balance = (np.maximum(nutrients, 0) @ inverse.T).T
+        balance = np.divide(
+            balance, n_present[:, None], out=np.zeros_like(balance), where=n_present[:, None] > 0
+        )
+        empty_diet = np.array([profile.is_empty for profile in profiles])
+        balance[empty_diet] = 0.5
+        total += balance
+
+        return total / n_components
+
+    def _restriction_mask(
+        self, foods: List[FoodItem], users: Sequence[UserPreferences]
+    ) -> np.ndarray:
+        """Matriz booleana (n_usuarios, n_alimentos): el alimento viola una restricción."""
+        restrictions = [[r.lower() for r in prefs.dietary_restrictions] for prefs in users]
+        terms = list(dict.fromkeys(term for user_terms in restrictions for term in user_terms))
+        if not terms:
+            return np.zeros((len(users), len(foods)), dtype=bool)
+        term_index = {term: i for i, term in enumerate(terms)}
+        incidence = np.zeros((len(users), len(terms)))
+        for u, user_terms in enumerate(restrictions):
+            incidence[u, [term_index[term] for term in user_terms]] = 1
+        descriptions = [food.description.lower() for food in foods]
+        return (incidence @ _term_matrix(terms, descriptions)) > 0
+
+    def _build_recommendation(
+        self, food: FoodItem, score: float, current_diet: List[FoodItem], profile: DietProfile
+    ) -> Recommendation:
+        """Construye la recomendación completa (razones y beneficios) de un alimento."""
+        score = float(score)
+        return Recommendation(
+            food_item=food,
+            score=score,
+            reasons=self._generate_recommendation_reasons(food, score),
+            nutritional_benefits=self._calculate_nutritional_benefits(food, current_diet, profile),
+        )
 
     async def _get_potential_foods(self, user_prefs: UserPreferences) -> List[FoodItem]:
         """Obtiene alimentos potenciales basados en preferencias."""
+        return [food async for food in self._iter_potential_foods(user_prefs)]
+
+    async def _iter_potential_foods(self, user_prefs: UserPreferences) -> AsyncIterator[FoodItem]:
+        """
+        Produce los alimentos potenciales a medida que terminan las búsquedas.
+
+        Todas las búsquedas se lanzan a la vez (como máximo `max_concurrent_searches`
+        simultáneas); los resultados se deduplican por fdcId y se filtran por
+        restricciones dietéticas.
+        """
         # Buscar por ingredientes favoritos
-        search_terms = user_prefs.favorite_ingredients
-        if not search_terms:
-            search_terms = ["pizza", "dough", "cheese", "tomato"]
-
-        all_foods = []
-        for term in search_terms:
-            foods = await self.usda_service.search_foods(term)
-            all_foods.extend(foods)
-
-        # Filtrar por restricciones dietéticas
-        filtered_foods = []
-        for food in all_foods:
-            if not any(
-                restriction in food.description.lower()
-                for restriction in user_prefs.dietary_restrictions
-            ):
-                filtered_foods.append(food)
-
-        return filtered_foods
+        search_terms = list(dict.fromkeys(user_prefs.favorite_ingredients or DEFAULT_SEARCH_TERMS))
+        restrictions = [restriction.lower() for restriction in user_prefs.dietary_restrictions]
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_searches)
+        tasks = [asyncio.create_task(self._search_term(term, semaphore)) for term in search_terms]
+        seen: Set[str] = set()
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                for food in await next_result:
+                    if food.fdcId in seen:
+                        continue
+                    seen.add(food.fdcId)
+
+                    # Filtrar por restricciones dietéticas
+                    description = food.description.lower()
+                    if not any(restriction in description for restriction in restrictions):
+                        yield food
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _search_term(self, term: str, semaphore: asyncio.Semaphore) -> List[FoodItem]:
+        """
+        Busca un término sin bloquear el event loop: los servicios síncronos se ejecutan en
+        un hilo. Un término que falla se registra y no interrumpe el resto.
+        """
+        async with semaphore:
+            try:
+                search = self.usda_service.search_foods
+                if inspect.iscoroutinefunction(search):
+                    foods = await search(term)
+                else:
+                    foods = await asyncio.to_thread(search, term)
+                    if inspect.isawaitable(foods):
+                        foods = await foods
+            except Exception as e:
+                logger.error(f"Error al buscar alimentos para '{term}': {str(e)}")
+                return []
+        return [FoodItem.from_usda(food) for food in foods or []]
 
     async def _calculate_food_score(
-        self, food: FoodItem, user_prefs: UserPreferences, current_diet: List[FoodItem]
+        self,
+        food: FoodItem,
+        user_prefs: UserPreferences,
+        current_diet: List[FoodItem],
+        profile: Optional[DietProfile] = None,
     ) -> float:
         """Calcula un score para un alimento basado en preferencias y dieta actual."""
         scores = []
@@ -98,7 +348,7 @@ class RecommendationEngine:
             scores.append(ingredient_score)
 
         # Score por balance nutricional
-        balance_score = self._calculate_balance_score(food, current_diet)
+        balance_score = self._calculate_balance_score(food, current_diet, profile)
         scores.append(balance_score)
 
         # Promedio de scores
@@ -110,9 +360,7 @@ class RecommendationEngine:
         """Calcula score basado en objetivos nutricionales."""
         scores = []
         for nutrient, target in nutritional_goals.items():
-            nutrient_value = next(
-                (n.amount for n in food.nutrients if n.name.lower() == nutrient.lower()), 0.0
-            )
+            nutrient_value = food.nutrient_amount(nutrient, 0.0)
             # Normalizar score entre 0 y 1
             score = 1 - abs(nutrient_value - target) / max(target, nutrient_value)
             scores.append(score)
@@ -130,27 +378,13 @@ class RecommendationEngine:
         )
         return matches / len(favorite_ingredients)
 
-    def _calculate_balance_score(self, food: FoodItem, current_diet: List[FoodItem]) -> float:
+    def _calculate_balance_score(
+        self, food: FoodItem, current_diet: List[FoodItem], profile: Optional[DietProfile] = None
+    ) -> float:
         """Calcula score basado en balance nutricional con la dieta actual."""
-        if not current_diet:
-            return 0.5
-
-        # Analizar perfil nutricional actual
-        current_profile = self.nutrition_analyzer.analyze_nutritional_profile(current_diet)
-
-        # Analizar perfil con el nuevo alimento
-        new_profile = self.nutrition_analyzer.analyze_nutritional_profile(current_diet + [food])
-
-        # Calcular mejora en balance
-        improvements = []
-        for nutrient in current_profile.macronutrients:
-            current = current_profile.macronutrients[nutrient]
-            new = new_profile.macronutrients[nutrient]
-            if current > 0:
-                improvement = (new - current) / current
-                improvements.append(max(0, improvement))
-
-        return np.mean(improvements) if improvements else 0.0
+        if profile is None:
+            profile = DietProfile(current_diet)
+        return profile.balance_score(food)
 
     def _generate_recommendation_reasons(self, food: FoodItem, score: float) -> List[str]:
         """Genera razones para la recomendación."""
@@ -160,8 +394,7 @@ class RecommendationEngine:
         main_nutrients = {"protein": "proteína", "carbohydrate": "carbohidratos", "fat": "grasas"}
 
         for nutrient, name in main_nutrients.items():
-            value = next((n.amount for n in food.nutrients if n.name.lower() == nutrient), None)
-            if value is not None:
+            if nutrient in food.nutrient_index:
                 reasons.append(f"Buena fuente de {name}")
 
         # Razones basadas en score
@@ -173,20 +406,9 @@ class RecommendationEngine:
         return reasons
 
     def _calculate_nutritional_benefits(
-        self, food: FoodItem, current_diet: List[FoodItem]
+        self, food: FoodItem, current_diet: List[FoodItem], profile: Optional[DietProfile] = None
     ) -> Dict[str, float]:
         """Calcula beneficios nutricionales al añadir el alimento."""
-        if not current_diet:
-            return {nutrient.name: nutrient.amount for nutrient in food.nutrients}
-
-        current_profile = self.nutrition_analyzer.analyze_nutritional_profile(current_diet)
-        new_profile = self.nutrition_analyzer.analyze_nutritional_profile(current_diet + [food])
-
-        benefits = {}
-        for nutrient in new_profile.macronutrients:
-            current = current_profile.macronutrients[nutrient]
-            new = new_profile.macronutrients[nutrient]
-            if new > current:
-                benefits[nutrient] = new - current
-
-        return benefits
+        if profile is None:
+            profile = DietProfile(current_diet)
+        return profile.benefits(food)
@@ -0,0 +1,64 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.core.cache import codecs
+from src.core.cache.codecs import FORMAT_VERSION, Serializer
+
+FOOD = {
+    "fdcId": 1,
+    "description": "Tomatoes, red, ripe, raw",
+    "foodNutrients": [
+        {"nutrient": {"id": 1000 + i, "name": f"Nutrient {i}", "unitName": "G"}, "amount": i * 0.5}
+        for i in range(100)
+    ],
+}
+
+
+@pytest.mark.parametrize("codec", ["json", "msgpack"])
+def test_round_trip(codec):
+    """Prueba que los valores sobreviven a la serialización con cada codec."""
+    serializer = Serializer(codec=codec)
+    for value in (FOOD, [], {}, "texto", 3.5, None, [{"a": [1, 2]}]):
+        assert serializer.loads(serializer.dumps(value)) == value
+
+
+def test_large_values_are_compressed():
+    """Prueba que solo los valores por encima del umbral se comprimen."""
+    serializer = Serializer(codec="json", threshold=1024)
+
+    small = serializer.dumps({"fdcId": 1})
+    large = serializer.dumps(FOOD)
+
+    assert small[:3] == bytes([FORMAT_VERSION, codecs.JSON_CODEC, codecs.NO_COMPRESSION])
+    assert large[2] == codecs.ZLIB_COMPRESSION
+    assert len(large) < len(json.dumps(FOOD)) / 3
+
+
+def test_reads_legacy_json_values():
+    """Prueba que los valores JSON escritos antes de la cabecera se siguen leyendo."""
+    serializer = Serializer()
+
+    assert serializer.loads(json.dumps(FOOD).encode("utf-8")) == FOOD
+    assert serializer.loads(json.dumps([1, 2])) == [1, 2]
+    assert serializer.loads(b"") is None
+
+
+def test_header_drives_decoding():
+    """Prueba que la lectura usa el codec de la cabecera y no el configurado."""
+    stored = Serializer(codec="json", compression="none").dumps(FOOD)
+
+    assert Serializer(codec="msgpack", compression="zlib").loads(stored) == FOOD
+    with pytest.raises(ValueError):
+        Serializer().loads(bytes([FORMAT_VERSION, 9, 0]) + b"{}")
+
+
+def test_falls_back_to_json_without_msgpack():
+    """Prueba que sin msgpack instalado se codifica en JSON."""
+    with patch.object(codecs, "msgpack", None):
+        serializer = Serializer(codec="msgpack")
+
+    assert serializer.codec == codecs.JSON_CODEC
+    with pytest.raises(ValueError):
+        Serializer(codec="pickle")
@@ -0,0 +1,129 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core.cache.loader import CacheLoader, unwrap, wrap
+from src.core.cache.memory_cache import MemoryCache
+
+
+class LeasedCache(MemoryCache):
+    """MemoryCache con leases, como los de RedisCache."""
+
+    def __init__(self):
+        super().__init__(max_size=128, ttl=None)
+        self.leases = {}
+
+    def acquire_lock(self, key, token, ttl):
+        return self.leases.setdefault(key, token) == token
+
+    def release_lock(self, key, token):
+        if self.leases.get(key) == token:
+            del self.leases[key]
+        return True
+
+
+@pytest.fixture
+def cache():
+    return LeasedCache()
+
+
+def counting(value, delay=0.0):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(delay)
+        return value
+
+    return compute, calls
+
+
+def test_concurrent_misses_compute_once(cache):
+    """Prueba que las lecturas concurrentes de una clave ausente calculan una sola vez."""
+    loader = CacheLoader(cache)
+    compute, calls = counting({"fdcId": 1}, delay=0.05)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: loader.get_or_compute("food:1", compute, 60), range(8)))
+
+    assert len(calls) == 1
+    assert all(result == {"fdcId": 1} for result in results)
+    assert loader.get("food:1") == {"fdcId": 1}
+    assert cache.leases == {}
+
+
+def test_stale_value_is_served_while_refreshing(cache):
+    """Prueba que un valor caducado se sirve mientras una única tarea lo refresca."""
+    cache.set("food:1", wrap("antiguo", ttl=-1))
+    loader = CacheLoader(cache, stale_ttl=60)
+    compute, calls = counting("nuevo", delay=0.05)
+
+    assert [loader.get_or_compute("food:1", compute, 60) for _ in range(5)] == ["antiguo"] * 5
+    loader.close()
+
+    assert len(calls) == 1
+    assert loader.get_or_compute("food:1", compute, 60) == "nuevo"
+
+
+def test_expired_value_without_stale_window_is_recomputed(cache):
+    """Prueba que sin ventana de obsolescencia un valor caducado es un fallo."""
+    cache.set("food:1", wrap("antiguo", ttl=-1))
+    compute, calls = counting("nuevo")
+
+    assert CacheLoader(cache).get_or_compute("food:1", compute, 60) == "nuevo"
+    assert len(calls) == 1
+
+
+def test_empty_refresh_keeps_previous_value(cache):
+    """Prueba que un refresco fallido (vacío) no sustituye al valor válido."""
+    cache.set("food:1", wrap({"fdcId": 1}, ttl=-1))
+    loader = CacheLoader(cache, stale_ttl=60)
+
+    loader.get_or_compute("food:1", lambda: {}, 60)
+    loader.close()
+
+    assert loader.get("food:1") == {"fdcId": 1}
+
+
+def test_probabilistic_early_refresh(cache):
+    """Prueba que XFetch refresca antes de caducar cuando el cálculo es costoso."""
+    cache.set("food:1", wrap("antiguo", ttl=1, delta=1000))
+    cache.set("food:2", wrap("antiguo", ttl=1, delta=1000))
+    compute, calls = counting("nuevo")
+
+    assert CacheLoader(cache, beta=0).get_or_compute("food:2", compute, 60) == "antiguo"
+    loader = CacheLoader(cache)
+    assert loader.get_or_compute("food:1", compute, 60) == "antiguo"
+    loader.close()
+
+    assert len(calls) == 1
+    assert unwrap(cache.get("food:1"))[0] == "nuevo"
+
+
+def test_waits_for_lease_holder(cache):
+    """Prueba que sin el lease se espera al valor que publica su dueño."""
+    cache.acquire_lock("lock:food:1", "otro-proceso", 30)
+    loader = CacheLoader(cache, poll_interval=0.01)
+    compute, calls = counting("propio")
+
+    timer = threading.Timer(0.05, lambda: cache.set("food:1", wrap("ajeno", ttl=60)))
+    timer.start()
+    assert loader.get_or_compute("food:1", compute, 60) == "ajeno"
+    assert calls == []
+
+    # Si el dueño no publica nada a tiempo, se calcula igualmente
+    loader.lease_wait = 0.02
+    assert loader.get_or_compute("food:2", compute, 60) == "propio"
+
+
+def test_ttl_depends_on_value(cache):
+    """Prueba el TTL en función del valor y la ventana de obsolescencia acotada."""
+    loader = CacheLoader(cache, stale_ttl=3600)
+
+    loader.get_or_compute("search:x:5", lambda: [], ttl=lambda r: 3600 if r else 300)
+    _, expires_at, _ = unwrap(cache.get("search:x:5"))
+
+    assert expires_at == pytest.approx(time.time() + 300, abs=1)
+    assert loader.get_many(["search:x:5", "search:y:5"]) == [[], None]
@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+import pytest
+
+from src.core.cache.memory_cache import MemoryCache
+
+
+def test_lru_eviction():
+    """Prueba que al superar el tamaño se descarta la entrada usada hace más tiempo."""
+    cache = MemoryCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_ttl_expiration():
+    """Prueba que las entradas expiran según el TTL por defecto o el indicado."""
+    with patch("src.core.cache.memory_cache.time.monotonic") as clock:
+        clock.return_value = 100.0
+        cache = MemoryCache(ttl=10)
+        cache.set("short", 1, expire=1)
+        cache.set("default", 2)
+
+        clock.return_value = 105.0
+        assert cache.get("short") is None
+        assert cache.exists("default")
+
+        clock.return_value = 111.0
+        assert cache.get("default") is None
+        assert len(cache) == 0
+
+
+def test_delete_and_clear():
+    """Prueba la eliminación de entradas."""
+    cache = MemoryCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert not cache.exists("a")
+    cache.clear()
+    assert len(cache) == 0
+    with pytest.raises(ValueError):
+        MemoryCache(max_size=0)
@@ -1,11 +1,11 @@
 import json
 import unittest
-from unittest.mock import patch, Mock
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import redis
 from pydantic import BaseModel
 
-from src.core.cache.redis_cache import RedisCache
+from src.core.cache.redis_cache import AsyncRedisCache, RedisCache, get_connection_pool
 
 
 class TestUser(BaseModel):
@@ -73,7 +73,10 @@ class TestRedisCache(unittest.TestCase):
         result = self.cache.set("test_key", {"name": "John", "age": 30}, expire=600)
         
         # Verificar resultados
-        self.mock_redis_client.setex.assert_called_once_with("test_key", 600, json.dumps({"name": "John", "age": 30}))
+        self.mock_redis_client.setex.assert_called_once()
+        key, expire, payload = self.mock_redis_client.setex.call_args.args
+        self.assertEqual((key, expire), ("test_key", 600))
+        self.assertEqual(self.cache.serializer.loads(payload), {"name": "John", "age": 30})
         self.assertTrue(result)
 
     def test_set_value_pydantic(self):
@@ -88,7 +91,10 @@ class TestRedisCache(unittest.TestCase):
         result = self.cache.set("test_key", test_user, expire=600)
         
         # Verificar resultados
-        self.mock_redis_client.setex.assert_called_once_with("test_key", 600, json.dumps({"name": "John", "age": 30}))
+        self.mock_redis_client.setex.assert_called_once()
+        key, expire, payload = self.mock_redis_client.setex.call_args.args
+        self.assertEqual((key, expire), ("test_key", 600))
+        self.assertEqual(self.cache.serializer.loads(payload), {"name": "John", "age": 30})
         self.assertTrue(result)
 
     def test_set_value_error(self):
@@ -158,4 +164,108 @@ class TestRedisCache(unittest.TestCase):
         result = self.cache.exists("test_key")
         
         # Verificar resultados
-        self.assertFalse(result) 
\ No newline at end of file
+        self.assertFalse(result)
+
+    def test_get_many(self):
+        """Prueba la obtención de varios valores con una sola operación."""
+        self.mock_redis_client.mget.return_value = [json.dumps({"a": 1}), None]
+
+        result = self.cache.get_many(["k1", "k2"])
+
+        self.mock_redis_client.mget.assert_called_once_with(["k1", "k2"])
+        self.assertEqual(result, [{"a": 1}, None])
+
+    def test_get_many_error(self):
+        """Prueba la obtención de varios valores cuando ocurre un error."""
+        self.mock_redis_client.mget.side_effect = Exception("Error de conexión")
+
+        self.assertEqual(self.cache.get_many(["k1", "k2"]), [None, None])
+
+    def test_set_many_uses_pipeline(self):
+        """Prueba que varios valores se almacenan en un único pipeline."""
+        pipe = self.mock_redis_client.pipeline.return_value
+
+        result = self.cache.set_many({"k1": {"a": 1}, "k2": TestUser(name="Ana", age=3)}, expire=60)
+
+        self.assertTrue(result)
+        self.mock_redis_client.pipeline.assert_called_once_with(transaction=False)
+        stored = {call.args[0]: call.args for call in pipe.setex.call_args_list}
+        self.assertEqual(stored["k1"][1], 60)
+        self.assertEqual(self.cache.serializer.loads(stored["k1"][2]), {"a": 1})
+        self.assertEqual(self.cache.serializer.loads(stored["k2"][2]), {"name": "Ana", "age": 3})
+        pipe.execute.assert_called_once()
+        self.mock_redis_client.setex.assert_not_called()
+
+    def test_set_many_error(self):
+        """Prueba el almacenamiento en bloque cuando ocurre un error."""
+        self.mock_redis_client.pipeline.return_value.execute.side_effect = Exception("Error")
+
+        self.assertFalse(self.cache.set_many({"k1": 1}))
+        self.assertTrue(self.cache.set_many({}))
+
+    def test_delete_many(self):
+        """Prueba que varias claves se eliminan con un solo DEL."""
+        self.assertTrue(self.cache.delete_many(["k1", "k2"]))
+        self.mock_redis_client.delete.assert_called_once_with("k1", "k2")
+
+    def test_connection_pool_is_shared(self):
+        """Prueba que todas las instancias comparten el pool de conexiones."""
+        with patch('redis.Redis') as mock_redis:
+            RedisCache()
+            RedisCache()
+
+        pools = {call.kwargs["connection_pool"] for call in mock_redis.call_args_list}
+        self.assertEqual(len(pools), 1)
+        self.assertIs(pools.pop(), get_connection_pool())
+
+
+    def test_lease_acquire_and_release(self):
+        """Prueba que los leases usan SET NX y se liberan solo por su dueño."""
+        self.mock_redis_client.set.side_effect = [True, None]
+        self.mock_redis_client.eval.return_value = 1
+
+        self.assertTrue(self.cache.acquire_lock("lock:food:1", "token", 30))
+        self.assertFalse(self.cache.acquire_lock("lock:food:1", "otro", 30))
+        self.mock_redis_client.set.assert_called_with("lock:food:1", "otro", nx=True, ex=30)
+
+        self.assertTrue(self.cache.release_lock("lock:food:1", "token"))
+        _, numkeys, key, token = self.mock_redis_client.eval.call_args.args
+        self.assertEqual((numkeys, key, token), (1, "lock:food:1", "token"))
+
+class TestAsyncRedisCache(unittest.IsolatedAsyncioTestCase):
+    """Prueba para el servicio AsyncRedisCache."""
+
+    @patch('redis.asyncio.Redis')
+    def setUp(self, mock_redis):
+        self.mock_redis_client = AsyncMock()
+        self.mock_redis_client.pipeline = MagicMock()
+        mock_redis.return_value = self.mock_redis_client
+        self.cache = AsyncRedisCache()
+
+    async def test_get_and_get_many(self):
+        """Prueba la lectura simple y en bloque."""
+        self.mock_redis_client.get.return_value = json.dumps({"a": 1})
+        self.mock_redis_client.mget.return_value = [None, json.dumps([1, 2])]
+
+        self.assertEqual(await self.cache.get("k1"), {"a": 1})
+        self.assertEqual(await self.cache.get_many(["k1", "k2"]), [None, [1, 2]])
+
+    async def test_set_many_uses_pipeline(self):
+        """Prueba que varios valores se almacenan en un único pipeline."""
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        self.mock_redis_client.pipeline.return_value.__aenter__.return_value = pipe
+
+        self.assertTrue(await self.cache.set_many({"k1": 1, "k2": 2}, expire=30))
+        self.assertEqual(pipe.setex.call_count, 2)
+        key, expire, payload = pipe.setex.call_args_list[1].args
+        self.assertEqual((key, expire, self.cache.serializer.loads(payload)), ("k2", 30, 2))
+        pipe.execute.assert_awaited_once()
+
+    async def test_errors_are_logged_not_raised(self):
+        """Prueba que los errores de conexión devuelven valores por defecto."""
+        self.mock_redis_client.get.side_effect = Exception("Error de conexión")
+        self.mock_redis_client.delete.side_effect = Exception("Error de conexión")
+
+        self.assertIsNone(await self.cache.get("k1"))
+        self.assertFalse(await self.cache.delete_many(["k1"]))
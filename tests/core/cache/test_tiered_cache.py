@@ -0,0 +1,87 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.core.cache.memory_cache import MemoryCache
+from src.core.cache.tiered_cache import TieredCache
+from src.core.services.usda_service import USDAService
+
+
+@pytest.fixture
+def tiers():
+    return MemoryCache(max_size=10, ttl=60), MemoryCache(max_size=100, ttl=None)
+
+
+@pytest.fixture
+def cache(tiers):
+    return TieredCache(tiers, ["memory", "redis"])
+
+
+def test_hit_in_lower_tier_is_promoted(cache, tiers):
+    """Prueba que un acierto en el segundo nivel se copia al primero."""
+    memory, shared = tiers
+    shared.set("food:1", {"fdcId": 1})
+
+    assert cache.get("food:1") == {"fdcId": 1}
+    assert memory.get("food:1") == {"fdcId": 1}
+    assert cache.get("food:1") == {"fdcId": 1}
+
+    stats = cache.stats()
+    assert stats["memory"]["hits"] == 1 and stats["memory"]["misses"] == 1
+    assert stats["redis"]["hits"] == 1 and stats["redis"]["misses"] == 0
+    assert stats["memory"]["hit_rate"] == 0.5
+
+
+def test_set_writes_all_tiers_with_capped_ttl(cache, tiers):
+    """Prueba que la escritura llega a todos los niveles y el TTL local se acota."""
+    memory, shared = tiers
+    with patch("src.core.cache.memory_cache.time.monotonic", return_value=0.0):
+        cache.set("search:a:5", [1], expire=3600)
+    with patch("src.core.cache.memory_cache.time.monotonic", return_value=61.0):
+        assert memory.get("search:a:5") is None
+        assert shared.get("search:a:5") == [1]
+
+    cache.delete("search:a:5")
+    assert not cache.exists("search:a:5")
+
+
+def test_get_many_queries_each_tier_once(cache, tiers):
+    """Prueba que cada nivel solo recibe las claves aún no resueltas."""
+    memory, shared = tiers
+    memory.set("a", 1)
+    shared.set("b", 2)
+    shared.get_many = Mock(wraps=shared.get_many)
+
+    assert cache.get_many(["a", "b", "c"]) == [1, 2, None]
+    shared.get_many.assert_called_once_with(["b", "c"])
+    assert memory.get("b") == 2
+
+
+def test_bulk_set_and_delete_use_bulk_tier_operations(cache, tiers):
+    """Prueba que set_many/delete_many llegan en bloque a cada nivel."""
+    memory, shared = tiers
+    shared.set_many = Mock(wraps=shared.set_many)
+    shared.delete_many = Mock(wraps=shared.delete_many)
+
+    assert cache.set_many({"a": 1, "b": 2}, expire=60)
+    shared.set_many.assert_called_once_with({"a": 1, "b": 2}, expire=60)
+    assert memory.get_many(["a", "b"]) == [1, 2]
+
+    assert cache.delete_many(["a", "b"])
+    shared.delete_many.assert_called_once_with(["a", "b"])
+    assert cache.get_many(["a", "b"]) == [None, None]
+
+
+def test_usda_service_with_tiered_cache(tiers):
+    """Prueba USDAService con caché por niveles y sin caché duplicada en el cliente."""
+    cache = TieredCache(tiers, ["memory", "redis"])
+    with patch("src.core.services.usda_service.USDAClient") as client_cls:
+        client = client_cls.return_value
+        client.search_foods.return_value = {"foods": [{"fdcId": 1}]}
+        service = USDAService(cache=cache)
+
+    assert service.search_foods("tomato") == [{"fdcId": 1}]
+    assert service.search_foods("tomato") == [{"fdcId": 1}]
+    client.search_foods.assert_called_once_with("tomato", 5)
+    assert type(client_cls.call_args.kwargs["cache"]).__name__ == "NullCache"
+    assert cache.stats()["memory"]["hits"] == 1
@@ -182,124 +182,6 @@ class TestDoughFormulator(unittest.TestCase):
         assert "total_score" in evaluation
         assert 0 <= evaluation["total_score"] <= 1.0
 
-    @patch.object(DoughFormulator, "load_ingredients")
-    def test_calculate_initial_proportions(self, mock_load):
-        """Prueba el cálculo de proporciones iniciales."""
-        # Crear instancia
-        formulator = DoughFormulator()
-        
-        # Crear ingrediente de prueba
-        ingredient = Ingredient(
-            name="wheat_flour",
-            color="cream",
-            nutritional_value={
-                "protein": 10.0,
-                "fiber": 2.7,
-                "fat": 1.2,
-                "carbohydrates": 76.3
-            },
-            cost=1.5,
-            availability=0.9,
-            sustainability_score=0.7,
-            texture_properties={
-                "elasticity": 0.8,
-                "firmness": 0.6,
-                "moisture": 0.4
-            }
-        )
-        
-        # Llamar al método
-        target_props = {"protein": 12.0, "fiber": 3.0}
-        proportions = formulator._calculate_initial_proportions(ingredient, target_props)
-        
-        # Verificar resultado
-        assert isinstance(proportions, list)
-        assert len(proportions) > 0
-        assert all(0 <= p <= 1.0 for p in proportions)
-        assert sum(proportions) > 0
-
-    @patch.object(DoughFormulator, "load_ingredients")
-    def test_calculate_nutritional_profile(self, mock_load):
-        """Prueba el cálculo del perfil nutricional."""
-        # Crear instancia
-        formulator = DoughFormulator()
-        
-        # Crear ingrediente de prueba
-        ingredient = Ingredient(
-            name="wheat_flour",
-            color="cream",
-            nutritional_value={
-                "protein": 10.0,
-                "fiber": 2.7
-            },
-            cost=1.5,
-            availability=0.9,
-            sustainability_score=0.7,
-            texture_properties={
-                "elasticity": 0.8,
-                "firmness": 0.6
-            }
-        )
-        
-        # Llamar al método
-        proportions = [0.5, 0.3]
-        profile = formulator._calculate_nutritional_profile(proportions, ingredient)
-        
-        # Verificar resultado
-        assert isinstance(profile, dict)
-        assert "protein" in profile
-        assert "fiber" in profile
-        assert profile["protein"] == 10.0 * 0.8  # sum of proportions is 0.8
-        assert profile["fiber"] == 2.7 * 0.8
-
-    @patch.object(DoughFormulator, "load_ingredients")
-    def test_calculate_cost(self, mock_load):
-        """Prueba el cálculo del costo de la formulación."""
-        # Crear instancia
-        formulator = DoughFormulator()
-        
-        # Crear ingrediente de prueba
-        ingredient = Ingredient(
-            name="wheat_flour",
-            color="cream",
-            nutritional_value={"protein": 10.0},
-            cost=1.5,
-            availability=0.9,
-            sustainability_score=0.7,
-            texture_properties={"elasticity": 0.8}
-        )
-        
-        # Llamar al método
-        proportions = [0.5, 0.3]
-        cost = formulator._calculate_cost(proportions, ingredient)
-        
-        # Verificar resultado
-        assert cost == 1.5 * 0.8  # cost * sum of proportions
-
-    @patch.object(DoughFormulator, "load_ingredients")
-    def test_calculate_sustainability(self, mock_load):
-        """Prueba el cálculo del score de sostenibilidad."""
-        # Crear instancia
-        formulator = DoughFormulator()
-        
-        # Crear ingrediente de prueba
-        ingredient = Ingredient(
-            name="wheat_flour",
-            color="cream",
-            nutritional_value={"protein": 10.0},
-            cost=1.5,
-            availability=0.9,
-            sustainability_score=0.7,
-            texture_properties={"elasticity": 0.8}
-        )
-        
-        # Llamar al método
-        proportions = [0.5, 0.3]
-        score = formulator._calculate_sustainability(proportions, ingredient)
-        
-        # Verificar resultado
-        assert score == 0.7 * 0.8  # sustainability_score * sum of proportions
-        
     @patch.object(DoughFormulator, "load_ingredients")
     @patch.object(DoughFormulator, "evaluate_formulation")
     def test_evaluate_formulation_score(self, mock_evaluate, mock_load):
@@ -324,4 +206,108 @@ class TestDoughFormulator(unittest.TestCase):
         
         # Verificar resultado
         assert score == 0.75
-        mock_evaluate.assert_called_once_with(formulation) 
\ No newline at end of file
+        mock_evaluate.assert_called_once_with(formulation) 
+
+    @patch.object(DoughFormulator, "load_ingredients")
+    def test_ingredient_matrix(self, mock_load):
+        """Prueba la construcción de la matriz de propiedades de ingredientes."""
+        formulator = DoughFormulator()
+        formulator.ingredients_db = {
+            category: {name: Ingredient(**data) for name, data in ingredients.items()}
+            for category, ingredients in self.mock_ingredients_data.items()
+        }
+
+        matrix = formulator.ingredient_matrix
+
+        assert matrix.names == ["wheat_flour", "chickpea_flour"]
+        assert matrix.index["chickpea_flour"] == 1
+        assert matrix.cost.tolist() == [1.5, 3.0]
+        assert matrix.nutrients.shape == (2, 4)
+        assert matrix.nutrients[1, matrix.nutrient_names.index("protein")] == 22.0
+        assert formulator.ingredient_matrix is matrix
+
+    @patch.object(DoughFormulator, "load_ingredients")
+    def test_evaluate_formulations_matches_single_evaluation(self, mock_load):
+        """Prueba que la evaluación por lotes coincide con la evaluación individual."""
+        formulator = DoughFormulator()
+        formulator.ingredients_db = {
+            category: {name: Ingredient(**data) for name, data in ingredients.items()}
+            for category, ingredients in self.mock_ingredients_data.items()
+        }
+        proportions = [[0.7, 0.3], [0.2, 0.8], [0.0, 0.0]]
+
+        batch = formulator.evaluate_formulations(proportions)
+
+        for row, (wheat, chickpea) in enumerate(proportions):
+            formulation = DoughFormulation(
+                ingredients=[{"wheat_flour": wheat}, {"chickpea_flour": chickpea}],
+                target_properties={},
+                nutritional_profile={},
+                cost=1.5 * wheat + 3.0 * chickpea,
+                sustainability_score=0.7 * wheat + 0.85 * chickpea,
+            )
+            single = formulator.evaluate_formulation(formulation)
+            for key, value in single.items():
+                assert batch[key][row] == pytest.approx(value)
+
+    @patch.object(DoughFormulator, "load_ingredients")
+    def test_evaluate_formulations_invalid_shape(self, mock_load):
+        """Prueba que se rechacen matrices con un número incorrecto de columnas."""
+        formulator = DoughFormulator()
+        formulator.ingredients_db = {
+            category: {name: Ingredient(**data) for name, data in ingredients.items()}
+            for category, ingredients in self.mock_ingredients_data.items()
+        }
+
+        with pytest.raises(ValueError):
+            formulator.evaluate_formulations([[0.5, 0.3, 0.2]])
+
+    @patch.object(DoughFormulator, "load_ingredients")
+    def test_optimize_blend_linear(self, mock_load):
+        """Prueba la optimización de mezcla sin objetivos nutricionales."""
+        formulator = DoughFormulator()
+        formulator.ingredients_db = {
+            category: {name: Ingredient(**data) for name, data in ingredients.items()}
+            for category, ingredients in self.mock_ingredients_data.items()
+        }
+
+        result = formulator.optimize_blend({}, bounds={"wheat_flour": (0.0, 0.4)})
+
+        assert result.method == "lp"
+        assert result.converged
+        proportions = {k: v for entry in result.formulation.ingredients for k, v in entry.items()}
+        assert sum(proportions.values()) == pytest.approx(1.0)
+        assert proportions["wheat_flour"] <= 0.4 + 1e-9
+        batch = formulator.evaluate_formulations(
+            [[proportions.get("wheat_flour", 0.0), proportions.get("chickpea_flour", 0.0)]]
+        )
+        assert result.objective == pytest.approx(batch["total_score"][0])
+
+    @patch.object(DoughFormulator, "load_ingredients")
+    def test_optimize_blend_nutritional_targets(self, mock_load):
+        """Prueba que la optimización se acerque a los nutrientes objetivo."""
+        formulator = DoughFormulator()
+        formulator.ingredients_db = {
+            category: {name: Ingredient(**data) for name, data in ingredients.items()}
+            for category, ingredients in self.mock_ingredients_data.items()
+        }
+
+        result = formulator.optimize_blend({"protein": 16.0}, nutrition_weight=100.0)
+
+        assert result.method == "projected_gradient"
+        assert result.converged
+        assert result.n_ingredients == 2
+        assert result.formulation.nutritional_profile["protein"] == pytest.approx(16.0, abs=0.1)
+        assert 0 <= result.score <= 1.0
+
+    @patch.object(DoughFormulator, "load_ingredients")
+    def test_optimize_blend_unknown_bound(self, mock_load):
+        """Prueba que se rechacen cotas para ingredientes inexistentes."""
+        formulator = DoughFormulator()
+        formulator.ingredients_db = {
+            category: {name: Ingredient(**data) for name, data in ingredients.items()}
+            for category, ingredients in self.mock_ingredients_data.items()
+        }
+
+        with pytest.raises(ValueError):
+            formulator.optimize_blend({}, bounds={"rye_flour": (0.0, 0.5)})
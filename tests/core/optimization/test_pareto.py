@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from src.core.optimization import ParetoArchive, non_dominated_sort, pareto_fronts
+
+
+def _reference_ranks(points):
+    """Rangos de referencia pelando frentes por comparación exhaustiva."""
+    ranks = np.full(len(points), -1)
+    remaining = set(range(len(points)))
+    rank = 0
+    while remaining:
+        front = [
+            i
+            for i in remaining
+            if not any(
+                np.all(points[j] <= points[i]) and np.any(points[j] < points[i]) for j in remaining
+            )
+        ]
+        ranks[front] = rank
+        remaining -= set(front)
+        rank += 1
+    return ranks
+
+
+def _reference_front(points):
+    """Conjunto de puntos no dominados (sin repetidos) con una matriz de dominancia."""
+    unique = np.unique(points, axis=0)
+    le = np.all(unique[:, None, :] <= unique[None, :, :], axis=2)
+    lt = np.any(unique[:, None, :] < unique[None, :, :], axis=2)
+    dominated = np.any(le & lt, axis=0)
+    return {tuple(p) for p in unique[~dominated]}
+
+
+def test_non_dominated_sort_matches_reference():
+    """Prueba que el ordenamiento rápido coincide con el pelado exhaustivo de frentes."""
+    rng = np.random.default_rng(0)
+    for n_obj in (2, 3, 4):
+        # Valores enteros para forzar empates y puntos repetidos
+        points = rng.integers(0, 6, size=(120, n_obj)).astype(float)
+        np.testing.assert_array_equal(non_dominated_sort(points), _reference_ranks(points))
+
+
+def test_pareto_fronts_partition():
+    """Prueba que los frentes particionan los índices y están ordenados del mejor al peor."""
+    points = np.array([[1.0, 1.0, 1.0], [2.0, 2.0, 2.0], [0.0, 3.0, 1.0], [3.0, 3.0, 3.0]])
+    fronts = pareto_fronts(points)
+    assert [f.tolist() for f in fronts] == [[0, 2], [1], [3]]
+    assert pareto_fronts(np.empty((0, 3))) == []
+
+
+def test_non_dominated_sort_invalid_shape():
+    """Prueba que se rechaza una entrada que no es matriz."""
+    with pytest.raises(ValueError):
+        non_dominated_sort(np.ones(3))
+
+
+def test_archive_keeps_only_non_dominated():
+    """Prueba que el archivo incremental equivale al frente de todos los puntos añadidos."""
+    rng = np.random.default_rng(1)
+    archive = ParetoArchive(max_leaf_size=4)
+    seen = []
+    for batch in range(20):
+        points = rng.random((50, 3))
+        # Puntos sobre un plano para que el frente sea grande y el árbol se divida
+        points[:, 2] = 1.5 - points[:, 0] - points[:, 1] + rng.normal(0, 0.05, 50)
+        archive.update(points, items=[(batch, i) for i in range(50)])
+        seen.append(points)
+        stored = {tuple(p) for p in archive.points()}
+        assert stored == _reference_front(np.vstack(seen))
+        assert len(archive) == len(stored)
+
+
+def test_archive_items_follow_points():
+    """Prueba que cada objeto asociado acompaña a su punto y que se rechazan repetidos."""
+    archive = ParetoArchive()
+    assert archive.add([2.0, 2.0], "a")
+    assert archive.add([1.0, 3.0], "b")
+    assert not archive.add([2.0, 2.0], "a2")
+    assert not archive.add([3.0, 3.0], "c")
+    assert archive.add([0.5, 0.5], "d")
+    assert archive.items() == ["d"]
+    assert archive.add([0.0, 1.0], "e")
+    assert sorted(archive.items()) == ["d", "e"]
+
+
+def test_archive_rejects_mismatched_dimensions():
+    """Prueba que el número de objetivos debe ser constante."""
+    archive = ParetoArchive()
+    archive.add([1.0, 2.0])
+    with pytest.raises(ValueError):
+        archive.add([1.0, 2.0, 3.0])
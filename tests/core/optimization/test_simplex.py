@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from src.core.optimization import (
+    maximize_linear_on_bounded_simplex,
+    maximize_on_bounded_simplex,
+    project_to_bounded_simplex,
+)
+
+
+def _bisection_projection(values, lower, upper):
+    """Proyección de referencia por bisección sobre tau."""
+    low, high = (values - upper).min() - 1, (values - lower).max() + 1
+    for _ in range(200):
+        tau = (low + high) / 2
+        if np.clip(values - tau, lower, upper).sum() > 1:
+            low = tau
+        else:
+            high = tau
+    return np.clip(values - (low + high) / 2, lower, upper)
+
+
+def test_project_matches_reference():
+    """Prueba que la proyección exacta coincide con una bisección de referencia."""
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        n = rng.integers(1, 10)
+        lower = rng.uniform(0, 1 / n, n)
+        upper = lower + rng.uniform(1.0 / n, 1.0, n)
+        values = rng.normal(0, 2, n)
+
+        projected = project_to_bounded_simplex(values, lower, upper)
+
+        np.testing.assert_allclose(
+            projected, _bisection_projection(values, lower, upper), atol=1e-9
+        )
+
+
+def test_project_batch_rows():
+    """Prueba la proyección de una matriz fila por fila."""
+    points = np.array([[0.5, 0.5, 0.5], [-1.0, 2.0, 0.0], [0.2, 0.3, 0.5]])
+
+    projected = project_to_bounded_simplex(points, upper=np.array([1.0, 0.6, 1.0]))
+
+    np.testing.assert_allclose(projected.sum(axis=1), 1.0)
+    assert (projected >= 0).all()
+    assert (projected[:, 1] <= 0.6 + 1e-12).all()
+    np.testing.assert_allclose(projected[2], [0.2, 0.3, 0.5])
+
+
+def test_project_infeasible_bounds():
+    """Prueba que se rechacen cotas que no permiten sumar 1."""
+    with pytest.raises(ValueError):
+        project_to_bounded_simplex([0.5, 0.5], lower=[0.6, 0.6], upper=[1.0, 1.0])
+
+
+def test_maximize_linear():
+    """Prueba la solución exacta del problema lineal sobre el simplex acotado."""
+    solution = maximize_linear_on_bounded_simplex(
+        np.array([1.0, 3.0, 2.0]), lower=np.array([0.1, 0.0, 0.0]), upper=np.array([1, 0.5, 1])
+    )
+
+    np.testing.assert_allclose(solution, [0.1, 0.5, 0.4])
+
+
+def test_maximize_concave_quadratic():
+    """Prueba la maximización de una función cuadrática cóncava con solución conocida."""
+    target = np.array([0.1, 0.2, 0.3, 0.4] + [0.0] * 96)
+    n = target.shape[0]
+
+    solution, iterations, converged = maximize_on_bounded_simplex(
+        gradient=lambda x: -2 * (x - target),
+        lipschitz=lambda indices: 2.0,
+        start=np.full(n, 1.0 / n),
+        tol=1e-10,
+        working_set_size=8,
+    )
+
+    assert converged
+    assert iterations > 0
+    np.testing.assert_allclose(solution, target, atol=1e-8)
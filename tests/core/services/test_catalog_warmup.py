@@ -0,0 +1,150 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from src.core.cache.memory_cache import MemoryCache
+from src.core.services.catalog_warmup import CatalogWarmup, catalog_from_script, load_catalog
+from src.core.services.similarity_index import NutrientSimilarityIndex
+from src.core.services.usda_service import USDAService
+
+FOODS = {
+    "tomato": {"fdcId": 1, "description": "Tomatoes, raw", "protein": 0.9},
+    "basil": {"fdcId": 2, "description": "Basil, fresh", "protein": 3.2},
+    "flour": {"fdcId": 3, "description": "Wheat flour", "protein": 10.3},
+}
+
+
+def _detail(food):
+    return {
+        "fdcId": food["fdcId"],
+        "description": food["description"],
+        "foodNutrients": [{"nutrientName": "Protein", "value": food["protein"], "unitName": "G"}],
+    }
+
+
+@pytest.fixture
+def client():
+    client = Mock()
+    client.search_foods.side_effect = lambda name, page_size: {
+        "foods": [FOODS[name]] if name in FOODS else []
+    }
+    client.get_foods_details.side_effect = lambda ids: {
+        str(food["fdcId"]): _detail(food) for food in FOODS.values() if str(food["fdcId"]) in ids
+    }
+    return client
+
+
+def test_catalog_sources():
+    """Prueba que el catálogo reúne el script, el JSON y la tabla de ingredientes."""
+    script = catalog_from_script()
+    assert len(script) > 50 and "chickpea flour" in script
+
+    session = Mock()
+    session.query.return_value = [
+        SimpleNamespace(name="Chickpea Flour", usda_id="173756"),
+        SimpleNamespace(name="mozzarella", usda_id=None),
+    ]
+    catalog = load_catalog(session=session)
+
+    assert catalog["chickpea flour"] == "173756"
+    assert catalog["beetroot"] is None
+    assert "mozzarella" in catalog
+
+
+def test_warmup_fills_cache_and_index(client):
+    """Prueba que la precarga deja los registros en caché y los vectores en el índice."""
+    cache = MemoryCache()
+    service = USDAService(cache=cache, backend=client)
+    index = NutrientSimilarityIndex()
+
+    report = CatalogWarmup(service, similarity_index=index, batch_size=2).run(
+        {"tomato": None, "basil": None, "flour": "3", "unobtainium": None}
+    )
+
+    assert report["loaded"] == 3 and report["indexed"] == 3
+    assert report["missing"] == ["unobtainium"]
+    assert report["coverage"] == pytest.approx(0.75)
+    assert len(index) == 3 and index.get_name("3") == "Wheat flour"
+    # Los detalles ya están en caché: no hay más llamadas a USDA
+    client.reset_mock()
+    assert service.get_food_details("2")["description"] == "Basil, fresh"
+    assert service.search_foods("tomato", page_size=1)[0]["fdcId"] == 1
+    client.get_food_details.assert_not_called()
+    client.search_foods.assert_not_called()
+
+
+def test_interrupted_warmup_resumes(client, tmp_path):
+    """Prueba que tras una interrupción solo se procesan los ingredientes pendientes."""
+    state_path = tmp_path / "state.json"
+    catalog = {"tomato": None, "basil": None, "unobtainium": None}
+    fetch = client.get_foods_details.side_effect
+    client.get_foods_details.side_effect = [fetch(["1"]), KeyboardInterrupt()]
+
+    first = CatalogWarmup(
+        USDAService(cache=MemoryCache(), backend=client), state_path=state_path, batch_size=1
+    )
+    with pytest.raises(KeyboardInterrupt):
+        first.run(catalog)
+    assert state_path.exists()
+
+    client.reset_mock()
+    client.get_foods_details.side_effect = fetch
+    second = CatalogWarmup(
+        USDAService(cache=MemoryCache(), backend=client), state_path=state_path, batch_size=1
+    )
+    report = second.run(catalog)
+
+    assert report["resumed"] == 1 and report["loaded"] == 1
+    assert report["coverage"] == pytest.approx(2 / 3)
+    assert client.search_foods.call_count == 2
+
+
+def test_completed_warmup_starts_over(client, tmp_path):
+    """Prueba que tras una ejecución completa (p. ej. con Redis vacío) se precarga todo."""
+    state_path = tmp_path / "state.json"
+    catalog = {"tomato": None, "basil": None}
+
+    service = USDAService(cache=MemoryCache(), backend=client)
+    assert CatalogWarmup(service, state_path=state_path).run(catalog)["loaded"] == 2
+    assert not state_path.exists()
+
+    cache = MemoryCache()
+    service = USDAService(cache=cache, backend=client)
+    report = CatalogWarmup(service, state_path=state_path).run(catalog)
+
+    assert report["loaded"] == 2 and report["resumed"] == 0
+    assert cache.get("food:1") is not None and cache.get("food:2") is not None
+
+
+def test_resumed_warmup_keeps_indexed_ingredients(client, tmp_path):
+    """Prueba que el índice guardado tras una interrupción contiene lo ya procesado."""
+    state_path, index_path = tmp_path / "state.json", tmp_path / "index.npz"
+    catalog = {"tomato": None, "basil": None, "flour": None}
+    fetch = client.get_foods_details.side_effect
+    client.get_foods_details.side_effect = [fetch(["1"]), KeyboardInterrupt()]
+
+    first = CatalogWarmup(
+        USDAService(cache=MemoryCache(), backend=client),
+        similarity_index=NutrientSimilarityIndex(),
+        state_path=state_path,
+        index_path=index_path,
+        batch_size=1,
+    )
+    with pytest.raises(KeyboardInterrupt):
+        first.run(catalog)
+
+    # Nuevo proceso: índice cargado del disco
+    client.get_foods_details.side_effect = fetch
+    index = NutrientSimilarityIndex.load(index_path)
+    report = CatalogWarmup(
+        USDAService(cache=MemoryCache(), backend=client),
+        similarity_index=index,
+        state_path=state_path,
+        index_path=index_path,
+        batch_size=1,
+    ).run(catalog)
+
+    assert report["resumed"] == 1 and report["coverage"] == 1.0
+    assert len(index) == 3 and index.get_name("1") == "Tomatoes, raw"
+    assert len(NutrientSimilarityIndex.load(index_path)) == 3
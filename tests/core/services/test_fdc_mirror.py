@@ -0,0 +1,123 @@
+import csv
+import json
+
+import pytest
+
+from src.core.services.fdc_mirror import FDCMirror
+from src.core.services.usda_service import USDAService
+
+NUTRIENTS = [
+    {"id": 1003, "name": "Protein", "unit_name": "G", "nutrient_nbr": "203"},
+    {"id": 1004, "name": "Total lipid (fat)", "unit_name": "G", "nutrient_nbr": "204"},
+    {"id": 1008, "name": "Energy", "unit_name": "KCAL", "nutrient_nbr": "208"},
+]
+FOODS = [
+    {"fdc_id": 1, "data_type": "sr_legacy_food", "description": "Tomatoes, red, ripe, raw"},
+    {"fdc_id": 2, "data_type": "sr_legacy_food", "description": "Tomato sauce, canned"},
+    {"fdc_id": 3, "data_type": "foundation_food", "description": "Cheese, mozzarella"},
+    {"fdc_id": 4, "data_type": "branded_food", "description": "Tomato ketchup"},
+]
+AMOUNTS = [(1, 1003, 0.88), (1, 1008, 18.0), (2, 1003, 1.2), (3, 1003, 22.2), (3, 1004, 22.4)]
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    """Descarga CSV de FDC en miniatura."""
+    with open(tmp_path / "nutrient.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["id", "name", "unit_name", "nutrient_nbr"])
+        writer.writeheader()
+        writer.writerows(NUTRIENTS)
+    with open(tmp_path / "food.csv", "w", newline="") as f:
+        writer = csv.DictWriter(
+            f, fieldnames=["fdc_id", "data_type", "description", "publication_date"]
+        )
+        writer.writeheader()
+        writer.writerows(FOODS)
+    with open(tmp_path / "food_nutrient.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "fdc_id", "nutrient_id", "amount"])
+        writer.writerows((i, *row) for i, row in enumerate(AMOUNTS))
+    return tmp_path
+
+
+@pytest.fixture
+def mirror(csv_dir):
+    with FDCMirror() as mirror:
+        mirror.import_csv(csv_dir, data_types=["SR Legacy", "Foundation"])
+        yield mirror
+
+
+def test_import_csv_filters_data_types(mirror):
+    """Prueba que la importación CSV respeta los tipos de datos pedidos."""
+    assert len(mirror) == 3
+    assert mirror.get_food_details(4) == {}
+
+
+def test_search_foods(mirror):
+    """Prueba la búsqueda por texto con el formato de /foods/search."""
+    result = mirror.search_foods("tomato", page_size=5)
+
+    assert [food["fdcId"] for food in result["foods"]] == [2, 1]
+    assert result["totalHits"] == 2
+    assert mirror.search_foods("cheese mozzarella")["foods"][0]["fdcId"] == 3
+    assert mirror.search_foods("pineapple")["foods"] == []
+    assert mirror.search_foods("tomato", page_size=1)["foods"][0]["fdcId"] == 2
+
+
+def test_get_food_details_has_both_nutrient_formats(mirror):
+    """Prueba que los nutrientes sirven a consumidores de detalle y de búsqueda."""
+    details = mirror.get_food_details("3")
+    protein = details["foodNutrients"][0]
+
+    assert details["description"] == "Cheese, mozzarella"
+    assert details["dataType"] == "Foundation"
+    assert protein["nutrient"] == {"id": 1003, "number": "203", "name": "Protein", "unitName": "G"}
+    assert protein["amount"] == protein["value"] == 22.2
+    assert protein["nutrientName"] == "Protein"
+    assert set(mirror.get_foods_details([1, "2", 99])) == {"1", "2"}
+
+
+def test_import_json(tmp_path):
+    """Prueba la importación de una descarga JSON de FDC."""
+    path = tmp_path / "foundation.json"
+    food = {
+        "fdcId": 10,
+        "description": "Flour, chickpea",
+        "foodNutrients": [
+            {
+                "nutrient": {"id": 1003, "number": "203", "name": "Protein", "unitName": "g"},
+                "amount": 22.0,
+            }
+        ],
+    }
+    path.write_text(json.dumps({"FoundationFoods": [food]}))
+
+    with FDCMirror(tmp_path / "mirror.sqlite") as mirror:
+        assert mirror.import_json(path) == 1
+        details = mirror.search_foods("chickpea")["foods"][0]
+
+    assert details["dataType"] == "Foundation"
+    assert details["foodNutrients"][0]["value"] == 22.0
+    # La réplica persiste en disco
+    with FDCMirror(tmp_path / "mirror.sqlite") as mirror:
+        assert len(mirror) == 1
+
+
+def test_usda_service_backend(mirror):
+    """Prueba USDAService sirviendo búsquedas, detalles y nutrición desde la réplica."""
+    service = USDAService(backend=mirror)
+
+    foods = service.search_foods("tomato")
+    assert [food["description"] for food in foods] == [
+        "Tomato sauce, canned",
+        "Tomatoes, red, ripe, raw",
+    ]
+    assert service.get_food_details("1")["foodNutrients"][1]["value"] == 18.0
+    assert service.get_food_nutrition("mozzarella")["fdcId"] == 3
+    assert set(service.get_foods_details(["1", "3"])) == {"1", "3"}
+
+
+def test_like_fallback(mirror):
+    """Prueba la búsqueda sin FTS5."""
+    mirror.has_fts = False
+    assert [food["fdcId"] for food in mirror.search_foods("tomato")["foods"]] == [2, 1]
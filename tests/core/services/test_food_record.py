@@ -0,0 +1,101 @@
+import json
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from src.core.cache.memory_cache import MemoryCache
+from src.core.services.food_record import (
+    RECORD_SCHEMA,
+    expand_food,
+    is_current,
+    normalize_food,
+    record_nutrients,
+    record_vector,
+)
+from src.core.services.nutrients import NUTRIENT_ORDER, NUTRIENT_POSITION
+from src.core.services.usda_client import USDAClient
+from src.core.services.usda_service import USDAService
+
+FOOD = {
+    "fdcId": 170457,
+    "description": "Tomatoes, red, ripe, raw",
+    "dataType": "SR Legacy",
+    "foodPortions": [{"gramWeight": 123.0, "portionDescription": "1 medium"}] * 20,
+    "foodNutrients": [
+        {
+            "nutrient": {"id": 1003, "number": "203", "name": "Protein", "unitName": "g"},
+            "amount": 0.88,
+        },
+        {
+            "nutrient": {"id": 1008, "number": "208", "name": "Energy", "unitName": "kcal"},
+            "amount": 18.0,
+        },
+        {
+            "nutrient": {"id": 1093, "number": "307", "name": "Sodium, Na", "unitName": "mg"},
+            "amount": 5.0,
+        },
+        {
+            "nutrient": {"id": 1185, "number": "430", "name": "Vitamin K", "unitName": "µg"},
+            "amount": 7.9,
+        },
+    ]
+    * 10,
+}
+
+
+def test_record_is_compact_and_keeps_known_nutrients():
+    """Prueba que el registro guarda solo los nutrientes canónicos en float32."""
+    record = normalize_food(FOOD)
+    vector = record_vector(record)
+
+    assert record["schema"] == RECORD_SCHEMA
+    assert vector.dtype == np.float32 and vector.shape == (len(NUTRIENT_ORDER),)
+    assert vector[NUTRIENT_POSITION["protein"]] == pytest.approx(0.88)
+    assert np.isnan(vector[NUTRIENT_POSITION["fat"]])
+    assert record_nutrients(record) == pytest.approx(
+        {"protein": 0.88, "energy": 18.0, "sodium": 5.0}
+    )
+    assert len(json.dumps(record)) < 300 < len(json.dumps(FOOD))
+    assert normalize_food({}) == {} and normalize_food(None) == {}
+
+
+def test_expanded_record_serves_existing_consumers():
+    """Prueba que el documento expandido sirve a los consumidores de detalles FDC."""
+    food = expand_food(normalize_food(FOOD))
+
+    assert food["fdcId"] == 170457 and food["dataType"] == "SR Legacy"
+    protein = next(n for n in food["foodNutrients"] if n["nutrientId"] == 1003)
+    assert protein["nutrient"]["name"] == protein["nutrientName"] == "Protein"
+    assert protein["amount"] == protein["value"] == 0.88
+    assert USDAClient.parse_nutrition_data(Mock(), food)["nutrients"] == {
+        "calories": 18.0,
+        "protein": 0.88,
+        "sodium": 5.0,
+    }
+    assert expand_food({"fdcId": 1}) == {"fdcId": 1}
+
+
+def test_outdated_records_are_not_current():
+    """Prueba que un registro de otro esquema se considera caducado."""
+    assert is_current(normalize_food(FOOD))
+    assert is_current({"fdcId": 1})
+    assert not is_current(dict(normalize_food(FOOD), schema=RECORD_SCHEMA - 1))
+
+
+def test_usda_service_caches_records_and_raw_documents():
+    """Prueba que el servicio guarda registros y, aparte, el documento completo."""
+    client = Mock()
+    client.get_food_details.return_value = FOOD
+    cache, raw_cache = MemoryCache(), MemoryCache()
+    service = USDAService(cache=cache, backend=client, raw_cache=raw_cache)
+
+    details = service.get_food_details("170457")
+    assert service.get_food_details("170457") == details
+    assert service.get_foods_details(["170457"]) == {"170457": details}
+    assert service.get_raw_food_details("170457") == FOOD
+    client.get_food_details.assert_called_once_with("170457")
+    client.get_foods_details.assert_not_called()
+
+    assert "foodPortions" not in details
+    assert service.get_food_record("170457") == normalize_food(FOOD)
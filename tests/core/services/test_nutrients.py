@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from src.core.services.nutrients import (
+    NUTRIENT_ORDER,
+    build_nutrient_index,
+    canonical_nutrient,
+    fdc_nutrient_entries,
+    nutrient_vector,
+)
+from src.core.services.usda_service import FoodItem, NutrientInfo
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("Protein", "protein"),
+        ("  Total lipid (FAT) ", "fat"),
+        ("Carbohydrate, by difference", "carbohydrate"),
+        ("Fiber, total dietary", "fiber"),
+        ("1003", "protein"),
+        ("vitamin c", "vitamin_c"),
+        ("Lutein + zeaxanthin", "lutein + zeaxanthin"),
+    ],
+)
+def test_canonical_nutrient(name, expected):
+    """Prueba la traducción de nombres de USDA y alias a ids canónicos."""
+    assert canonical_nutrient(name) == expected
+
+
+def test_energy_prefers_kcal():
+    """Prueba que la energía en kJ solo se usa, convertida, si no hay valor en kcal."""
+    assert build_nutrient_index([("Energy", 418.4, "kJ")]) == {"energy": pytest.approx(100.0)}
+    index = build_nutrient_index([("Energy", 418.4, "kJ"), ("Energy", 98.0, "KCAL")])
+    assert index == {"energy": 98.0}
+    index = build_nutrient_index([("Energy", 98.0, "KCAL"), ("Energy", 500.0, "kJ")])
+    assert index == {"energy": 98.0}
+
+
+def test_fdc_entries_both_layouts():
+    """Prueba la lectura de foodNutrients en formato de búsqueda y de detalle."""
+    entries = fdc_nutrient_entries(
+        [
+            {"nutrientName": "Protein", "value": 5.0, "unitName": "G"},
+            {"nutrient": {"name": "Iron, Fe", "unitName": "mg"}, "amount": 1.5},
+            {"nutrient": {"name": "Folate"}},
+        ]
+    )
+    assert entries == [("Protein", 5.0, "G"), ("Iron, Fe", 1.5, "mg")]
+
+
+def test_food_item_index_and_vector():
+    """Prueba el índice y el vector denso de un FoodItem."""
+    food = FoodItem(
+        fdcId="1",
+        description="Chickpea flour",
+        nutrients=[
+            NutrientInfo(name="Protein", amount=22.0, unit="g"),
+            NutrientInfo(name="Total lipid (fat)", amount=6.7, unit="g"),
+            NutrientInfo(name="Lutein + zeaxanthin", amount=0.1, unit="µg"),
+        ],
+    )
+
+    assert food.nutrient_index == {"protein": 22.0, "fat": 6.7, "lutein + zeaxanthin": 0.1}
+    assert food.nutrient_amount("PROTEIN") == 22.0
+    assert food.nutrient_amount("fiber") is None
+    assert food.nutrient_amount("fiber", 0.0) == 0.0
+
+    vector = food.nutrient_vector
+    assert vector.shape == (len(NUTRIENT_ORDER),)
+    assert vector[NUTRIENT_ORDER.index("protein")] == 22.0
+    assert vector.sum() == pytest.approx(28.7)
+    assert food.nutrient_vector is vector
+    with pytest.raises(ValueError):
+        vector[0] = 1.0
+
+
+def test_nutrient_vector_ignores_unknown():
+    """Prueba que los nutrientes fuera de NUTRIENT_ORDER no entran al vector."""
+    np.testing.assert_array_equal(nutrient_vector({"other": 3.0}), np.zeros(len(NUTRIENT_ORDER)))
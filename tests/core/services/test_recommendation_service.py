@@ -1,7 +1,10 @@
+import numpy as np
 import pytest
 from unittest.mock import Mock, patch
 
+from src.core.cache.memory_cache import MemoryCache
 from src.core.services.recommendation_service import RecommendationService
+from src.core.services.usda_service import USDAService
 
 
 @pytest.fixture
@@ -37,14 +40,16 @@ def test_get_recommendations_success(recommendation_service, mock_usda_service):
         {"fdcId": "456", "description": "Salsa de tomate"},
         {"fdcId": "789", "description": "Puré de tomate"}
     ]
-    mock_usda_service.get_food_details.return_value = {
-        "fdcId": "456",
-        "description": "Salsa de tomate",
-        "foodNutrients": [
-            {"nutrientName": "protein", "value": 1.5},
-            {"nutrientName": "total lipid (fat)", "value": 0.5},
-            {"nutrientName": "carbohydrate", "value": 3.5}
-        ]
+    mock_usda_service.get_foods_details.return_value = {
+        "456": {
+            "fdcId": "456",
+            "description": "Salsa de tomate",
+            "foodNutrients": [
+                {"nutrientName": "protein", "value": 1.5},
+                {"nutrientName": "total lipid (fat)", "value": 0.5},
+                {"nutrientName": "carbohydrate", "value": 3.5}
+            ]
+        }
     }
     
     # Llamar al método
@@ -59,7 +64,10 @@ def test_get_recommendations_success(recommendation_service, mock_usda_service):
     # Verificar llamadas a los métodos
     mock_usda_service.get_food_nutrition.assert_called_once_with("tomate")
     mock_usda_service.search_foods.assert_called_once_with("tomate", page_size=3)
-    mock_usda_service.get_food_details.assert_called()
+    mock_usda_service.get_foods_details.assert_called_once_with(["456", "789"])
+    mock_usda_service.get_food_details.assert_not_called()
+    assert recommendations[0]["nutrients"]["protein"] == 1.5
+    assert recommendations[1]["score"] == 0.0
 
 
 def test_enrich_recommendation(recommendation_service, mock_usda_service):
@@ -152,18 +160,21 @@ def test_extract_key_nutrients(recommendation_service):
     assert nutrients["protein"] == 1.5
 
 
-def test_get_nutritional_comparison_cache_hit(recommendation_service):
-    """Prueba la comparación nutricional con caché."""
-    # Configurar caché
-    cache_key = "comp:tomate:cebolla"
-    cached_result = {"Proteína": {"ingredient1": 1.0, "ingredient2": 1.2, "difference": 0.2}}
-    recommendation_service._cache[cache_key] = cached_result
+def test_get_nutritional_comparison_cache_hit(recommendation_service, mock_usda_service):
+    """Prueba la comparación nutricional con perfiles en caché."""
+    # Configurar caché por ingrediente
+    recommendation_service.comparison_cache.set("vector:tomate", np.array([1.0, 0, 0, 0, 0, 0]))
+    recommendation_service.comparison_cache.set("vector:cebolla", np.array([1.2, 0, 0, 0, 0, 0]))
     
-    # Llamar al método
+    # Llamar al método en ambos órdenes
     result = recommendation_service.get_nutritional_comparison("tomate", "cebolla")
+    reverse = recommendation_service.get_nutritional_comparison("Cebolla", "tomate")
     
-    # Verificar resultado
-    assert result == cached_result
+    # Verificar resultado sin llamadas a USDA
+    assert result["Proteína"]["difference"] == pytest.approx(0.2)
+    assert reverse["Proteína"]["difference"] == pytest.approx(-0.2)
+    mock_usda_service.search_foods.assert_not_called()
+    mock_usda_service.get_food_details.assert_not_called()
 
 
 def test_get_nutritional_comparison_success(recommendation_service, mock_usda_service):
@@ -220,4 +231,65 @@ def test_get_nutritional_comparison_error(recommendation_service, mock_usda_serv
     result = recommendation_service.get_nutritional_comparison("tomate", "cebolla")
     
     # Verificar resultado
-    assert result == {} 
\ No newline at end of file
+    assert result == {}
+
+
+def test_get_comparison_matrix(recommendation_service, mock_usda_service):
+    """Prueba la matriz de comparación con una sola petición de detalles en bloque."""
+    proteins = {"tomate": 1.0, "cebolla": 1.2, "queso": 25.0}
+    mock_usda_service.search_foods.side_effect = lambda name, page_size: [
+        {"fdcId": name, "description": name}
+    ]
+    mock_usda_service.get_foods_details.side_effect = lambda ids: {
+        fdc_id: {"foodNutrients": [{"nutrient": {"name": "Protein"}, "amount": proteins[fdc_id]}]}
+        for fdc_id in ids
+    }
+    
+    # Llamar al método
+    result = recommendation_service.get_comparison_matrix(["tomate", "cebolla", "queso"])
+    
+    # Verificar resultado
+    protein = result["nutrients"]["Proteína"]
+    assert result["ingredients"] == ["tomate", "cebolla", "queso"]
+    assert protein["values"] == [1.0, 1.2, 25.0]
+    assert protein["differences"][0][2] == pytest.approx(24.0)
+    assert protein["differences"][2][0] == pytest.approx(-24.0)
+    mock_usda_service.get_foods_details.assert_called_once()
+    
+    # Los perfiles quedan en caché para comparaciones posteriores
+    mock_usda_service.reset_mock()
+    pair = recommendation_service.get_nutritional_comparison("queso", "tomate")
+    assert pair["Proteína"]["difference"] == pytest.approx(-24.0)
+    mock_usda_service.search_foods.assert_not_called()
+
+
+def test_similarity_score_same_with_and_without_cache():
+    """Prueba que el puntaje no cambia cuando los detalles salen de un registro en caché."""
+    raw = {
+        "fdcId": 456,
+        "description": "Salsa de tomate",
+        "foodNutrients": [
+            {"nutrient": {"id": 1003, "name": "Protein", "unitName": "g"}, "amount": 1.5},
+            {"nutrient": {"id": 1004, "name": "Total lipid (fat)", "unitName": "g"}, "amount": 0.5},
+            {"nutrient": {"id": 1008, "name": "Energy", "unitName": "kcal"}, "amount": 29.0},
+            {"nutrient": {"id": 1051, "name": "Water", "unitName": "g"}, "amount": 89.0},
+        ]
+        + [
+            {
+                "nutrient": {"id": 3000 + i, "name": f"Amino acid {i}", "unitName": "g"},
+                "amount": 0.1,
+            }
+            for i in range(80)
+        ],
+    }
+    backend = Mock()
+    backend.get_food_details.return_value = raw
+    food = {"fdcId": 456, "description": "Salsa de tomate"}
+
+    uncached = RecommendationService(usda_service=USDAService(backend=backend))
+    cached = RecommendationService(usda_service=USDAService(cache=MemoryCache(), backend=backend))
+
+    score = uncached._enrich_recommendation(food)["score"]
+    assert score == pytest.approx(5.0)
+    assert cached._enrich_recommendation(food)["score"] == pytest.approx(score)
+    assert cached._enrich_recommendation(food)["score"] == pytest.approx(score)
@@ -0,0 +1,151 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from src.core.services.nutrients import NUTRIENT_ORDER
+from src.core.services.recommendation_service import RecommendationService
+from src.core.services.similarity_index import NutrientSimilarityIndex
+
+
+def _fdc_food(fdc_id, description, **amounts):
+    return {
+        "fdcId": fdc_id,
+        "description": description,
+        "foodNutrients": [
+            {"nutrientName": name, "value": value, "unitName": "G"}
+            for name, value in amounts.items()
+        ],
+    }
+
+
+@pytest.fixture
+def flours():
+    return [
+        _fdc_food(1, "Chickpea flour", protein=22.0, fat=6.7, carbohydrate=58.0, fiber=11.0),
+        _fdc_food(2, "Lentil flour", protein=24.0, fat=1.5, carbohydrate=60.0, fiber=10.5),
+        _fdc_food(3, "Wheat flour, white", protein=10.3, fat=1.0, carbohydrate=76.0, fiber=2.7),
+        _fdc_food(4, "Olive oil", fat=100.0),
+        _fdc_food(5, "Butter", protein=0.9, fat=81.0, carbohydrate=0.1),
+    ]
+
+
+@pytest.fixture
+def random_index():
+    rng = np.random.default_rng(0)
+    index = NutrientSimilarityIndex(n_lists=16, n_probe=4)
+    centers = rng.uniform(0, 50, size=(8, len(NUTRIENT_ORDER)))
+    for i in range(1000):
+        vector = np.abs(centers[i % 8] + rng.normal(0, 3, len(NUTRIENT_ORDER)))
+        index.add(i, vector, f"food {i}")
+    return index
+
+
+def test_exact_query(flours):
+    """Prueba que los vecinos exactos agrupan harinas y grasas."""
+    index = NutrientSimilarityIndex()
+    for food in flours:
+        assert index.add_food(food)
+
+    similar = index.similar_to(1, k=2)
+    assert [key for key, _, _ in similar] == ["2", "3"]
+    assert similar[0][1] == "Lentil flour"
+    assert similar[0][2] <= similar[1][2]
+    assert index.similar_to(4, k=1)[0][0] == "5"
+    assert index.find("chickpea") == "1"
+
+
+@pytest.mark.parametrize("metric", ["cosine", "euclidean"])
+def test_approximate_query_recall(random_index, metric):
+    """Prueba que la consulta IVF recupera casi todos los vecinos exactos."""
+    random_index.metric = metric
+    random_index._reset_derived()
+    rng = np.random.default_rng(1)
+    hits = 0
+    for key in rng.choice(len(random_index), size=20, replace=False):
+        exact = {k for k, _, _ in random_index.similar_to(key, k=10)}
+        approx = {k for k, _, _ in random_index.similar_to(key, k=10, exact=False)}
+        hits += len(exact & approx)
+    assert hits / 200 >= 0.9
+
+
+def test_save_and_load(tmp_path, random_index):
+    """Prueba que el índice persiste en disco y responde igual al cargarlo."""
+    path = tmp_path / "index.npz"
+    random_index.save(path)
+    loaded = NutrientSimilarityIndex.load(path)
+
+    assert len(loaded) == len(random_index)
+    assert loaded.get_name("7") == "food 7"
+    assert loaded.similar_to("7", k=5) == random_index.similar_to("7", k=5)
+
+
+def test_add_replaces_existing_key(flours):
+    """Prueba que añadir una clave existente reemplaza su vector."""
+    index = NutrientSimilarityIndex(metric="euclidean")
+    index.add_food(flours[0])
+    index.add_food(flours[3])
+    index.add_food(_fdc_food(1, "Chickpea flour", fat=95.0))
+
+    assert len(index) == 2
+    assert index.get_vector(1)[NUTRIENT_ORDER.index("fat")] == 95.0
+    with pytest.raises(ValueError):
+        NutrientSimilarityIndex(metric="manhattan")
+
+
+def test_readd_unchanged_keeps_index_built(random_index):
+    """Prueba que volver a añadir un vector sin cambios no invalida el índice."""
+    random_index.similar_to(0, k=5, exact=False)
+    centroids = random_index._centroids
+
+    random_index.add(0, random_index.get_vector(0).copy(), "")
+    random_index.similar_to(0, k=5, exact=False)
+
+    assert random_index._centroids is centroids
+    assert random_index.get_name(0) == "food 0"
+
+
+def test_new_rows_join_nearest_list(random_index):
+    """Prueba que un ingrediente nuevo se consulta sin re-agrupar el índice."""
+    random_index.similar_to(0, k=5, exact=False)
+    centroids = random_index._centroids
+
+    random_index.add("new", random_index.get_vector(3) + 0.01, "new food")
+    random_index.add(5, random_index.get_vector(5) + 1.0)
+    similar = random_index.similar_to(3, k=1, exact=False)
+
+    assert random_index._centroids is centroids
+    assert similar[0][0] == "new"
+    assert sum(len(rows) for rows in random_index._lists) == len(random_index)
+
+
+def test_rebuilds_after_growth(random_index):
+    """Prueba que el k-means se recalcula cuando el índice crece lo suficiente."""
+    random_index.similar_to(0, k=5, exact=False)
+    centroids = random_index._centroids
+
+    rng = np.random.default_rng(2)
+    for i in range(250):
+        random_index.add(f"extra {i}", rng.uniform(0, 50, len(NUTRIENT_ORDER)))
+    random_index.similar_to(0, k=5, exact=False)
+
+    assert random_index._centroids is not centroids
+    assert random_index._built_size == len(random_index)
+
+
+def test_service_similar_ingredients_are_local(flours):
+    """Prueba que con el índice poblado la consulta no llama a USDA."""
+    usda_service = Mock()
+    usda_service.get_food_nutrition.return_value = flours[0]
+    service = RecommendationService(usda_service, similarity_index=NutrientSimilarityIndex())
+    for food in flours[1:]:
+        service._index_food(food)
+
+    similar = service.get_similar_ingredients("chickpea flour", limit=2)
+    assert [item["name"] for item in similar] == ["Lentil flour", "Wheat flour, white"]
+    assert similar[0]["nutrients"]["protein"] == 24.0
+    usda_service.get_food_nutrition.assert_called_once_with("chickpea flour")
+
+    usda_service.get_food_nutrition.reset_mock()
+    assert len(service.get_similar_ingredients("Chickpea flour", limit=3)) == 3
+    usda_service.get_food_nutrition.assert_not_called()
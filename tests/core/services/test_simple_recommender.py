@@ -9,7 +9,7 @@ class TestSimpleRecommender(unittest.TestCase):
         self.api_key = "test_api_key"
         self.recommender = SimpleRecommender(self.api_key)
 
-    @patch('src.core.services.simple_recommender.requests.get')
+    @patch('requests.Session.get')
     def test_search_foods(self, mock_get):
         """Prueba la búsqueda de alimentos."""
         # Configurar el mock
@@ -32,7 +32,7 @@ class TestSimpleRecommender(unittest.TestCase):
         self.assertEqual(foods[0]["description"], "Tomato")
         self.assertEqual(foods[1]["fdcId"], "456")
 
-    @patch('src.core.services.simple_recommender.requests.get')
+    @patch('requests.Session.get')
     def test_get_food_details(self, mock_get):
         """Prueba la obtención de detalles de un alimento."""
         # Configurar el mock
@@ -81,6 +81,27 @@ class TestSimpleRecommender(unittest.TestCase):
         self.assertIn("score", recommendations[0])
         self.assertIn("nutrients", recommendations[0])
 
+    @patch('requests.Session.get')
+    def test_search_foods_uses_cache(self, mock_get):
+        """Prueba que una búsqueda repetida se sirve desde la caché."""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"foods": [{"description": "Tomato", "fdcId": "123"}]}
+        mock_response.status_code = 200
+        mock_get.return_value = mock_response
+
+        self.recommender.search_foods("tomato")
+        foods = self.recommender.search_foods("tomato")
+
+        mock_get.assert_called_once()
+        self.assertEqual(foods[0]["fdcId"], "123")
+
+    def test_session_has_timeout_and_retries(self):
+        """Prueba que la sesión aplica timeout y reintentos por defecto."""
+        adapter = self.recommender.session.get_adapter("https://api.nal.usda.gov")
+        self.assertIsNotNone(adapter.timeout)
+        self.assertGreater(adapter.max_retries.total, 0)
+        self.assertEqual(self.recommender.session.headers["X-Api-Key"], self.api_key)
+
 
 if __name__ == "__main__":
     unittest.main()
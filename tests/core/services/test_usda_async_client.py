@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.core.services.usda_async_client import AsyncUSDAClient, TokenBucket
+
+BASE_URL = "https://api.example.com"
+
+
+def _client(handler, **kwargs):
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("rate_limit", 3600 * 1000)
+    kwargs.setdefault("burst", 1000)
+    return AsyncUSDAClient(
+        api_key="test_api_key",
+        base_url=BASE_URL,
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_searches_share_one_request():
+    """Prueba que las búsquedas idénticas concurrentes comparten una petición."""
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json={"foods": [{"fdcId": 1, "description": "Tomato"}]})
+
+    async with _client(handler) as client:
+        results = await asyncio.gather(*(client.search_foods("tomato") for _ in range(10)))
+        cached = await client.search_foods("tomato")
+
+    assert len(calls) == 1
+    assert calls[0].headers["X-Api-Key"] == "test_api_key"
+    assert calls[0].url.params["query"] == "tomato"
+    assert all(result["foods"][0]["fdcId"] == 1 for result in results + [cached])
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors():
+    """Prueba que 5xx y 429 se reintentan hasta obtener respuesta."""
+    statuses = iter([503, 429, 200])
+
+    def handler(request):
+        status = next(statuses)
+        headers = {"Retry-After": "0"} if status == 429 else {}
+        return httpx.Response(status, json={"fdcId": 123}, headers=headers)
+
+    async with _client(handler, max_retries=3) as client:
+        result = await client.get_food_details(123)
+
+    assert result == {"fdcId": 123}
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    """Prueba que tras agotar los reintentos se devuelve el valor vacío."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ConnectError("Error de conexión", request=request)
+
+    async with _client(handler, max_retries=2) as client:
+        search = await client.search_foods("tomato")
+        details = await client.get_food_details(1)
+
+    assert len(calls) == 6
+    assert search["foods"] == [] and search["totalHits"] == 0
+    assert details == {}
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    """Prueba que un 404 no se reintenta."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    async with _client(handler) as client:
+        assert await client.get_food_details(1) == {}
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_foods_details_in_concurrent_chunks():
+    """Prueba el endpoint multi-id en bloques concurrentes y con caché."""
+    requested = []
+
+    async def handler(request):
+        ids = httpx.Response(200, content=request.content).json()["fdcIds"]
+        requested.append(ids)
+        return httpx.Response(200, json=[{"fdcId": i} for i in ids])
+
+    async with _client(handler) as client:
+        first = await client.get_foods_details(range(45))
+        second = await client.get_foods_details(["3", "44"])
+
+    assert sorted(map(len, requested)) == [5, 20, 20]
+    assert len(first) == 45
+    assert second == {"3": {"fdcId": 3}, "44": {"fdcId": 44}}
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    """Prueba que el bucket espacia las peticiones según la tasa."""
+    bucket = TokenBucket(rate=100, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        await bucket.acquire()
+    assert time.monotonic() - start >= 0.045
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_follows_rate_limit_headers():
+    """Prueba que las cabeceras de FDC ajustan la tasa y los tokens disponibles."""
+    bucket = TokenBucket(rate=1000, capacity=10)
+    bucket.update_from_headers(
+        httpx.Headers({"X-RateLimit-Limit": "3600", "X-RateLimit-Remaining": "2"})
+    )
+
+    assert bucket.rate == pytest.approx(1.0)
+    assert bucket._tokens <= 2
@@ -242,4 +242,35 @@ class TestUSDAClient(unittest.TestCase):
         result = self.client.get_food_by_name("tomato")
         
         # Verificar resultado
-        self.assertIsNone(result) 
\ No newline at end of file
+        self.assertIsNone(result)
+
+    @patch("requests.Session.post")
+    def test_get_foods_details_batches_ids(self, mock_post):
+        """Prueba que los detalles se piden en bloques al endpoint multi-id."""
+        def respond(url, json):
+            response = Mock()
+            response.json.return_value = [
+                {"fdcId": fdc_id, "description": f"Food {fdc_id}"} for fdc_id in json["fdcIds"]
+            ]
+            return response
+
+        mock_post.side_effect = respond
+        self.client._cache["food:5"] = {"fdcId": 5, "description": "Cached"}
+
+        result = self.client.get_foods_details(range(1, 46))
+
+        # 44 ids sin caché -> bloques de 20, 20 y 4
+        self.assertEqual(mock_post.call_count, 3)
+        mock_post.assert_any_call(f"{self.base_url}/foods", json={"fdcIds": list(range(42, 46))})
+        self.assertEqual(len(result), 45)
+        self.assertEqual(result["5"]["description"], "Cached")
+        self.assertEqual(self.client._cache["food:45"]["description"], "Food 45")
+
+    @patch("requests.Session.post")
+    def test_get_foods_details_error(self, mock_post):
+        """Prueba que un bloque fallido se omite sin interrumpir el resto."""
+        mock_post.side_effect = requests.exceptions.RequestException("Error de conexión")
+
+        result = self.client.get_foods_details(["1", "2"])
+
+        self.assertEqual(result, {})
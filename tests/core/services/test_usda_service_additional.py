@@ -1,9 +1,18 @@
 import pytest
 from unittest.mock import Mock, patch
 
+from src.core.cache.loader import unwrap
+from src.core.services.food_record import normalize_food
 from src.core.services.usda_service import USDAService
 
 
+def stored(mock_set):
+    """(clave, valor, expiración) de la única escritura en caché, sin metadatos."""
+    mock_set.assert_called_once()
+    key, entry = mock_set.call_args.args
+    return key, unwrap(entry)[0], mock_set.call_args.kwargs["expire"]
+
+
 class TestUSDAServiceErrorCases:
     """Pruebas para escenarios de error y caché en USDAService."""
 
@@ -60,10 +69,11 @@ class TestUSDAServiceErrorCases:
         mock_usda_client.search_foods.assert_called_once_with("tomate", 5)
         
         # Verificar que se guardó en caché
-        mock_cache.set.assert_called_once_with(
-            "search:tomate:5", 
-            [{"fdcId": "123", "description": "Tomate"}], 
-            expire=3600
+        # (1 hora + 1 hora en la que puede servirse obsoleto mientras se refresca)
+        assert stored(mock_cache.set) == (
+            "search:tomate:5",
+            [{"fdcId": "123", "description": "Tomate"}],
+            7200,
         )
         
         # Verificar resultado
@@ -124,15 +134,13 @@ class TestUSDAServiceErrorCases:
         # Verificar que se llamó al cliente
         mock_usda_client.get_food_details.assert_called_once_with("123")
         
-        # Verificar que se guardó en caché
-        mock_cache.set.assert_called_once_with(
-            "food:123", 
-            {"fdcId": "123", "description": "Tomate"}, 
-            expire=86400
-        )
+        # Verificar que se guardó en caché el registro compacto
+        key, record, expire = stored(mock_cache.set)
+        assert (key, expire) == ("food:123", 86400 + 3600)
+        assert record == normalize_food({"fdcId": "123", "description": "Tomate"})
         
         # Verificar resultado
-        assert result == {"fdcId": "123", "description": "Tomate"}
+        assert result == {"fdcId": "123", "description": "Tomate", "foodNutrients": []}
 
     def test_get_food_nutrition_no_results(self, mock_usda_client):
         """Prueba la obtención de nutrición de alimento sin resultados."""
@@ -176,4 +184,61 @@ class TestUSDAServiceErrorCases:
         # Verificar resultado
         assert result["fdcId"] == "123"
         assert result["description"] == "Tomate"
-        assert "foodNutrients" in result 
\ No newline at end of file
+        assert "foodNutrients" in result
+
+    def test_get_foods_details_with_partial_cache(self, mock_usda_client, mock_cache):
+        """Prueba que los aciertos de caché se leen juntos y solo se piden los fallos."""
+        mock_cache.get_many.return_value = [{"fdcId": "1"}, None, None]
+        mock_usda_client.get_foods_details.return_value = {"2": {"fdcId": "2"}}
+
+        service = USDAService(cache=mock_cache)
+        result = service.get_foods_details(["1", "2", "3", "2"])
+
+        mock_cache.get_many.assert_called_once_with(["food:1", "food:2", "food:3"])
+        mock_usda_client.get_foods_details.assert_called_once_with(["2", "3"])
+        writes = {
+            key: (unwrap(entry)[0], call.kwargs["expire"])
+            for call in mock_cache.set_many.call_args_list
+            for key, entry in call.args[0].items()
+        }
+        assert writes["food:2"] == (normalize_food({"fdcId": "2"}), 86400 + 3600)
+        # El alimento inexistente se guarda como resultado negativo
+        assert writes["food:3"] == ({}, 600)
+        assert result == {
+            "1": {"fdcId": "1"},
+            "2": {"fdcId": "2", "description": "", "foodNutrients": []},
+        }
+
+    def test_get_foods_details_all_cached(self, mock_usda_client, mock_cache):
+        """Prueba que sin fallos de caché no se llama a la API."""
+        mock_cache.get_many.return_value = [{"fdcId": "1"}]
+
+        service = USDAService(cache=mock_cache)
+
+        assert service.get_foods_details(["1"]) == {"1": {"fdcId": "1"}}
+        mock_usda_client.get_foods_details.assert_not_called()
+
+    def test_empty_search_is_negatively_cached(self, mock_usda_client, mock_cache):
+        """Prueba que una búsqueda sin resultados se guarda con expiración corta."""
+        mock_cache.get.return_value = None
+        mock_usda_client.search_foods.return_value = {"foods": []}
+
+        service = USDAService(cache=mock_cache)
+
+        assert service.search_foods("xyz") == []
+        assert stored(mock_cache.set) == ("search:xyz:5", [], 600)
+
+        # Con el resultado negativo en caché no se vuelve a consultar la API
+        mock_cache.get.return_value = []
+        mock_usda_client.search_foods.reset_mock()
+        assert service.search_foods("xyz") == []
+        mock_usda_client.search_foods.assert_not_called()
+
+    def test_negative_details_are_not_refetched(self, mock_usda_client, mock_cache):
+        """Prueba que los alimentos marcados como inexistentes no se piden de nuevo."""
+        mock_cache.get_many.return_value = [{}, {"fdcId": "2"}]
+
+        service = USDAService(cache=mock_cache)
+
+        assert service.get_foods_details(["1", "2"]) == {"2": {"fdcId": "2"}}
+        mock_usda_client.get_foods_details.assert_not_called()
@@ -0,0 +1,159 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.core.services.usda_service import FoodItem, NutrientInfo
+from src.features.recommendations.recommendation_engine import (
+    DietProfile,
+    RecommendationEngine,
+    UserPreferences,
+    _top_k,
+)
+
+
+@pytest.fixture
+def engine():
+    with patch("src.features.recommendations.recommendation_engine.USDAService"), patch(
+        "src.features.recommendations.recommendation_engine.NutritionAnalyzer"
+    ):
+        yield RecommendationEngine()
+
+
+def _food(fdc_id, description, **amounts):
+    return FoodItem(
+        fdcId=str(fdc_id),
+        description=description,
+        nutrients=[
+            NutrientInfo(name=name, amount=value, unit="g") for name, value in amounts.items()
+        ],
+    )
+
+
+@pytest.fixture
+def foods():
+    rng = np.random.default_rng(0)
+    names = ["cheese pizza", "tomato sauce", "whole wheat dough", "mozzarella cheese", "basil"]
+    return [
+        _food(
+            i,
+            f"{names[i % len(names)]} {i}",
+            Protein=float(rng.uniform(0, 30)),
+            Fat=float(rng.uniform(0, 20)),
+            Fiber=float(rng.choice([0.0, rng.uniform(0, 5)])),
+        )
+        for i in range(40)
+    ]
+
+
+def test_top_k_matches_stable_sort():
+    """Prueba que la selección parcial coincide con un ordenamiento estable, con empates."""
+    rng = np.random.default_rng(1)
+    scores = rng.choice([0.0, 0.2, 0.5, 0.7, 0.9], size=200)
+    for k in (0, 1, 5, 37, 500):
+        positive = [i for i in range(len(scores)) if scores[i] > 0]
+        expected = sorted(positive, key=lambda i: -scores[i])[:k]
+        assert _top_k(scores, k).tolist() == expected
+
+
+@pytest.mark.asyncio
+async def test_vectorized_scores_match_per_food_scores(engine, foods):
+    """Prueba que score_candidates reproduce _calculate_food_score."""
+    diet = [foods[0], foods[1]]
+    users = [
+        UserPreferences(),
+        UserPreferences(nutritional_goals={"Protein": 20.0, "fiber": 2.0}),
+        UserPreferences(favorite_ingredients=["Cheese", "dough"]),
+        UserPreferences(nutritional_goals={"fat": 10.0}, favorite_ingredients=["basil"]),
+    ]
+    for current_diet in ([], diet):
+        profiles = [DietProfile(current_diet)] * len(users)
+        scores = engine.score_candidates(foods, users, profiles)
+        for u, prefs in enumerate(users):
+            expected = [
+                await engine._calculate_food_score(food, prefs, current_diet) for food in foods
+            ]
+            np.testing.assert_allclose(scores[u], expected)
+
+
+@pytest.mark.asyncio
+async def test_get_recommendations_top_k(engine, foods):
+    """Prueba que solo se materializan los mejores candidatos, en orden descendente."""
+    engine.usda_service.search_foods = lambda term: [
+        {
+            "fdcId": food.fdcId,
+            "description": food.description,
+            "foodNutrients": [
+                {"nutrientName": n.name, "value": n.amount, "unitName": n.unit}
+                for n in food.nutrients
+            ],
+        }
+        for food in foods
+    ]
+    prefs = UserPreferences(nutritional_goals={"protein": 15.0}, favorite_ingredients=["cheese"])
+
+    with patch.object(
+        engine, "_generate_recommendation_reasons", wraps=engine._generate_recommendation_reasons
+    ) as reasons:
+        recommendations = await engine.get_recommendations(prefs, foods[:3], limit=4)
+
+    assert reasons.call_count == 4
+    scores = [rec.score for rec in recommendations]
+    assert scores == sorted(scores, reverse=True)
+    expected = sorted(
+        [await engine._calculate_food_score(food, prefs, foods[:3]) for food in foods],
+        reverse=True,
+    )[:4]
+    np.testing.assert_allclose(scores, expected)
+
+
+@pytest.mark.asyncio
+async def test_batch_matches_single_user(engine, foods):
+    """Prueba que el lote da el mismo resultado que cada usuario por separado."""
+    users = {
+        "ana": UserPreferences(nutritional_goals={"protein": 25.0}),
+        "luis": UserPreferences(favorite_ingredients=["tomato"], dietary_restrictions=["cheese"]),
+        "eva": UserPreferences(nutritional_goals={"fat": 5.0}, favorite_ingredients=["dough"]),
+    }
+    diets = {"luis": foods[:2]}
+
+    with patch.object(engine, "_get_potential_foods") as pool:
+        results = await engine.get_recommendations_batch(
+            users, diets, limit=3, candidate_foods=foods
+        )
+    pool.assert_not_called()
+
+    assert set(results) == set(users)
+    assert all("cheese" not in rec.food_item.description for rec in results["luis"])
+    for user_id, prefs in users.items():
+        allowed = [
+            food
+            for food in foods
+            if not any(r in food.description for r in prefs.dietary_restrictions)
+        ]
+        profile = DietProfile(diets.get(user_id, []))
+        single = engine.score_candidates(allowed, [prefs], [profile])[0]
+        expected = [allowed[i].fdcId for i in _top_k(single, 3)]
+        assert [rec.food_item.fdcId for rec in results[user_id]] == expected
+
+
+@pytest.mark.asyncio
+async def test_batch_shares_candidate_search(engine):
+    """Prueba que el lote busca una sola vez cada término de todos los usuarios."""
+    searched = []
+
+    def search_foods(term):
+        searched.append(term)
+        return [{"fdcId": term, "description": f"{term} food", "foodNutrients": []}]
+
+    engine.usda_service.search_foods = search_foods
+    users = {
+        "a": UserPreferences(favorite_ingredients=["cheese", "tomato"]),
+        "b": UserPreferences(favorite_ingredients=["tomato", "basil"]),
+    }
+
+    results = await engine.get_recommendations_batch(users, limit=5)
+
+    assert sorted(searched) == ["basil", "cheese", "tomato"]
+    assert {rec.food_item.fdcId for rec in results["a"][:2]} == {"cheese", "tomato"}
+    assert len(results["b"]) == 3
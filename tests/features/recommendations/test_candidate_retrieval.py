@@ -0,0 +1,102 @@
+import asyncio
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.core.services.usda_service import FoodItem
+from src.features.recommendations.recommendation_engine import (
+    RecommendationEngine,
+    UserPreferences,
+)
+
+
+@pytest.fixture
+def engine():
+    with patch("src.features.recommendations.recommendation_engine.USDAService"), patch(
+        "src.features.recommendations.recommendation_engine.NutritionAnalyzer"
+    ):
+        yield RecommendationEngine(max_concurrent_searches=3)
+
+
+def _food(fdc_id, description):
+    return {
+        "fdcId": fdc_id,
+        "description": description,
+        "foodNutrients": [{"nutrientName": "Protein", "value": 10.0, "unitName": "G"}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_searches_run_concurrently_with_bound(engine):
+    """Prueba que las búsquedas se solapan sin superar el límite del semáforo."""
+    state = {"active": 0, "peak": 0}
+
+    async def search_foods(term):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.05)
+        state["active"] -= 1
+        return [_food(term, f"{term} food")]
+
+    engine.usda_service.search_foods = search_foods
+    prefs = UserPreferences(favorite_ingredients=[f"term{i}" for i in range(9)])
+
+    start = time.perf_counter()
+    foods = await engine._get_potential_foods(prefs)
+    elapsed = time.perf_counter() - start
+
+    assert len(foods) == 9
+    assert state["peak"] == 3
+    assert elapsed < 0.05 * 9 / 2
+
+
+@pytest.mark.asyncio
+async def test_sync_service_runs_in_thread_and_dedupes(engine):
+    """Prueba que un servicio síncrono funciona y que se deduplica por fdcId."""
+    engine.usda_service.search_foods = Mock(
+        side_effect=lambda term: [_food(1, "Cheese pizza"), _food(2, f"{term} vegan dough")]
+    )
+    prefs = UserPreferences(favorite_ingredients=["cheese", "tomato"])
+
+    foods = await engine._get_potential_foods(prefs)
+
+    assert sorted(food.fdcId for food in foods) == ["1", "2"]
+    assert all(isinstance(food, FoodItem) for food in foods)
+    assert foods[0].nutrients[0].name == "Protein"
+
+
+@pytest.mark.asyncio
+async def test_restrictions_and_failed_terms(engine):
+    """Prueba el filtro de restricciones y que un término fallido no corta el resto."""
+
+    def search_foods(term):
+        if term == "broken":
+            raise RuntimeError("USDA no disponible")
+        return [_food(1, "Vegan cheese"), _food(2, "Mozzarella cheese")]
+
+    engine.usda_service.search_foods = search_foods
+    prefs = UserPreferences(
+        favorite_ingredients=["broken", "cheese"], dietary_restrictions=["Vegan"]
+    )
+
+    foods = await engine._get_potential_foods(prefs)
+
+    assert [food.description for food in foods] == ["Mozzarella cheese"]
+
+
+def test_food_item_from_usda_detail_document():
+    """Prueba la conversión de un documento de detalle de USDA."""
+    food = FoodItem.from_usda(
+        {
+            "fdcId": 123,
+            "description": "Rice flour",
+            "foodNutrients": [
+                {"nutrient": {"name": "Protein", "unitName": "g"}, "amount": 6.0},
+                {"nutrient": {"name": "Iron"}},
+            ],
+        }
+    )
+
+    assert food.fdcId == "123"
+    assert [(n.name, n.amount, n.unit) for n in food.nutrients] == [("Protein", 6.0, "g")]
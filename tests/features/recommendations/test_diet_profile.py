@@ -0,0 +1,78 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.core.services.nutrients import NUTRIENT_ORDER
+from src.core.services.usda_service import FoodItem, NutrientInfo
+from src.features.recommendations.recommendation_engine import (
+    DietProfile,
+    RecommendationEngine,
+    UserPreferences,
+)
+
+
+def _food(fdc_id, **amounts):
+    return FoodItem(
+        fdcId=str(fdc_id),
+        description=f"Food {fdc_id}",
+        nutrients=[
+            NutrientInfo(name=name, amount=value, unit="g") for name, value in amounts.items()
+        ],
+    )
+
+
+@pytest.fixture
+def diet():
+    return [_food(1, Protein=10.0, Fat=5.0), _food(2, protein=2.0, Carbohydrate=20.0)]
+
+
+def test_profile_totals(diet):
+    """Prueba que los totales agregan la dieta por nutriente canónico."""
+    profile = DietProfile(diet)
+    expected = np.zeros(len(NUTRIENT_ORDER))
+    for nutrient, amount in {"protein": 12.0, "fat": 5.0, "carbohydrate": 20.0}.items():
+        expected[NUTRIENT_ORDER.index(nutrient)] = amount
+    np.testing.assert_allclose(profile.totals, expected)
+
+
+def test_balance_score_by_vector_addition(diet):
+    """Prueba que el balance coincide con recalcular el perfil con el alimento añadido."""
+    candidate = _food(3, protein=6.0, fat=0.0, fiber=3.0)
+    current = DietProfile(diet).totals
+    new = DietProfile(diet + [candidate]).totals
+    present = current > 0
+    expected = np.mean(np.maximum((new - current)[present] / current[present], 0))
+
+    assert DietProfile(diet).balance_score(candidate) == pytest.approx(expected)
+    assert DietProfile([]).balance_score(candidate) == 0.5
+
+
+def test_benefits(diet):
+    """Prueba los beneficios con y sin dieta actual."""
+    candidate = _food(3, Protein=6.0, Fat=0.0, Fiber=3.0)
+    assert DietProfile(diet).benefits(candidate) == {"protein": 6.0, "fiber": 3.0}
+    assert DietProfile([]).benefits(candidate) == {"Protein": 6.0, "Fat": 0.0, "Fiber": 3.0}
+
+
+@pytest.mark.asyncio
+async def test_profile_built_once_per_request(diet):
+    """Prueba que el perfil de la dieta se construye una sola vez por solicitud."""
+    with patch("src.features.recommendations.recommendation_engine.USDAService"), patch(
+        "src.features.recommendations.recommendation_engine.NutritionAnalyzer"
+    ):
+        engine = RecommendationEngine()
+    engine.usda_service.search_foods = lambda term: [
+        {"fdcId": i, "description": f"{term} {i}", "foodNutrients": []} for i in range(20)
+    ]
+
+    with patch(
+        "src.features.recommendations.recommendation_engine.DietProfile", wraps=DietProfile
+    ) as profile_cls:
+        recommendations = await engine.get_recommendations(
+            UserPreferences(favorite_ingredients=["cheese"]), diet, limit=3
+        )
+
+    assert profile_cls.call_count == 1
+    assert len(recommendations) == 3
+    engine.nutrition_analyzer.analyze_nutritional_profile.assert_not_called()